@@ -0,0 +1,41 @@
+"""
+Normalize legacy users.details JSON into the canonical shape of
+src.common.details_schema, in small keyset-ordered transactions.
+
+    python scripts/backfill_details.py --batch-size 500 --sleep 0.2
+
+An interrupted run resumes from the checkpoint kept in redis, --restart
+ignores it and --after starts after a given uuid. Safe to run again at any
+time, rows already normalized are skipped.
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+def main():
+    from src.common import details_schema
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--batch-size", type=int, default=details_schema.BACKFILL_BATCH_SIZE)
+    parser.add_argument("--sleep", type=float, default=details_schema.BACKFILL_SLEEP)
+    parser.add_argument("--after")
+    parser.add_argument("--restart", action="store_true")
+    parser.add_argument("--max-batches", type=int)
+    args = parser.parse_args()
+
+    batches = details_schema.backfill(
+        batch_size=args.batch_size,
+        sleep=args.sleep,
+        after=args.after,
+        restart=args.restart,
+        max_batches=args.max_batches,
+    )
+    print(f"Normalized {batches} batches")
+
+
+if __name__ == "__main__":
+    main()
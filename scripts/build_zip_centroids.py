@@ -0,0 +1,71 @@
+"""
+Build data/zip_centroids.npy, the table behind src.common.geo.zip_centroids.
+
+The source is the Census Bureau ZCTA Gazetteer file (public domain), e.g.
+https://www2.census.gov/geo/docs/maps-data/data/gazetteer/2023_Gazetteer/2023_Gaz_zcta_national.zip
+
+    python scripts/build_zip_centroids.py 2023_Gaz_zcta_national.zip
+
+The source can also be given as a URL, which is how `make zip_centroids`
+builds the table into the Docker image. Any tab or comma separated file with
+GEOID (or zip), INTPTLAT (or lat) and INTPTLONG (or long) columns works as
+well.
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+COLUMN_NAMES = {
+    "geoid": "zip",
+    "zcta5": "zip",
+    "zip": "zip",
+    "intptlat": "lat",
+    "lat": "lat",
+    "intptlong": "long",
+    "long": "long",
+}
+
+
+def load(path: str):
+    df = pd.read_csv(path, sep=None, engine="python", dtype=str)
+    df.columns = [COLUMN_NAMES.get(column.strip().lower(), column) for column in df.columns]
+    missing = {"zip", "lat", "long"} - set(df.columns)
+    if missing:
+        raise SystemExit(f"{path}: missing columns {sorted(missing)}")
+    df = pd.DataFrame(
+        {
+            "zip": pd.to_numeric(df["zip"].str.strip(), errors="coerce"),
+            "lat": pd.to_numeric(df["lat"], errors="coerce"),
+            "long": pd.to_numeric(df["long"], errors="coerce"),
+        }
+    ).dropna()
+    return df.drop_duplicates("zip").sort_values("zip")
+
+
+def main():
+    from src.common import geo
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("source")
+    parser.add_argument("--output", default=geo.ZIP_CENTROIDS_PATH)
+    args = parser.parse_args()
+
+    df = load(args.source)
+    table = np.zeros(len(df), dtype=geo.ZIP_CENTROID_DTYPE)
+    table["zip"] = df["zip"].to_numpy()
+    table["lat"] = df["lat"].to_numpy()
+    table["long"] = df["long"].to_numpy()
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    np.save(args.output, table)
+    print(f"Wrote {len(table)} ZIP centroids to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
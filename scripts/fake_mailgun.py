@@ -0,0 +1,121 @@
+"""
+Local stand-in for the Mailgun messages API, to benchmark email delivery
+without sending mail.
+
+    python scripts/fake_mailgun.py serve --port 8025 --latency 0.15
+    python scripts/fake_mailgun.py bench --port 8025 --emails 500
+
+serve answers POST /v3/<domain>/messages with a Mailgun style 200 after
+--latency seconds and counts requests and recipients (GET /stats).
+bench (MAILGUN_* settings apply, they default to the local server) pushes
+--emails single sends through the delivery queue, then the same
+recipients as one batch send, and prints the throughput of both.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import ClassVar
+from urllib.parse import parse_qs
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+class FakeMailgunHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    stats: ClassVar[dict] = {"requests": 0, "recipients": 0}
+    lock = threading.Lock()
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            with self.lock:
+                return self._reply(200, dict(self.stats))
+        self._reply(404, {"message": "Not found"})
+
+    def do_POST(self):
+        if not self.path.endswith("/messages"):
+            return self._reply(404, {"message": "Not found"})
+        length = int(self.headers.get("Content-Length", 0))
+        form = parse_qs(self.rfile.read(length).decode())
+        recipients = form.get("to", [])
+        if not recipients or "from" not in form:
+            return self._reply(400, {"message": "'from' and 'to' are required"})
+        time.sleep(self.latency)
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["recipients"] += len(recipients)
+        self._reply(200, {"id": f"<{uuid.uuid4()}@fake>", "message": "Queued. Thank you."})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(args):
+    FakeMailgunHandler.latency = args.latency
+    server = ThreadingHTTPServer((args.host, args.port), FakeMailgunHandler)
+    print(f"Fake Mailgun listening on http://{args.host}:{args.port}/v3")  # noqa: T201
+    server.serve_forever()
+
+
+def bench(args):
+    os.environ.setdefault("MAILGUN_API_BASE", f"http://127.0.0.1:{args.port}/v3")
+    os.environ.setdefault("MAILGUN_DOMAIN", "example.test")
+    os.environ.setdefault("MAILGUN_API_KEY", "fake-key")
+    from src.common import email_service
+
+    recipients = {
+        f"user{index}@example.test": {"first_name": f"User {index}"}
+        for index in range(args.emails)
+    }
+
+    started = time.perf_counter()
+    futures = [
+        email_service.enqueue_email(email, "Benchmark", "<p>Hello</p>")
+        for email in recipients
+    ]
+    sent = sum(1 for future in futures if future.result())
+    elapsed = time.perf_counter() - started
+    print(f"queued singles: {sent}/{args.emails} in {elapsed:.2f}s ({sent / elapsed:.1f}/s)")  # noqa: T201
+
+    started = time.perf_counter()
+    sent = email_service.enqueue_batch(
+        recipients, "Benchmark", "<p>Hello %recipient.first_name%</p>"
+    ).result()
+    elapsed = time.perf_counter() - started
+    print(f"batch send:     {sent}/{args.emails} in {elapsed:.2f}s ({sent / elapsed:.1f}/s)")  # noqa: T201
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8025)
+    serve_parser.add_argument("--latency", type=float, default=0.15)
+    serve_parser.set_defaults(func=serve)
+
+    bench_parser = commands.add_parser("bench")
+    bench_parser.add_argument("--port", type=int, default=8025)
+    bench_parser.add_argument("--emails", type=int, default=500)
+    bench_parser.set_defaults(func=bench)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
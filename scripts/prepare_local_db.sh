@@ -4,6 +4,7 @@ echo "postgres is up"
 
 PGPASSWORD=postgres psql -h localhost -U postgres -c 'drop database if exists "fast-scan";'
 PGPASSWORD=postgres psql -h localhost -U postgres -c 'create database "fast-scan";'
+PGPASSWORD=postgres psql -h localhost -U postgres -d fast-scan -c 'create extension if not exists pg_trgm;'
 
 echo "fast-scan database created"
 cat secrets_test.json
@@ -4,6 +4,7 @@ echo "postgres is up"
 
 PGPASSWORD=postgres psql -h postgres -U postgres -c 'drop database if exists "fast-scan-test";'
 PGPASSWORD=postgres psql -h postgres -U postgres -c 'create database "fast-scan-test";'
+PGPASSWORD=postgres psql -h postgres -U postgres -d fast-scan-test -c 'create extension if not exists pg_trgm;'
 
 echo "fast-scan-test database created"
 cat secrets_test.json
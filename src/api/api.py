@@ -1,16 +1,27 @@
+import asyncio
 import os
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
+from src.common import outbox
 from src.configs.config import logger
 from src.routers import admin, chat, client, payment, provider, user , casemanager
 from src.authentication.auth_middleware import AuthMiddleware
 
 logger.log_info("Server started!")
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    dispatcher = asyncio.create_task(outbox.dispatcher())
+    yield
+    dispatcher.cancel()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
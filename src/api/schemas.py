@@ -314,8 +314,9 @@ class ClientResponseget(BaseModel):
 
 
 class ListofClientResponse(BaseModel):
-    total_client: int
+    total_client: int | None
     client: List[ClientResponseget]
+    next_cursor: str | None = None
 
 
 class UpdateClient(BaseModel):
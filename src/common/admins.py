@@ -1,13 +1,11 @@
-import csv
-import io
 import json
 import os
 import uuid
 from datetime import datetime
 
 import stripe
-from fastapi import Depends, File, HTTPException, Request, Response, UploadFile, status
-from fastapi.responses import JSONResponse
+from fastapi import Depends, File, HTTPException, Request, UploadFile, status
+from fastapi.responses import FileResponse, JSONResponse
 from pydantic import UUID4, EmailStr
 from sqlalchemy import UUID, String, case, cast, func, or_
 from sqlalchemy.dialects.postgresql import JSONB
@@ -16,8 +14,9 @@ from sqlalchemy import update
 from src.api import schemas
 from src.api.schemas import SubAdminCreate
 from src.authentication.encryption import decrypt_password, encrypt_password, secret_key
+from src.common import counting, exports, matching, reference_cache
 from src.common.email_service import send_email
-from src.common.translate import translate_fields
+from src.common.translate import translate_fields, translate_many
 from src.configs import database
 from src.configs.config import logger
 from src.models import models
@@ -428,7 +427,11 @@ def get_sub_admin(subadmin_uuid: uuid, db: Session):
 
 
 async def get_all_subadmins(
-    skip: int, limit: int, db: Session, name_original: str = None
+    skip: int,
+    limit: int,
+    db: Session,
+    name_original: str = None,
+    count_strategy: str = counting.EXACT,
 ):
     try:
         name = await translate_fields(name_original, fields=[])
@@ -458,7 +461,7 @@ async def get_all_subadmins(
             )
 
         subadmins = query.offset(skip).limit(limit).all()
-        total_subadmins = query.count()
+        total_subadmins = counting.count_rows(query, db, count_strategy, "subadmins")
 
         formatted_subadmins = [
             {
@@ -581,6 +584,7 @@ def create_subscriptions(subscription: schemas.createSubscription, db: Session):
         db.add(new_subscription)
         db.commit()
         db.refresh(new_subscription)
+        reference_cache.invalidate(reference_cache.SUBSCRIPTIONS)
 
         return new_subscription
 
@@ -712,6 +716,7 @@ def update_subscription(
 
         db.commit()
         db.refresh(existing_subscription)
+        reference_cache.invalidate(reference_cache.SUBSCRIPTIONS)
 
         return existing_subscription
 
@@ -757,6 +762,7 @@ def delete_subscriptions(subscription_id: int, db: Session):
             )
         db.delete(subscription)
         db.commit()
+        reference_cache.invalidate(reference_cache.SUBSCRIPTIONS)
         return {
             "detail": f"Subscription of id {subscription_id} is deleted successfully"
         }
@@ -766,7 +772,7 @@ def delete_subscriptions(subscription_id: int, db: Session):
 
 async def create_cat(category_original: schemas.CategoryCreate, db: Session):
     try:
-        category = await translate_fields(
+        category = await translate_many(
             category_original, fields=["category_name", "sub_category_name"]
         )
 
@@ -801,6 +807,9 @@ async def create_cat(category_original: schemas.CategoryCreate, db: Session):
             )
             db.add(new_subcategory)
         db.commit()
+        reference_cache.invalidate(
+            reference_cache.CATEGORIES, reference_cache.SUB_CATEGORIES
+        )
 
         return {
             "category": new_category,
@@ -838,6 +847,7 @@ async def create_sub(subcategory_original: schemas.SubCategoryCreate, db: Sessio
         db.add(new_sub)
         db.commit()
         db.refresh(new_sub)
+        reference_cache.invalidate(reference_cache.SUB_CATEGORIES)
         return new_sub
 
     except HTTPException as e:
@@ -982,6 +992,9 @@ def delete_category(category_id: int,user_uuid, db: Session):
         for sub_category in sub_categories:
             db.delete(sub_category)
             db.commit()
+        reference_cache.invalidate(
+            reference_cache.CATEGORIES, reference_cache.SUB_CATEGORIES
+        )
         return {
             "detail": f"Category with ID {category_id} has been deleted, and all its subcategories have been removed."
         }
@@ -1002,6 +1015,7 @@ def delete_subcategory(sub_category_id: int, db: Session):
             )
         db.delete(subcategory)
         db.commit()
+        reference_cache.invalidate(reference_cache.SUB_CATEGORIES)
         return {
             "detail": f"Sub Category with ID {sub_category_id} is deleted successfully"
         }
@@ -1083,6 +1097,9 @@ async def edit_category(
                     db.add(new_sub_category)
         db.commit()
         db.refresh(existing_category)
+        reference_cache.invalidate(
+            reference_cache.CATEGORIES, reference_cache.SUB_CATEGORIES
+        )
         return {
             "category": existing_category,
             "subcategories": db.query(models.SubCategory)
@@ -1124,6 +1141,7 @@ async def other_category(
         db.add(new_category)
         db.commit()
         db.refresh(new_category)
+        reference_cache.invalidate(reference_cache.CATEGORIES)
 
         return new_category
     except HTTPException as e:
@@ -1163,6 +1181,7 @@ async def other_sub_category(
         db.add(new_subcategory)
         db.commit()
         db.refresh(new_subcategory)
+        reference_cache.invalidate(reference_cache.SUB_CATEGORIES)
         
         return new_subcategory
     except HTTPException as e:
@@ -1202,6 +1221,8 @@ def approve_category(category_id: int,user_uuid,db: Session):
 
         db.commit()
         db.refresh(category)
+        reference_cache.invalidate(reference_cache.CATEGORIES)
+        matching.invalidate_providers()
 
         return category
 
@@ -1226,6 +1247,8 @@ def reject_category(category_id: int, db: Session):
 
         db.commit()
         db.refresh(category)
+        reference_cache.invalidate(reference_cache.CATEGORIES)
+        matching.invalidate_providers()
 
         return category
 
@@ -1280,6 +1303,7 @@ def update_subcategory(data ,db: Session):
 
         db.commit()
         db.refresh(subcategory)
+        reference_cache.invalidate(reference_cache.SUB_CATEGORIES)
 
         return subcategory
     
@@ -1569,7 +1593,7 @@ async def get_all_adbanner(
 async def create_broadcast(
     broadcast_original: schemas.BroadcastMessageCreate, db: Session = Depends(get_db)
 ):
-    broadcast = await translate_fields(broadcast_original, fields=["title", "message"])
+    broadcast = await translate_many(broadcast_original, fields=["title", "message"])
 
     # Convert UUIDs to strings
     broadcast_dict = broadcast.dict()
@@ -1636,7 +1660,12 @@ def read_broadcast(broadcast_id: int, db: Session = Depends(get_db)):
 
 
 async def get_all_broadcast(
-    user_id: UUID4, skip: int, limit: int, db: Session, title_original: str = None
+    user_id: UUID4,
+    skip: int,
+    limit: int,
+    db: Session,
+    title_original: str = None,
+    count_strategy: str = counting.EXACT,
 ):
     try:
         title = await translate_fields(title_original, fields=[])
@@ -1662,7 +1691,9 @@ async def get_all_broadcast(
                 )
             )
         query = query.order_by(models.BroadcastMessage.created_at.desc())
-        total_broadcasts = query.count()
+        total_broadcasts = counting.count_rows(
+            query, db, count_strategy, "broadcasts"
+        )
         broadcast_messages = query.offset(skip).limit(limit).all()
 
         broadcasts_result = []
@@ -1777,8 +1808,18 @@ async def create_admin(admin: schemas.Admin, db: Session = Depends(get_db)):
         return e
 
 
-def generate_report(db: Session):
-    """Generate CSV report for revenue data from the Membership table"""
+REVENUE_REPORT_HEADER = [
+    "Profile",
+    "Provider",
+    "Purchase Date",
+    "Expiry Date",
+    "Subscription Plan",
+    "Amount Collected",
+]
+
+
+def revenue_report_query(db: Session):
+    """Latest membership and total paid per provider, one row per provider."""
 
     # Subquery to get the latest membership for each provider using ROW_NUMBER.
     latest_subquery = db.query(
@@ -1807,7 +1848,7 @@ def generate_report(db: Session):
         .subquery()
     )
     # Query Memberships with relevant details
-    memberships = (
+    return (
         db.query(
             models.User.profile_img,
             models.User.uuid,
@@ -1864,48 +1905,35 @@ def generate_report(db: Session):
         .distinct()
     )
 
-    # Create CSV in memory
-    output = io.StringIO()
-    writer = csv.writer(output)
-
-    # Write header
-    writer.writerow(
-        [
-            "Profile",
-            "Provider",
-            "Purchase Date",
-            "Expiry Date",
-            "Subscription Plan",
-            "Amount Collected",
-        ]
-    )
 
-    # Write membership data
-    for membership in memberships:
-        writer.writerow(
-            [
-                membership.profile_img if membership.profile_img else "N/A",
-                membership.provider_name or "Unknown",
-                membership.latest_billing_date.strftime("%Y-%m-%d")
+def revenue_report_rows():
+    with exports.export_session() as db:
+        for membership in exports.stream_rows(revenue_report_query(db)):
+            yield {
+                "Profile": membership.profile_img if membership.profile_img else "N/A",
+                "Provider": membership.provider_name or "Unknown",
+                "Purchase Date": membership.latest_billing_date.strftime("%Y-%m-%d")
                 if membership.latest_billing_date
                 else "N/A",
-                membership.expiry_date.strftime("%Y-%m-%d")
+                "Expiry Date": membership.expiry_date.strftime("%Y-%m-%d")
                 if membership.expiry_date
                 else "N/A",
-                membership.subscription_name,
-                membership.total_amount or 0,
-            ]
-        )
+                "Subscription Plan": membership.subscription_name,
+                "Amount Collected": membership.total_amount or 0,
+            }
 
-    # Return CSV response
-    response = Response(content=output.getvalue(), media_type="text/csv")
-    response.headers["Content-Disposition"] = "attachment; filename=revenue_report.csv"
 
-    return response
+def generate_report():
+    """Stream the revenue CSV report built from the Membership table"""
+    return exports.streaming_response(
+        exports.csv_chunks(REVENUE_REPORT_HEADER, revenue_report_rows()),
+        exports.CSV_MEDIA_TYPE,
+        "revenue_report.csv",
+    )
 
 
 async def add_rating_question(question_original: schemas.RatingQuestion, db: Session):
-    question = await translate_fields(
+    question = await translate_many(
         question_original, fields=["question_text", "target_user"]
     )
 
@@ -2286,7 +2314,7 @@ def delete_organization_type(org_type_id: int, db: Session = Depends(get_db)):
                 "status": 404,
                 "detail": "Organization type not found"
             }
-        service_provider = db.query(models.User).filter(cast(models.User.details["service_provider"]["organization_type"].astext,String,)== str(existing_org_type.name)).count()
+        service_provider = db.query(models.User).filter(models.User.sp_organization_type == str(existing_org_type.name)).count()
         if service_provider >= 1:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -2456,5 +2484,29 @@ def delete_site_settings(db: Session = Depends(get_db)):
         }
 
 def export_data(db:Session = Depends(get_db),id:UUID4 = None):
-    pass
+    """Serve the file of a finished export job, or the job state until then."""
+    job = db.query(models.ExportJob).filter(models.ExportJob.id == id).first() if id else None
+    if not job:
+        return JSONResponse(status_code=404, content={"message": "Export job not found"})
+
+    if job.status == "failed":
+        return JSONResponse(
+            status_code=500,
+            content={"message": "Export failed", "status": job.status, "error": job.error},
+        )
+    if job.status != "completed":
+        return JSONResponse(
+            status_code=202,
+            content={
+                "message": f"Export is {job.status}",
+                "status": job.status,
+                "processed_rows": job.processed_rows,
+                "total_rows": job.total_rows,
+            },
+        )
+    if not job.file_path or not os.path.exists(job.file_path):
+        return JSONResponse(status_code=404, content={"message": "Export file no longer available"})
+
+    media_type = exports.XLSX_MEDIA_TYPE if job.format == "xlsx" else exports.CSV_MEDIA_TYPE
+    return FileResponse(job.file_path, media_type=media_type, filename=job.filename)
     
\ No newline at end of file
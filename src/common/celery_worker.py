@@ -4,5 +4,5 @@ celery_app = Celery(
     "notification_tasks",
     broker="redis://redis:6379/0",
     backend="redis://redis:6379/0",
-    include=["src.common.tasks"],
+    include=["src.common.tasks", "src.common.export_jobs", "src.common.import_jobs"],
 )
@@ -16,13 +16,13 @@ from src.api.schemas import (
     UpdateClientSetting,
 )
 from src.authentication.encryption import encrypt_password, secret_key
+from src.common import details_schema, matching, outbox, reference_cache
 from src.common.email_service import send_email
-from src.common.translate import translate_fields
+from src.common.translate import translate_fields, translate_many
 from src.common.user import save_uploaded_file, save_uploaded_pdf
 from src.configs import database
 from src.configs.config import logger
 from src.models import models
-from src.routers.chat import manager
 
 get_db = database.get_db
 
@@ -37,7 +37,7 @@ async def create_client_self(
     db: Session = Depends(get_db),
 ):
     try:
-        client = await translate_fields(
+        client = await translate_many(
             client_original,
             fields=[
                 "first_name",
@@ -118,11 +118,9 @@ async def create_client_self(
         )
         encrypted_password = encrypt_password(client.password, secret_key)
 
-        primary_need = (
-            db.query(models.Category)
-            .filter(models.Category.category_id == client.primary_need)
-            .first()
-        )
+        primary_need = client.primary_need
+        if reference_cache.category_name(primary_need, db) is None:
+            primary_need = None
         secondary_need = client.secondary_need or []
 
         new_client = models.User(
@@ -158,7 +156,7 @@ async def create_client_self(
                     "socialmedia_links": client.socialmedia_links,
                     "question": client.question,
                     # "primary_need": primary_need,
-                    "primary_need": primary_need.category_id if primary_need else None,
+                    "primary_need": primary_need,
                     "secondary_need": secondary_need,
                     # "category_id": category_id,
                     "resume": resume_url,
@@ -421,6 +419,7 @@ def service_provider_rating(rating: schemas.Rating, db: Session):
             .values(details=details)
         )
         db.commit()
+        matching.invalidate_providers()
 
         return {
             "message": "Rating submitted successfully",
@@ -456,16 +455,14 @@ async def send_request(request_data: schemas.RequestCreate, db: Session):
         client_first_name = client_details.get("first_name", "Unknown")
         client_last_name = client_details.get("last_name", "Unknown")
 
-        # Save request
+        # Request, notification and the outbox events for the push and the
+        # email are committed together.
         db_request = models.Request(
             id=str(uuid.uuid4()),
             client_id=request_data.client_id,
             provider_id=request_data.provider_id,
         )
-
         db.add(db_request)
-        db.commit()
-        db.refresh(db_request)
 
         # Send notification to service provider
         notification = models.Notification(
@@ -476,19 +473,22 @@ async def send_request(request_data: schemas.RequestCreate, db: Session):
             type="SEND_REQUEST_NOTIFY",
         )
         db.add(notification)
-        db.commit()
-        db.refresh(notification)
 
         # Send real-time notificatio
-        await manager.send_to_user(
+        outbox.add_push(
+            db,
             request_data.provider_id,
             f"New Request: {client_first_name} {client_last_name} wants to connect with you.",
         )
-        await send_email(
-            request_data.provider_id,
+        outbox.add_email(
+            db,
+            provider_user.useremail,
             "New Connection Request",
             f"{request_data.client_id} has requested to connect with you",
         )
+        db.commit()
+        db.refresh(db_request)
+        outbox.notify()
         return db_request
 
     except Exception as e:
@@ -517,24 +517,15 @@ def change_assessment(client_uuid: UUID, need: schemas.ChangeAssessment, db: Ses
 
     db.commit()
     db.refresh(client)
+    matching.invalidate_client(client_uuid)
 
-    # Query for primary need (single integer)
-    primary_need_obj = (
-        db.query(models.Category)
-        .filter(models.Category.category_id == need.primary_need)
-        .first()
-    )
-    updated_primary_need = primary_need_obj.category_name if primary_need_obj else None
-
-    # Query for secondary need (list of integers)
-    secondary_need_objs = (
-        db.query(models.Category)
-        .filter(models.Category.category_id.in_(need.secondary_need))
-        .all()
-    )
+    category_names = reference_cache.get_category_names(db)
+    updated_primary_need = category_names.get(need.primary_need)
     updated_secondary_need = [
-        obj.category_name for obj in secondary_need_objs
-    ]  # Get list of names
+        category_names[category_id]
+        for category_id in need.secondary_need or []
+        if category_id in category_names
+    ]
 
     return {
         "message": "Primary need updated successfully",
@@ -557,15 +548,15 @@ def get_client_dashboard(client_uuid: UUID, db: Session):
         .count()
     )
 
-    category_id = client.details.get("client", {}).get("category_id")
+    category_ids = details_schema.as_ids(
+        client.details.get("client", {}).get("category_id")
+    )
 
     category_name = None
-    if category_id:
-        category = (
-            db.query(models.Category)
-            .filter(models.Category.category_id == category_id)
-            .first()
+    if category_ids:
+        category_name = ", ".join(
+            reference_cache.category_name(category_id, db, "Unknown")
+            for category_id in category_ids
         )
-        category_name = category.category_name if category else "Unknown"
 
     return {"service_provider": total_service_provider, "category": category_name}
@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+
+from fastapi import HTTPException, status
+from sqlalchemy import text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from src.common.tasks import redis_app
+from src.configs.config import logger
+
+EXACT = "exact"
+ESTIMATED = "estimated"
+CACHED = "cached"
+COUNT_STRATEGIES = [EXACT, ESTIMATED, CACHED]
+
+COUNT_CACHE_TTL = int(os.getenv("COUNT_CACHE_TTL", "60"))
+COUNT_CACHE_PREFIX = "count"
+
+
+class Explain(Executable, ClauseElement):
+    """``EXPLAIN (FORMAT JSON) <statement>``, compiled with ordinary bound params."""
+
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain)
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def _literal_sql(query, db: Session) -> str:
+    return str(
+        query.statement.compile(
+            dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True}
+        )
+    )
+
+
+def _table_estimate(query, db: Session):
+    """Planner row count for an unfiltered single table query."""
+    froms = query.statement.get_final_froms()
+    if query.whereclause is not None or len(froms) != 1:
+        return None
+    table_name = getattr(froms[0], "name", None)
+    if not table_name:
+        return None
+    reltuples = db.execute(
+        text("SELECT reltuples FROM pg_class WHERE relname = :name"),
+        {"name": table_name},
+    ).scalar()
+    if reltuples is None or reltuples < 0:
+        return None
+    return int(reltuples)
+
+
+def _explain_estimate(query, db: Session) -> int:
+    plan = db.execute(Explain(query.statement)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _estimated_count(query, db: Session) -> int:
+    try:
+        # A failed statement aborts the transaction; the savepoint keeps it
+        # usable for the exact count below.
+        with db.begin_nested():
+            estimate = _table_estimate(query, db)
+            if estimate is None:
+                estimate = _explain_estimate(query, db)
+        return estimate
+    except Exception as e:
+        logger.log_warning(f"Count estimate failed, falling back to exact: {e!s}")
+        return query.count()
+
+
+def _cached_count(query, db: Session, namespace: str) -> int:
+    try:
+        signature = _literal_sql(query, db)
+    except Exception:
+        signature = str(query.statement) + repr(
+            sorted(query.statement.compile().params.items())
+        )
+    key = (
+        f"{COUNT_CACHE_PREFIX}:{namespace}:"
+        f"{hashlib.sha1(signature.encode()).hexdigest()}"
+    )
+    try:
+        cached = redis_app.get(key)
+        if cached is not None:
+            return int(cached)
+    except Exception as e:
+        logger.log_warning(f"Count cache read failed: {e!s}")
+
+    total = query.count()
+    try:
+        redis_app.setex(key, COUNT_CACHE_TTL, total)
+    except Exception as e:
+        logger.log_warning(f"Count cache write failed: {e!s}")
+    return total
+
+
+def count_rows(query, db: Session, strategy: str | None = EXACT, namespace: str = "users"):
+    """
+    Total for a listing query.
+
+    - exact: ``query.count()``.
+    - estimated: ``pg_class.reltuples`` for unfiltered single table queries,
+      otherwise the planner's ``EXPLAIN`` row estimate.
+    - cached: exact count memoized in redis for COUNT_CACHE_TTL seconds, keyed
+      by the rendered SQL so each distinct filter set gets its own entry.
+    """
+    strategy = (strategy or EXACT).lower()
+    if strategy == EXACT:
+        return query.count()
+    if strategy == ESTIMATED:
+        return _estimated_count(query, db)
+    if strategy == CACHED:
+        return _cached_count(query, db, namespace)
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Invalid count strategy. Use one of {COUNT_STRATEGIES}.",
+    )
@@ -0,0 +1,186 @@
+import json
+import os
+import time
+
+from sqlalchemy import func, or_, update
+from sqlalchemy.orm import Session
+
+from src.common.tasks import redis_app
+from src.configs import database
+from src.configs.config import logger
+from src.models import models
+
+# users.details is rewritten once into the shapes of models.DETAILS_SHAPES
+# and stamped with SCHEMA_VERSION. Listings read users.details_normalized
+# and only run normalize_section for rows that are not there yet.
+SCHEMA_VERSION = 1
+SCHEMA_VERSION_KEY = "schema_version"
+
+BACKFILL_BATCH_SIZE = int(os.getenv("DETAILS_BACKFILL_BATCH_SIZE", "500"))
+# Pause between batches so the backfill does not starve the API of I/O.
+BACKFILL_SLEEP = float(os.getenv("DETAILS_BACKFILL_SLEEP", "0.2"))
+CHECKPOINT_KEY = "backfill:details_schema:last_uuid"
+
+
+def as_list(value):
+    """
+    A list from a JSON array string, a stringified Python list
+    ("['a', 'b']"), comma separated text or a scalar. None stays None.
+    """
+    if value is None or isinstance(value, list):
+        return value
+    if not isinstance(value, str):
+        return [value]
+    text = value.strip()
+    if text.startswith("["):
+        try:
+            parsed = json.loads(text)
+        except ValueError:
+            parsed = None
+        if isinstance(parsed, list):
+            return parsed
+        text = text.strip("[]")
+    items = (item.strip().strip("'\"").strip() for item in text.split(","))
+    return [item for item in items if item]
+
+
+def _to_id(value):
+    if isinstance(value, bool):
+        return None
+    try:
+        return int(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+
+
+def as_ids(value):
+    """The integer ids of a list, "1,2,3" or single id, anything else dropped."""
+    items = as_list(value)
+    if items is None:
+        return None
+    return [id for id in map(_to_id, items) if id is not None]
+
+
+def as_id(value):
+    """One id as an int, several as a list of ints, None when there is none."""
+    ids = as_ids(value)
+    if not ids:
+        return None
+    return ids[0] if len(ids) == 1 else ids
+
+
+SHAPES = {"list": as_list, "ids": as_ids, "id": as_id}
+
+
+def normalize_section(section: str, values: dict):
+    """A copy of one details section with its multi-valued keys in canonical shape."""
+    values = dict(values)
+    for key, shape in models.DETAILS_SHAPES.get(section, {}).items():
+        if key in values:
+            values[key] = SHAPES[shape](values[key])
+    return values
+
+
+def normalize_details(details: dict):
+    details = {
+        section: normalize_section(section, values) if isinstance(values, dict) else values
+        for section, values in details.items()
+    }
+    details[SCHEMA_VERSION_KEY] = SCHEMA_VERSION
+    return details
+
+
+def _pending():
+    return or_(
+        models.User.details_normalized.isnot(True),
+        models.User.details[SCHEMA_VERSION_KEY].astext.is_distinct_from(
+            str(SCHEMA_VERSION)
+        ),
+    )
+
+
+def backfill_batch(db: Session, after=None, batch_size: int = BACKFILL_BATCH_SIZE):
+    """
+    Normalize the next batch of rows after the uuid `after` (keyset order) in
+    one short transaction. Returns the last uuid seen, None when done.
+
+    The keyset only moves forward, so rows locked by a request are waited
+    for rather than skipped; a skipped row would never be revisited. Rows
+    whose details are not a JSON object have no sections to normalize and
+    are left as they are.
+    """
+    query = db.query(models.User.uuid, models.User.details).filter(
+        func.jsonb_typeof(models.User.details) == "object", _pending()
+    )
+    if after is not None:
+        query = query.filter(models.User.uuid > after)
+    rows = query.order_by(models.User.uuid).limit(batch_size).with_for_update().all()
+    if not rows:
+        db.commit()
+        return None
+    db.execute(
+        update(models.User),
+        [
+            {"uuid": uuid, "details": normalize_details(details)}
+            for uuid, details in rows
+        ],
+    )
+    db.commit()
+    return rows[-1].uuid
+
+
+def _checkpoint():
+    try:
+        return redis_app.get(CHECKPOINT_KEY)
+    except Exception as e:
+        logger.log_warning(f"Backfill checkpoint read failed: {e!s}")
+        return None
+
+
+def _save_checkpoint(last_uuid):
+    try:
+        if last_uuid is None:
+            redis_app.delete(CHECKPOINT_KEY)
+        else:
+            redis_app.set(CHECKPOINT_KEY, str(last_uuid))
+    except Exception as e:
+        logger.log_warning(f"Backfill checkpoint write failed: {e!s}")
+
+
+def backfill(
+    batch_size: int = BACKFILL_BATCH_SIZE,
+    sleep: float = BACKFILL_SLEEP,
+    after=None,
+    restart: bool = False,
+    max_batches: int = None,
+):
+    """
+    Rewrite every legacy users.details row, batch by batch. Progress is
+    checkpointed in redis after each commit, so an interrupted run continues
+    where it stopped; rows already normalized are never rewritten.
+    """
+    if after is None and not restart:
+        after = _checkpoint()
+    if after is not None:
+        logger.log_info(f"Details backfill resuming after {after}")
+    db = database.SessionLocal()
+    batches = 0
+    try:
+        while max_batches is None or batches < max_batches:
+            last_uuid = backfill_batch(db, after, batch_size)
+            if last_uuid is None:
+                _save_checkpoint(None)
+                logger.log_info(f"Details backfill finished after {batches} batches")
+                return batches
+            after = last_uuid
+            batches += 1
+            _save_checkpoint(after)
+            logger.log_info(f"Details backfill batch {batches} done, last uuid {after}")
+            if sleep:
+                time.sleep(sleep)
+        return batches
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
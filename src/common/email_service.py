@@ -1,4 +1,12 @@
-import os,httpx
+import asyncio
+import json
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
 from pydantic import EmailStr
 from src.common.logger import Logger
 
@@ -15,30 +23,187 @@ GMAIL_PASSWORD = "pgts meql cmle ahrd"
 MAILGUN_API_KEY = os.getenv("MAILGUN_API_KEY")
 MAILGUN_DOMAIN = os.getenv("MAILGUN_DOMAIN")
 MAILGUN_SENDER = f"Mailgun Sandbox <postmaster@{MAILGUN_DOMAIN}>"
+# Point at scripts/fake_mailgun.py (http://127.0.0.1:8025/v3) to benchmark
+# delivery offline without sending real mail.
+MAILGUN_API_BASE = os.getenv("MAILGUN_API_BASE", "https://api.mailgun.net/v3")
 
+# Mailgun accepts at most 1000 recipients per batch message.
+MAILGUN_BATCH_SIZE = 1000
+# Sends running at once, and sends allowed to wait behind them before
+# enqueue_* waits for room.
+SEND_CONCURRENCY = int(os.getenv("MAILGUN_CONCURRENCY", "8"))
+SEND_QUEUE_SIZE = int(os.getenv("MAILGUN_QUEUE_SIZE", "1000"))
+# API requests per second, with bursts of up to MAILGUN_BURST requests.
+SEND_RATE = float(os.getenv("MAILGUN_RATE_PER_SECOND", "10"))
+SEND_BURST = int(os.getenv("MAILGUN_BURST", "20"))
 
+# One pooled client for every send. The sync API is thread safe, it is called
+# from the delivery threads and through asyncio.to_thread, so connections are
+# reused across the event loops the sync routes create with asyncio.run.
+_http_client = httpx.Client(
+    timeout=httpx.Timeout(10.0),
+    limits=httpx.Limits(
+        max_connections=SEND_CONCURRENCY * 2,
+        max_keepalive_connections=SEND_CONCURRENCY,
+    ),
+)
 
-async def send_email(recipient: EmailStr, subject: str, body: str):
+
+class TokenBucket:
+    """Thread safe token bucket, acquire() blocks until a token is available."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+_rate_limiter = TokenBucket(SEND_RATE, SEND_BURST)
+
+
+def _post_message(data):
+    """One rate limited Mailgun API call, returns True when it was accepted."""
+    _rate_limiter.acquire()
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.post(
-                f"https://api.mailgun.net/v3/{MAILGUN_DOMAIN}/messages",
-                auth=("api", MAILGUN_API_KEY),
-                data={
-                    "from": MAILGUN_SENDER,  
-                    "to": [recipient],
-                    "subject": subject,
-                    "html": body,
-                },
-            )
-
-        if response.status_code == 200:
-            logger.log_info("Email sent successfully via Mailgun.")
-        else:
-            logger.log_error(f"Mailgun send error: {response.status_code} - {response.text}")
-        return response.status_code == 200
-    
+        response = _http_client.post(
+            f"{MAILGUN_API_BASE}/{MAILGUN_DOMAIN}/messages",
+            auth=("api", MAILGUN_API_KEY),
+            data=data,
+        )
     except httpx.RequestError as e:
         logger.log_error(f"Request error while sending email: {e}")
+        return False
     except Exception as e:
         logger.log_error(f"Unexpected exception during email sending: {e}")
+        return False
+
+    if response.status_code == 200:
+        logger.log_info("Email sent successfully via Mailgun.")
+    else:
+        logger.log_error(f"Mailgun send error: {response.status_code} - {response.text}")
+    return response.status_code == 200
+
+
+def _message(recipients, subject: str, body: str):
+    return {
+        "from": MAILGUN_SENDER,
+        "to": recipients,
+        "subject": subject,
+        "html": body,
+    }
+
+
+async def send_email(recipient: EmailStr, subject: str, body: str):
+    return await asyncio.to_thread(
+        _post_message, _message([recipient], subject, body)
+    )
+
+
+def _recipient_variables(variables):
+    """Variables as JSON-safe values; pandas fills missing cells with NaN."""
+    return {
+        name: None if isinstance(value, float) and math.isnan(value) else value
+        for name, value in variables.items()
+    }
+
+
+def send_batch_sync(recipients, subject: str, body: str):
+    """
+    Send one templated message to many recipients, MAILGUN_BATCH_SIZE per
+    request. recipients maps each email to its variables, referenced in the
+    subject/body as %recipient.<name>%. Mailgun delivers one message per
+    address, recipients never see each other. Returns the accepted count.
+    """
+    emails = list(recipients)
+    sent = 0
+    for start in range(0, len(emails), MAILGUN_BATCH_SIZE):
+        batch = emails[start : start + MAILGUN_BATCH_SIZE]
+        data = _message(batch, subject, body)
+        data["recipient-variables"] = json.dumps(
+            {email: _recipient_variables(recipients[email]) for email in batch},
+            default=str,
+        )
+        if _post_message(data):
+            sent += len(batch)
+    return sent
+
+
+async def send_batch(recipients, subject: str, body: str):
+    return await asyncio.to_thread(send_batch_sync, recipients, subject, body)
+
+
+class DeliveryQueue:
+    """
+    Bounded send queue: SEND_CONCURRENCY delivery threads, at most
+    SEND_QUEUE_SIZE sends waiting. Callers get a Future and return straight
+    away unless the queue is full, which pushes back on runaway producers.
+    submit waits for room on the calling thread, so it must not be called on
+    an event loop; async code uses submit_async, which waits in a worker thread.
+    """
+
+    def __init__(self, concurrency: int, size: int):
+        self.executor = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="mailgun"
+        )
+        self.slots = threading.BoundedSemaphore(concurrency + size)
+
+    def submit(self, fn, *args):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self.slots.acquire()
+            return self._start(fn, *args)
+        raise RuntimeError("DeliveryQueue.submit would block the event loop")
+
+    async def submit_async(self, fn, *args):
+        await asyncio.to_thread(self.slots.acquire)
+        return self._start(fn, *args)
+
+    def _start(self, fn, *args):
+        """Run fn on a delivery thread; the caller already holds a slot."""
+        try:
+            future = self.executor.submit(fn, *args)
+        except Exception:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+
+_queue = DeliveryQueue(SEND_CONCURRENCY, SEND_QUEUE_SIZE)
+
+
+def enqueue_email(recipient: EmailStr, subject: str, body: str):
+    """Queue one email without waiting for Mailgun, returns a Future[bool]."""
+    return _queue.submit(_post_message, _message([recipient], subject, body))
+
+
+async def enqueue_email_async(recipient: EmailStr, subject: str, body: str):
+    return await _queue.submit_async(
+        _post_message, _message([recipient], subject, body)
+    )
+
+
+def enqueue_batch(recipients, subject: str, body: str):
+    """Queue a send_batch_sync, returns a Future of the accepted count."""
+    return _queue.submit(send_batch_sync, recipients, subject, body)
+
+
+async def enqueue_batch_async(recipients, subject: str, body: str):
+    return await _queue.submit_async(send_batch_sync, recipients, subject, body)
@@ -0,0 +1,302 @@
+import hashlib
+import os
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from src.common import admins, exports, user
+from src.common.celery_worker import celery_app
+from src.configs import database
+from src.configs.config import logger
+from src.models import models
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+EXPORT_DIR = os.getenv("EXPORT_DIR", os.path.join(BASE_DIR, "exports"))
+# processed_rows is written back every PROGRESS_INTERVAL rows.
+PROGRESS_INTERVAL = int(os.getenv("EXPORT_PROGRESS_INTERVAL", "1000"))
+# A queued or running job without progress for this long is given up on.
+STALE_AFTER = timedelta(
+    seconds=int(os.getenv("EXPORT_STALE_AFTER_SECONDS", "1800"))
+)
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+ACTIVE_STATUSES = [QUEUED, RUNNING]
+
+EXPORT_FORMATS = {
+    "clients": ["csv", "xlsx"],
+    "service_providers": ["csv", "xlsx"],
+    "categories": ["csv"],
+    "revenue": ["csv"],
+}
+
+
+def _count_rows(export_type: str, db: Session):
+    if export_type == "clients":
+        return db.query(models.User).filter(models.User.role_type == "client").count()
+    if export_type == "service_providers":
+        return (
+            db.query(models.User)
+            .filter(models.User.role_type == "service_provider")
+            .count()
+        )
+    if export_type == "categories":
+        return (
+            db.query(models.Category.category_id)
+            .join(
+                models.SubCategory,
+                models.Category.category_id == models.SubCategory.category_id,
+                isouter=True,
+            )
+            .count()
+        )
+    return admins.revenue_report_query(db).count()
+
+
+def _records(export_type: str, language: str | None):
+    if export_type == "clients":
+        records = user.generate_client_data()
+        fields = user.CLIENT_EXPORT_TRANSLATED_FIELDS
+    elif export_type == "service_providers":
+        records = user.generate_service_provider_data()
+        fields = user.SERVICE_PROVIDER_EXPORT_TRANSLATED_FIELDS
+    elif export_type == "categories":
+        records, fields = user.generate_category_data(), []
+    else:
+        records, fields = admins.revenue_report_rows(), []
+    if language == "es" and fields:
+        records = exports.translate_records(records, fields)
+    return records
+
+
+def _chunks(export_type: str, export_format: str, records):
+    if export_type == "clients":
+        if export_format == "xlsx":
+            return user.generate_excel(records)
+        return user.generate_csv(records)
+    if export_type == "service_providers":
+        if export_format == "xlsx":
+            return user.generate_service_provider_excel(records)
+        return user.generate_service_provider_csv(records)
+    if export_type == "categories":
+        return exports.csv_chunks(["category_name", "sub_category_name"], records)
+    return exports.csv_chunks(admins.REVENUE_REPORT_HEADER, records)
+
+
+def dedupe_key(export_type: str, export_format: str, language: str | None):
+    raw = f"{export_type}:{export_format}:{language or ''}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def serialize_job(job: models.ExportJob):
+    progress = None
+    if job.total_rows:
+        progress = round(min(job.processed_rows / job.total_rows, 1.0) * 100, 1)
+    elif job.status == COMPLETED:
+        progress = 100.0
+    return {
+        "id": str(job.id),
+        "export_type": job.export_type,
+        "format": job.format,
+        "language": job.language,
+        "status": job.status,
+        "total_rows": job.total_rows,
+        "processed_rows": job.processed_rows,
+        "progress": progress,
+        "filename": job.filename,
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+def _export_path(job: models.ExportJob):
+    return os.path.join(EXPORT_DIR, f"{job.id}.{job.format}")
+
+
+def _remove_export_file(path: str | None):
+    if path and os.path.exists(path):
+        os.remove(path)
+
+
+def expire_stale_jobs(key: str, db: Session):
+    """
+    Fail queued or running jobs for key that have not moved for STALE_AFTER,
+    e.g. after a worker died, so they stop holding the active dedupe slot.
+    Any partial file they left behind is removed.
+    """
+    expired = (
+        db.query(models.ExportJob)
+        .filter(
+            models.ExportJob.dedupe_key == key,
+            models.ExportJob.status.in_(ACTIVE_STATUSES),
+            models.ExportJob.updated_at < datetime.now() - STALE_AFTER,
+        )
+        .all()
+    )
+    for job in expired:
+        job.status = FAILED
+        job.error = "Export stalled and was abandoned"
+        job.finished_at = datetime.now()
+        job.file_path = None
+        _remove_export_file(_export_path(job))
+    db.commit()
+    if expired:
+        logger.log_info(f"Expired {len(expired)} stale export job(s) for {key}")
+
+
+def remove_superseded_files(job: models.ExportJob, db: Session):
+    """Delete the files of earlier completed exports that job has replaced."""
+    superseded = (
+        db.query(models.ExportJob)
+        .filter(
+            models.ExportJob.dedupe_key == job.dedupe_key,
+            models.ExportJob.status == COMPLETED,
+            models.ExportJob.file_path.isnot(None),
+            models.ExportJob.id != job.id,
+        )
+        .all()
+    )
+    for previous in superseded:
+        _remove_export_file(previous.file_path)
+        previous.file_path = None
+    db.commit()
+
+
+def create_export_job(
+    export_type: str,
+    export_format: str,
+    language: str | None,
+    requested_by,
+    db: Session,
+):
+    """
+    Queue an export and return its job. While an identical export (type,
+    format, language) is still queued or running, that job is returned instead,
+    unless it has gone stale.
+    """
+    if export_format not in EXPORT_FORMATS.get(export_type, []):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported export. Use one of {EXPORT_FORMATS}.",
+        )
+    key = dedupe_key(export_type, export_format, language)
+    expire_stale_jobs(key, db)
+    job = models.ExportJob(
+        export_type=export_type,
+        format=export_format,
+        language=language,
+        dedupe_key=key,
+        status=QUEUED,
+        processed_rows=0,
+        requested_by=requested_by,
+    )
+    db.add(job)
+    try:
+        db.commit()
+    except IntegrityError:
+        # The partial unique index on active dedupe keys lost us the race.
+        db.rollback()
+        existing = (
+            db.query(models.ExportJob)
+            .filter(
+                models.ExportJob.dedupe_key == key,
+                models.ExportJob.status.in_(ACTIVE_STATUSES),
+            )
+            .first()
+        )
+        if existing:
+            logger.log_info(f"Export {export_type}/{export_format} joined job {existing.id}")
+            return {**serialize_job(existing), "coalesced": True}
+        raise
+    db.refresh(job)
+    try:
+        run_export_job.delay(str(job.id))
+    except Exception as e:
+        # Never leave a job queued that no worker will pick up.
+        logger.log_error(f"Export job {job.id} could not be queued: {e!s}")
+        job.status = FAILED
+        job.error = f"Could not queue export: {e!s}"
+        job.finished_at = datetime.now()
+        db.commit()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Export could not be queued, try again later.",
+        )
+    logger.log_info(f"Export job {job.id} queued for {export_type}/{export_format}")
+    return {**serialize_job(job), "coalesced": False}
+
+
+def get_export_job(job_id, db: Session):
+    job = db.query(models.ExportJob).filter(models.ExportJob.id == job_id).first()
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Export job not found"
+        )
+    return serialize_job(job)
+
+
+def _counted(records, job_id, db: Session):
+    """Pass records through, saving processed_rows every PROGRESS_INTERVAL rows."""
+    processed = 0
+    for record in records:
+        yield record
+        processed += 1
+        if processed % PROGRESS_INTERVAL == 0:
+            db.query(models.ExportJob).filter(models.ExportJob.id == job_id).update(
+                {"processed_rows": processed}
+            )
+            db.commit()
+    db.query(models.ExportJob).filter(models.ExportJob.id == job_id).update(
+        {"processed_rows": processed}
+    )
+    db.commit()
+
+
+@celery_app.task
+def run_export_job(job_id: str):
+    db = database.SessionLocal()
+    file_path = None
+    try:
+        job = db.query(models.ExportJob).filter(models.ExportJob.id == job_id).first()
+        if not job or job.status != QUEUED:
+            return
+        job.status = RUNNING
+        job.started_at = datetime.now()
+        job.total_rows = _count_rows(job.export_type, db)
+        job.filename = f"{job.export_type}_{datetime.now():%Y%m%d_%H%M%S}.{job.format}"
+        db.commit()
+
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        file_path = _export_path(job)
+        records = _counted(_records(job.export_type, job.language), job.id, db)
+        with open(file_path, "wb") as output:
+            for chunk in _chunks(job.export_type, job.format, records):
+                output.write(chunk)
+
+        job.status = COMPLETED
+        job.file_path = file_path
+        job.finished_at = datetime.now()
+        db.commit()
+        logger.log_info(f"Export job {job_id} completed with {job.processed_rows} rows")
+    except Exception as e:
+        logger.log_error(f"Export job {job_id} failed: {e!s}")
+        db.rollback()
+        _remove_export_file(file_path)
+        db.query(models.ExportJob).filter(models.ExportJob.id == job_id).update(
+            {
+                "status": FAILED,
+                "error": str(e),
+                "finished_at": datetime.now(),
+            }
+        )
+        db.commit()
+    else:
+        remove_superseded_files(job, db)
+    finally:
+        db.close()
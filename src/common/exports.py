@@ -0,0 +1,124 @@
+import asyncio
+import csv
+import io
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import date, datetime
+
+import xlsxwriter
+from fastapi.responses import StreamingResponse
+
+from src.common.translate import translate_records_to_spanish
+from src.configs import database
+
+# Exports are generator pipelines: server-side cursor -> row formatter -> file
+# encoder -> StreamingResponse, so memory stays flat whatever the row count.
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+# Rows buffered per translation round, each round translates only the distinct
+# strings not seen earlier in the export.
+TRANSLATE_WINDOW = int(os.getenv("EXPORT_TRANSLATE_WINDOW", "5000"))
+CHUNK_SIZE = 64 * 1024
+
+CSV_MEDIA_TYPE = "text/csv"
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+@contextmanager
+def export_session():
+    """
+    Exports run while the response streams, after the request's session is
+    closed, so every export opens and closes its own.
+    """
+    db = database.SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def stream_rows(query, batch_size: int = EXPORT_BATCH_SIZE):
+    """Iterate a query through a server-side cursor, batch_size rows at a time."""
+    return query.yield_per(batch_size)
+
+
+def translate_records(records, fields, window: int = TRANSLATE_WINDOW):
+    """
+    Translate the given fields to Spanish as records stream past. Rows are
+    buffered in windows and every distinct string of the export is sent to the
+    API once, in batched requests.
+    """
+    translations = {}
+    buffer = []
+    for record in records:
+        buffer.append(record)
+        if len(buffer) >= window:
+            yield from asyncio.run(
+                translate_records_to_spanish(buffer, fields, translations)
+            )
+            buffer = []
+    if buffer:
+        yield from asyncio.run(translate_records_to_spanish(buffer, fields, translations))
+
+
+def _csv_value(value):
+    if isinstance(value, (list, dict)):
+        return str(value)
+    return value
+
+
+def csv_chunks(fieldnames, records, header=None):
+    """Encode records (dicts) as CSV, yielding ~CHUNK_SIZE byte chunks."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header or fieldnames)
+    for record in records:
+        writer.writerow([_csv_value(record.get(field)) for field in fieldnames])
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def _xlsx_value(value):
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    if isinstance(value, date):
+        return value
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, default=str)
+    return str(value)
+
+
+def xlsx_chunks(fieldnames, records, sheet_name: str, header=None):
+    """
+    Write records to a temporary xlsx file in xlsxwriter's constant_memory mode
+    (each row is flushed to disk once the next one starts), then stream it.
+    """
+    with tempfile.NamedTemporaryFile(suffix=".xlsx") as output:
+        workbook = xlsxwriter.Workbook(output.name, {"constant_memory": True})
+        worksheet = workbook.add_worksheet(sheet_name)
+        date_format = workbook.add_format({"num_format": "yyyy-mm-dd hh:mm:ss"})
+        worksheet.write_row(0, 0, header or fieldnames)
+        for row_index, record in enumerate(records, start=1):
+            for column_index, field in enumerate(fieldnames):
+                value = _xlsx_value(record.get(field))
+                if isinstance(value, (datetime, date)):
+                    worksheet.write_datetime(row_index, column_index, value, date_format)
+                else:
+                    worksheet.write(row_index, column_index, value)
+        workbook.close()
+
+        output.seek(0)
+        while chunk := output.read(CHUNK_SIZE):
+            yield chunk
+
+
+def streaming_response(chunks, media_type: str, filename: str):
+    response = StreamingResponse(chunks, media_type=media_type)
+    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
+    return response
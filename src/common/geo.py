@@ -0,0 +1,142 @@
+import math
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func
+
+from src.configs.config import logger
+
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE_LAT = 69.0
+LOCAL_RADIUS_MILES = 25
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+# Sorted (zip, lat, long) records built by scripts/build_zip_centroids.py.
+ZIP_CENTROIDS_PATH = os.getenv(
+    "ZIP_CENTROIDS_PATH", os.path.join(BASE_DIR, "data", "zip_centroids.npy")
+)
+ZIP_CENTROID_DTYPE = np.dtype([("zip", "<u4"), ("lat", "<f4"), ("long", "<f4")])
+
+
+def to_coordinate(value):
+    """Parse a lat/long stored in details (number, numeric string or junk)."""
+    try:
+        coordinate = float(value)
+    except (TypeError, ValueError):
+        return None
+    return coordinate if math.isfinite(coordinate) else None
+
+
+def bounding_box(lat: float, long: float, miles: float):
+    """
+    Return (min_lat, min_long, max_lat, max_long) of a box containing every point
+    within ``miles`` of (lat, long).
+    """
+    lat_delta = miles / MILES_PER_DEGREE_LAT
+    cos_lat = math.cos(math.radians(lat))
+    if cos_lat < 1e-6:
+        long_delta = 180.0
+    else:
+        long_delta = min(180.0, lat_delta / cos_lat)
+    return lat - lat_delta, long - long_delta, lat + lat_delta, long + long_delta
+
+
+def location_point(lat_column, long_column):
+    """``point(long, lat)``, the expression the GiST location indexes are built on."""
+    return func.point(long_column, lat_column)
+
+
+def within_box(lat_column, long_column, lat: float, long: float, miles: float):
+    """Index assisted prefilter: the location lies inside the bounding box."""
+    min_lat, min_long, max_lat, max_long = bounding_box(lat, long, miles)
+    return location_point(lat_column, long_column).op("<@")(
+        func.box(func.point(min_long, min_lat), func.point(max_long, max_lat))
+    )
+
+
+def distance_between(lat1: float, long1: float, lat2: float, long2: float):
+    """Python twin of distance_miles for rows that are already loaded."""
+    cosine = math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.cos(
+        math.radians(long2) - math.radians(long1)
+    ) + math.sin(math.radians(lat1)) * math.sin(math.radians(lat2))
+    return EARTH_RADIUS_MILES * math.acos(min(1.0, max(-1.0, cosine)))
+
+
+def nearest_first(lat_column, long_column, lat: float, long: float):
+    """
+    ``point <-> point`` ordering, answered by a GiST index scan (k-NN). The
+    distance is in planar degrees, so near equal candidates may swap places.
+    """
+    return location_point(lat_column, long_column).op("<->")(func.point(long, lat))
+
+
+def distance_miles(lat_column, long_column, lat: float, long: float):
+    """Great circle distance (spherical law of cosines) in miles."""
+    cosine = func.cos(func.radians(lat)) * func.cos(
+        func.radians(lat_column)
+    ) * func.cos(func.radians(long_column) - func.radians(long)) + func.sin(
+        func.radians(lat)
+    ) * func.sin(func.radians(lat_column))
+    # Rounding can push the cosine of a zero distance just past 1.
+    return EARTH_RADIUS_MILES * func.acos(func.least(1.0, func.greatest(-1.0, cosine)))
+
+
+@lru_cache(maxsize=1)
+def _zip_table():
+    """The centroid table, memory-mapped so every worker shares the OS page cache."""
+    try:
+        return np.load(ZIP_CENTROIDS_PATH, mmap_mode="r")
+    except (OSError, ValueError) as e:
+        logger.log_warning(f"ZIP centroid table unavailable, geocoding is off: {e!s}")
+        return np.zeros(0, dtype=ZIP_CENTROID_DTYPE)
+
+
+def _zip_numbers(zip_codes):
+    """5 digit ZIP (or ZIP+4, or a ZIP whose leading zeros were lost) -> int, -1 otherwise."""
+    digits = (
+        pd.Series(zip_codes, dtype="string")
+        .str.strip()
+        .str.extract(r"^(\d{3,5})(?:\.0+)?(?:-\d{4})?$")[0]
+        .str.zfill(5)
+    )
+    return pd.to_numeric(digits, errors="coerce").fillna(-1).to_numpy(dtype=np.int64)
+
+
+def zip_centroids(zip_codes):
+    """
+    Vectorized ZIP -> centroid lookup (binary search over the sorted table).
+    Returns (lat, long) float arrays, NaN where the ZIP is unknown.
+    """
+    numbers = _zip_numbers(zip_codes)
+    lat = np.full(len(numbers), np.nan)
+    long = np.full(len(numbers), np.nan)
+    table = _zip_table()
+    if len(table) == 0 or len(numbers) == 0:
+        return lat, long
+    positions = np.searchsorted(table["zip"], numbers).clip(0, len(table) - 1)
+    found = table["zip"][positions] == numbers
+    lat[found] = table["lat"][positions[found]]
+    long[found] = table["long"][positions[found]]
+    return lat, long
+
+
+def zip_centroid(zip_code):
+    """(lat, long) of one ZIP code, None when it is unknown."""
+    lat, long = zip_centroids([zip_code])
+    if np.isnan(lat[0]):
+        return None
+    return round(float(lat[0]), 6), round(float(long[0]), 6)
+
+
+def fill_coordinates(details: dict):
+    """Set lat/long of a details section from its zip_code when they are missing."""
+    if to_coordinate(details.get("lat")) is not None and to_coordinate(
+        details.get("long")
+    ) is not None:
+        return details
+    centroid = zip_centroid(details.get("zip_code"))
+    if centroid:
+        details["lat"], details["long"] = centroid
+    return details
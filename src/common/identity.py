@@ -0,0 +1,157 @@
+import os
+import re
+
+import pandas as pd
+from sqlalchemy import Integer, Text, and_, func, literal, or_
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+
+from src.models import models
+
+# Providers are compared by blocking keys instead of against every row:
+# the digits of the tax id (exact, B-tree on users.sp_tax_id), or the
+# normalized organization name (trigram on users.sp_name_key) within the
+# same 3 digit ZIP prefix.
+NAME_SIMILARITY = float(os.getenv("PROVIDER_NAME_SIMILARITY", "0.6"))
+BLOCK_ZIP_DIGITS = 3
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_NON_DIGIT = re.compile(r"\D")
+
+
+def normalize_tax_id(value):
+    """Digits of a tax id ("12-3456789" -> "123456789"), None when there are none."""
+    if value is None:
+        return None
+    return _NON_DIGIT.sub("", str(value)) or None
+
+
+def normalize_name(value):
+    """Python twin of models.details_name_key ("The Hope Center, Inc." -> "hope center")."""
+    if value is None:
+        return None
+    words = [
+        word
+        for word in _NON_ALNUM.split(str(value).lower())
+        if word and word not in models.NAME_NOISE_WORDS
+    ]
+    return " ".join(words) or None
+
+
+def block_of(zip_code):
+    digits = normalize_tax_id(zip_code)
+    if not digits or len(digits) < BLOCK_ZIP_DIGITS:
+        return None
+    return digits.zfill(5)[:BLOCK_ZIP_DIGITS]
+
+
+def identity_keys(df: pd.DataFrame):
+    """tax_key, name_key and block columns of an import frame (None when absent)."""
+
+    def keys(column, normalize):
+        if column not in df.columns:
+            return pd.Series(None, index=df.index, dtype=object)
+        return df[column].map(normalize, na_action="ignore").astype(object)
+
+    return pd.DataFrame(
+        {
+            "tax_key": keys("tax_id", normalize_tax_id),
+            "name_key": keys("name", normalize_name),
+            "block": keys("zip_code", block_of),
+        },
+        index=df.index,
+    )
+
+
+def file_duplicates(keys: pd.DataFrame):
+    """Rows repeating the tax id, or the name within the ZIP block, of an earlier row."""
+    by_tax_id = keys["tax_key"].notna() & keys["tax_key"].duplicated(keep="first")
+    named = keys["name_key"].notna() & keys["block"].notna()
+    names = keys[["name_key", "block"]].where(named, axis=0)
+    by_name = named & names.duplicated(keep="first")
+    return by_tax_id | by_name
+
+
+def tax_id_owners(db: Session, tax_keys):
+    """{tax_key: useremail} of the providers registered with the given normalized tax ids."""
+    tax_keys = list(dict.fromkeys(key for key in tax_keys if key))
+    if not tax_keys:
+        return {}
+    rows = (
+        db.query(models.User.sp_tax_id, models.User.useremail)
+        .filter(
+            models.User.role_type == "service_provider",
+            models.User.sp_tax_id.in_(tax_keys),
+        )
+        .order_by(models.User.sp_tax_id, models.User.created_at)
+        .distinct(models.User.sp_tax_id)
+        .all()
+    )
+    return dict(rows)
+
+
+def similar_providers(db: Session, keys: pd.DataFrame, threshold: float = NAME_SIMILARITY):
+    """
+    {index: useremail} of the most similar registered provider for each row,
+    matched on name similarity within the same ZIP block. One statement for
+    the whole frame: the rows are unnested and joined through the trigram index.
+    """
+    keys = keys[keys["name_key"].notna() & keys["block"].notna()]
+    if keys.empty:
+        return {}
+    positions = list(range(len(keys)))
+    candidates = (
+        func.unnest(
+            literal(positions, ARRAY(Integer)),
+            literal(keys["name_key"].tolist(), ARRAY(Text)),
+            literal(keys["block"].tolist(), ARRAY(Text)),
+        )
+        .table_valued("position", "name_key", "block")
+        .render_derived()
+    )
+    user = models.User
+    score = func.similarity(user.sp_name_key, candidates.c.name_key)
+    rows = (
+        db.query(candidates.c.position, user.useremail)
+        .select_from(candidates)
+        .join(
+            user,
+            and_(
+                user.role_type == "service_provider",
+                user.sp_name_key.op("%")(candidates.c.name_key),
+                func.left(user.sp_zip_code, BLOCK_ZIP_DIGITS) == candidates.c.block,
+            ),
+        )
+        .filter(score >= threshold)
+        .order_by(candidates.c.position, score.desc())
+        .distinct(candidates.c.position)
+        .all()
+    )
+    return {keys.index[position]: email for position, email in rows}
+
+
+def find_claimable_provider(db: Session, tax_id: str, organization_name: str):
+    """
+    The provider profile registered with this tax id whose name contains, or
+    is similar to, the given organization name. The tax id is an index seek,
+    the name only ranks the few profiles sharing it.
+    """
+    tax_key = normalize_tax_id(tax_id)
+    if not tax_key:
+        return None
+    user = models.User
+    name_key = normalize_name(organization_name) or ""
+    score = func.similarity(user.sp_name_key, name_key)
+    return (
+        db.query(user)
+        .filter(
+            user.role_type == "service_provider",
+            user.sp_tax_id == tax_key,
+            or_(
+                user.sp_name_key.contains(name_key, autoescape=True),
+                score >= NAME_SIMILARITY,
+            ),
+        )
+        .order_by(score.desc(), user.created_at)
+        .first()
+    )
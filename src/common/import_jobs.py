@@ -0,0 +1,277 @@
+import os
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException, UploadFile, status
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from src.authentication.encryption import encrypt_password, secret_key
+from src.common import imports
+from src.common.celery_worker import celery_app
+from src.common.email_service import enqueue_batch
+from src.common.user import generate_random_password
+from src.configs import database
+from src.configs.config import logger
+from src.models import models
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+# A running import is only resumable once its checkpoint has not moved for
+# this long, i.e. its worker is gone; each chunk commit bumps updated_at.
+STALE_AFTER = timedelta(
+    seconds=int(os.getenv("IMPORT_STALE_AFTER_SECONDS", "900"))
+)
+
+CLIENT_IMPORT_REQUIRED = [
+    "first_name",
+    "last_name",
+    "dob",
+    "ssn",
+    "gender",
+    "email",
+    "address_1",
+    "city",
+    "state",
+    "zip_code",
+    "county",
+]
+CLIENT_IMPORT_FIELDS = CLIENT_IMPORT_REQUIRED + [
+    "profile_img",
+    "header_img",
+    "phone",
+    "address_2",
+    "website_link",
+    "lat",
+    "long",
+]
+CLIENT_WELCOME_SUBJECT = "Welcome, You are added as a Client!"
+CLIENT_WELCOME_BODY = """
+            <div>
+                <div style="margin: 50px auto; width: 60%; font-family: Inter;">
+                    <div style="padding: 12px; background-color: #efe9d9; display: flex; border-radius: 6px; margin-bottom: 30px;">
+                        <a href="#" style="width:100%; text-align:center;">
+                            <img src="http://45.248.33.189:8100/images/HFElogo.png" alt="Logo" />
+                        </a>
+                    </div>
+                    <h2>Welcome, %recipient.first_name% %recipient.last_name%!</h2>
+                    <p>You have been added as a client on our platform.</p>
+                    <p>Your login credentials are:</p>
+                            <ul>
+                                <li><strong>Email:</strong> %recipient.email%</li>
+                                <li><strong>Password:</strong> %recipient.password%</li>
+                            </ul>
+                        For any inquiries or support, feel free to reach out to us at: <a href="mailto:[Support Email]">[Support Email]</a>
+                    </p>
+
+                    <p style="font-size: 16px; font-family: Inter; font-weight: 400; color: #0a0d14; line-height: 20px;">
+                        Visit our website: <a href="[Website Link]">[Website Link]</a>
+                    </p>
+                </div>
+            </div>
+            """
+
+
+def _failed_report_path(job: models.ImportJob):
+    return os.path.join(imports.IMPORT_DIR, f"{job.id}_failed.csv")
+
+
+def serialize_job(job: models.ImportJob):
+    return {
+        "id": str(job.id),
+        "import_type": job.import_type,
+        "filename": job.filename,
+        "status": job.status,
+        "rows_processed": job.rows_processed,
+        "success_count": job.success_count,
+        "fail_count": job.fail_count,
+        "error": job.error,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at,
+        "finished_at": job.finished_at,
+    }
+
+
+def _get_job(job_id, db: Session):
+    job = db.query(models.ImportJob).filter(models.ImportJob.id == job_id).first()
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Import job not found"
+        )
+    return job
+
+
+def get_import_job(job_id, db: Session):
+    return serialize_job(_get_job(job_id, db))
+
+
+async def start_client_import(admin_uuid, file: UploadFile, db: Session):
+    """
+    Save the upload to disk in blocks, check its header and queue the import.
+    Progress is read from the job, see get_import_job.
+    """
+    file_extension = file.filename.split(".")[-1].lower()
+    if file_extension not in ["csv", "xlsx"]:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid file format. Only CSV and XLSX files are supported.",
+        )
+    job_id = uuid.uuid4()
+    os.makedirs(imports.IMPORT_DIR, exist_ok=True)
+    file_path = os.path.join(imports.IMPORT_DIR, f"{job_id}.{file_extension}")
+    await imports.save_upload(file, file_path)
+    try:
+        imports.require_columns(imports.read_header(file_path), CLIENT_IMPORT_REQUIRED)
+    except HTTPException:
+        os.remove(file_path)
+        raise
+
+    job = models.ImportJob(
+        id=job_id,
+        import_type="clients",
+        filename=file.filename,
+        file_path=file_path,
+        status=QUEUED,
+        uploaded_by=admin_uuid,
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    run_client_import.delay(str(job.id))
+    logger.log_info(f"Client import {job.id} queued for {file.filename}")
+    return serialize_job(job)
+
+
+def resume_import(job_id, db: Session):
+    """
+    Re-queue a failed import, or a running one whose worker went stale; it
+    restarts at its checkpoint. The status change is a single conditional
+    UPDATE, so concurrent resumes queue the job at most once.
+    """
+    job = _get_job(job_id, db)
+    resumed = (
+        db.query(models.ImportJob)
+        .filter(
+            models.ImportJob.id == job.id,
+            or_(
+                models.ImportJob.status == FAILED,
+                and_(
+                    models.ImportJob.status == RUNNING,
+                    models.ImportJob.updated_at < datetime.now() - STALE_AFTER,
+                ),
+            ),
+        )
+        .update({"status": QUEUED, "error": None}, synchronize_session=False)
+    )
+    db.commit()
+    if not resumed:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=(
+                "Only failed imports, or running imports without progress for "
+                f"{int(STALE_AFTER.total_seconds())}s, can be resumed"
+            ),
+        )
+    db.refresh(job)
+    run_client_import.delay(str(job.id))
+    logger.log_info(f"Client import {job.id} resumed at row {job.rows_processed}")
+    return serialize_job(job)
+
+
+def _import_client_chunk(job: models.ImportJob, df, db: Session):
+    """
+    Insert the valid rows of one chunk and advance the checkpoint in the same
+    transaction, so a chunk is either fully imported or retried on resume.
+    """
+    df = imports.clean(df.reindex(columns=CLIENT_IMPORT_FIELDS))
+    reasons = imports.validate(df, CLIENT_IMPORT_REQUIRED)
+    registered = imports.existing_emails(db, df.loc[reasons.isna(), "email"])
+    reasons = imports.reject(reasons, df["email"].isin(registered), "Email already exists")
+    df = imports.fill_coordinates(df)
+
+    rows, recipients = [], {}
+    for client_details in imports.records(df[reasons.isna()], CLIENT_IMPORT_FIELDS):
+        generated_password = generate_random_password()
+        rows.append(
+            {
+                "uuid": uuid.uuid4(),
+                "useremail": client_details["email"],
+                "password": encrypt_password(generated_password, secret_key),
+                "role_type": "client",
+                "created_by": job.uploaded_by,
+                "is_activated": True,
+                "status": "verified",
+                "details": {"client": client_details},
+            }
+        )
+        recipients[client_details["email"]] = {
+            "first_name": client_details["first_name"],
+            "last_name": client_details["last_name"],
+            "email": client_details["email"],
+            "password": generated_password,
+        }
+    imports.insert_users(db, rows)
+    job.rows_processed += len(df)
+    job.success_count += len(rows)
+    job.fail_count += int(reasons.notna().sum())
+    db.commit()
+
+    imports.append_report(
+        _failed_report_path(job),
+        df[reasons.notna()].assign(**{imports.REASON_COLUMN: reasons}),
+    )
+    if recipients:
+        enqueue_batch(recipients, CLIENT_WELCOME_SUBJECT, CLIENT_WELCOME_BODY)
+
+
+@celery_app.task
+def run_client_import(job_id: str):
+    db = database.SessionLocal()
+    try:
+        # Claim atomically: of two tasks for the same queued job, one runs.
+        claimed = (
+            db.query(models.ImportJob)
+            .filter(models.ImportJob.id == job_id, models.ImportJob.status == QUEUED)
+            .update({"status": RUNNING}, synchronize_session=False)
+        )
+        db.commit()
+        if not claimed:
+            return
+        job = db.query(models.ImportJob).filter(models.ImportJob.id == job_id).first()
+
+        for df in imports.iter_chunks(job.file_path, skip_rows=job.rows_processed):
+            _import_client_chunk(job, df, db)
+            logger.log_info(
+                f"Client import {job_id}: {job.rows_processed} rows, "
+                f"{job.success_count} imported, {job.fail_count} failed"
+            )
+
+        file_path_json = {}
+        if os.path.exists(_failed_report_path(job)):
+            file_path_json["fail"] = _failed_report_path(job)
+        job.status = COMPLETED
+        job.finished_at = datetime.now()
+        db.commit()
+        imports.save_import_record(
+            db,
+            job.filename,
+            "Client",
+            job.uploaded_by,
+            job.rows_processed,
+            job.success_count,
+            job.fail_count,
+            file_path_json,
+        )
+        os.remove(job.file_path)
+        logger.log_info(f"Client import {job_id} completed")
+    except Exception as e:
+        logger.log_error(f"Client import {job_id} failed: {e!s}")
+        db.rollback()
+        db.query(models.ImportJob).filter(models.ImportJob.id == job_id).update(
+            {"status": FAILED, "error": str(e)}
+        )
+        db.commit()
+    finally:
+        db.close()
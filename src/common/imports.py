@@ -0,0 +1,281 @@
+import io
+import itertools
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException
+from sqlalchemy import func, insert, literal_column, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from src.common import geo
+from src.models import models
+
+# Imports are staged: read -> vectorized validation -> one lookup of the
+# emails already registered -> chunked executemany inserts -> reports.
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))
+EMAIL_PATTERN = r"^[^@\s]+@[^@\s]+\.[^@\s]+$"
+REASON_COLUMN = "reason"
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+IMPORT_DIR = os.path.join(BASE_DIR, "import_provider")
+
+
+def read_upload(contents: bytes, filename: str):
+    """
+    Read an uploaded CSV/Excel file. Every cell is read as text so phone
+    numbers, zip codes and tax ids keep their leading zeros.
+    """
+    file_extension = filename.split(".")[-1].lower()
+    if file_extension == "csv":
+        return pd.read_csv(io.BytesIO(contents), dtype=str)
+    if file_extension in ["xls", "xlsx"]:
+        try:
+            import openpyxl  # noqa: F401 (pandas reads xlsx through it)
+        except ImportError:
+            raise HTTPException(
+                status_code=500,
+                detail="Missing required dependency: openpyxl. Install it using 'pip install openpyxl'.",
+            )
+        return pd.read_excel(io.BytesIO(contents), dtype=str)
+    raise HTTPException(
+        status_code=400,
+        detail="Invalid file format. Only CSV and Excel files are supported.",
+    )
+
+
+async def save_upload(file, path: str, block_size: int = 1024 * 1024):
+    """Copy an upload to disk block by block, never holding it in memory."""
+    with open(path, "wb") as output:
+        while block := await file.read(block_size):
+            output.write(block)
+
+
+def _xlsx_rows(path: str):
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        for row in workbook.active.iter_rows(values_only=True):
+            yield [None if value is None else str(value) for value in row]
+    finally:
+        workbook.close()
+
+
+def read_header(path: str):
+    if path.lower().endswith(".csv"):
+        return list(pd.read_csv(path, dtype=str, nrows=0).columns)
+    return next(_xlsx_rows(path), [])
+
+
+def iter_chunks(path: str, chunk_size: int = IMPORT_CHUNK_SIZE, skip_rows: int = 0):
+    """
+    Stream a saved CSV/XLSX file as DataFrames of chunk_size text rows,
+    starting after skip_rows data rows (the resume checkpoint). CSV goes
+    through pandas' chunked reader, XLSX through openpyxl's read_only mode.
+    """
+    if path.lower().endswith(".csv"):
+        yield from pd.read_csv(
+            path,
+            dtype=str,
+            chunksize=chunk_size,
+            skiprows=range(1, skip_rows + 1),
+        )
+        return
+    rows = _xlsx_rows(path)
+    header = next(rows, [])
+    rows = itertools.islice(rows, skip_rows, None)
+    while batch := list(itertools.islice(rows, chunk_size)):
+        yield pd.DataFrame(batch, columns=header, dtype=object)
+
+
+def append_report(path: str, df: pd.DataFrame):
+    """Append rows to a report CSV, writing the header only once."""
+    if len(df) > 0:
+        df.to_csv(path, mode="a", header=not os.path.exists(path), index=False)
+
+
+def require_columns(columns, required):
+    missing_columns = [col for col in required if col not in columns]
+    if missing_columns:
+        raise HTTPException(
+            status_code=400, detail=f"Missing columns: {', '.join(missing_columns)}"
+        )
+
+
+def clean(df: pd.DataFrame):
+    """Trim every text cell, blank cells become missing."""
+    df = df.apply(
+        lambda column: column.str.strip()
+        if pd.api.types.is_string_dtype(column)
+        else column
+    )
+    return df.mask(df == "")
+
+
+def validate(df: pd.DataFrame, required, email_column: str = "email"):
+    """
+    Why each row is rejected (None for valid rows): a missing required value,
+    a malformed email or an email already used earlier in the file.
+    """
+    reasons = pd.Series(None, index=df.index, dtype=object)
+    for column in required:
+        reasons = reasons.mask(reasons.isna() & df[column].isna(), f"Missing {column}")
+    emails = df[email_column]
+    reasons = reasons.mask(
+        reasons.isna() & ~emails.str.match(EMAIL_PATTERN, na=False), "Invalid email"
+    )
+    reasons = reasons.mask(
+        reasons.isna() & emails.str.lower().duplicated(keep="first"),
+        "Duplicate email in file",
+    )
+    return reasons
+
+
+def existing_emails(db: Session, emails, role_type=None, exclude_role=None):
+    """The given emails that are already registered, in one query."""
+    emails = list(dict.fromkeys(email for email in emails if email))
+    if not emails:
+        return set()
+    query = db.query(models.User.useremail).filter(models.User.useremail.in_(emails))
+    if role_type:
+        query = query.filter(models.User.role_type == role_type)
+    if exclude_role:
+        query = query.filter(models.User.role_type != exclude_role)
+    return {row[0] for row in query.all()}
+
+
+def reject(reasons: pd.Series, mask: pd.Series, reason: str):
+    return reasons.mask(reasons.isna() & mask, reason)
+
+
+def fill_coordinates(df: pd.DataFrame):
+    """
+    lat/long as numbers, the missing ones filled from the zip_code centroid
+    (offline table, one vectorized lookup for the whole frame).
+    """
+    def column(name):
+        if name in df.columns:
+            return pd.to_numeric(df[name], errors="coerce")
+        return pd.Series(np.nan, index=df.index)
+
+    lat, long = column("lat"), column("long")
+    missing = lat.isna() | long.isna()
+    if missing.any() and "zip_code" in df.columns:
+        zip_lat, zip_long = geo.zip_centroids(df["zip_code"])
+        lat = lat.mask(missing, pd.Series(zip_lat, index=df.index).round(6))
+        long = long.mask(missing, pd.Series(zip_long, index=df.index).round(6))
+    return df.assign(lat=lat, long=long)
+
+
+def records(df: pd.DataFrame, columns):
+    """Rows as dicts of plain Python values, absent columns and NaN as None."""
+    frame = df.reindex(columns=columns).astype(object)
+    return frame.where(frame.notna(), None).to_dict("records")
+
+
+def chunked(items, size: int = IMPORT_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def insert_users(db: Session, rows):
+    """Multi-row INSERT of User rows (executemany), column defaults apply."""
+    if rows:
+        db.execute(insert(models.User), rows)
+
+
+def upsert_service_providers(db: Session, rows, updated_by):
+    """
+    Insert or refresh provider rows in one INSERT ... ON CONFLICT statement.
+    An existing provider (same email) gets the non-null incoming keys merged
+    into details.service_provider (jsonb ||), its other columns are kept;
+    a key set to None in the row leaves the stored value as it is.
+    Claimed profiles belong to their owner and are left untouched.
+    Returns {useremail: "created" | "updated"}, claimed rows are absent.
+    """
+    if not rows:
+        return {}
+    user = models.User
+    stmt = pg_insert(user).values(rows)
+    merged = func.coalesce(
+        user.details["service_provider"], literal_column("'{}'::jsonb")
+    ).op("||")(func.jsonb_strip_nulls(stmt.excluded.details["service_provider"]))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[user.useremail],
+        index_where=text("role_type = 'service_provider'"),
+        set_={
+            "details": func.jsonb_set(
+                func.coalesce(user.details, literal_column("'{}'::jsonb")),
+                literal_column("'{service_provider}'::text[]"),
+                merged,
+            ),
+            "updated_by": updated_by,
+            "updated_at": func.now(),
+        },
+        where=user.is_claimed.isnot(True),
+    ).returning(user.useremail, literal_column("xmax = 0").label("inserted"))
+    return {
+        email: "created" if inserted else "updated"
+        for email, inserted in db.execute(stmt).all()
+    }
+
+
+def record_import(
+    db: Session,
+    filename: str,
+    role_type: str,
+    uploaded_by,
+    total_count: int,
+    succeeded: pd.DataFrame,
+    failed: pd.DataFrame,
+    save_path: str = IMPORT_DIR,
+):
+    """Write the success/failure CSVs and save the ExportData record."""
+    base_name = os.path.splitext(filename)[0]
+    file_path_json = {}
+    if len(failed) > 0:
+        file_path_json["fail"] = os.path.join(save_path, f"{base_name}_failed.csv")
+        failed.to_csv(file_path_json["fail"], index=False)
+    if len(succeeded) > 0:
+        file_path_json["success"] = os.path.join(save_path, f"{base_name}_success.csv")
+        succeeded.to_csv(file_path_json["success"], index=False)
+
+    return save_import_record(
+        db,
+        filename,
+        role_type,
+        uploaded_by,
+        total_count,
+        len(succeeded),
+        len(failed),
+        file_path_json,
+    )
+
+
+def save_import_record(
+    db: Session,
+    filename: str,
+    role_type: str,
+    uploaded_by,
+    total_count: int,
+    success_count: int,
+    fail_count: int,
+    file_path_json,
+):
+    import_data = models.ExportData(
+        filename=filename,
+        total_counts=total_count,
+        success_counts=success_count,
+        fail_counts=fail_count,
+        upload_date=datetime.now(),
+        file_path=file_path_json,
+        uploaded_by=uploaded_by,
+        role_type=role_type,
+    )
+    db.add(import_data)
+    db.commit()
+    db.refresh(import_data)
+    return import_data
@@ -0,0 +1,311 @@
+import hashlib
+import json
+import os
+import re
+
+import numpy as np
+from fastapi import HTTPException, status
+from sqlalchemy import literal_column
+from sqlalchemy.orm import Session
+
+from src.common import geo, reference_cache
+from src.common.tasks import redis_app
+from src.configs.config import logger
+from src.models import models
+
+# Relative weight of each feature in the final score, the feature scores are
+# all scaled to 0..1 before weighting.
+NEED_WEIGHT = 0.5
+DISTANCE_WEIGHT = 0.2
+RATING_WEIGHT = 0.15
+CAPACITY_WEIGHT = 0.15
+
+PRIMARY_NEED_SCORE = 1.0
+SECONDARY_NEED_SCORE = 0.5
+# Distance score halves roughly every DISTANCE_SCALE * ln(2) miles.
+DISTANCE_SCALE = 25.0
+MAX_RATING = 5.0
+# Providers on a plan without a client limit count as half full.
+UNKNOWN_CAPACITY_SCORE = 0.5
+
+DEFAULT_TOP_N = 20
+MATCH_CACHE_TTL = int(os.getenv("MATCH_CACHE_TTL", "600"))
+MATCH_CACHE_PREFIX = "matching:client"
+PROVIDER_VERSION_KEY = "matching:providers:version"
+
+
+def _need_ids(value):
+    """Needs are stored as an int, a numeric string, a list or a comma separated string."""
+    if value is None or value == "":
+        return []
+    if isinstance(value, (list, tuple)):
+        values = value
+    else:
+        values = re.split(r"\s*,\s*", str(value).strip("[] "))
+    ids = []
+    for item in values:
+        try:
+            ids.append(int(item))
+        except (TypeError, ValueError):
+            continue
+    return ids
+
+
+def _to_float(value, default=np.nan):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _client_profile(client_uuid, db: Session):
+    client = (
+        db.query(
+            models.User.details["client"]["primary_need"].astext,
+            models.User.details["client"]["secondary_need"],
+            models.User.client_lat,
+            models.User.client_long,
+        )
+        .filter(
+            models.User.uuid == client_uuid,
+            models.User.role_type == "client",
+            models.User.is_deleted == False,
+        )
+        .first()
+    )
+    if client is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Client not found"
+        )
+    primary_need, secondary_need, lat, long = client
+    primary = _need_ids(primary_need)[:1]
+    secondary = [need for need in _need_ids(secondary_need) if need not in primary]
+    return {"primary": primary, "secondary": secondary, "lat": lat, "long": long}
+
+
+def _approved_need_filter(need_ids):
+    """One jsonpath test per candidate instead of an @> query per need."""
+    ids = " || ".join(f"@.id == {int(need)}" for need in need_ids)
+    path = f'$.category[*] ? (@.status == "approved" && ({ids}))'
+    return models.User.category_id.op("@?")(literal_column(f"'{path}'::jsonpath"))
+
+
+def _load_candidates(need_ids, db: Session):
+    rows = (
+        db.query(
+            models.User.uuid,
+            models.User.sp_name,
+            models.User.category_id,
+            models.User.sp_lat,
+            models.User.sp_long,
+            models.User.details["service_provider"]["rating"].astext,
+            models.User.details["service_provider"]["client_count"].astext,
+        )
+        .filter(
+            models.User.role_type == "service_provider",
+            models.User.is_deleted == False,
+            models.User.is_activated == True,
+            _approved_need_filter(need_ids),
+        )
+        .all()
+    )
+    if not rows:
+        return rows, {}
+    memberships = (
+        db.query(models.Membership.uuid, models.Membership.subscription_id)
+        .filter(
+            models.Membership.uuid.in_([row[0] for row in rows]),
+            models.Membership.status.in_(["active", "trial"]),
+        )
+        .all()
+    )
+    return rows, dict(memberships)
+
+
+def _need_scores(rows, primary, secondary):
+    """
+    Sum of the need scores of every approved category a provider offers,
+    computed over a flattened (provider, category) pair list.
+    """
+    owners, category_ids = [], []
+    for index, row in enumerate(rows):
+        for entry in (row[2] or {}).get("category", []):
+            if isinstance(entry, dict) and entry.get("status") == "approved":
+                try:
+                    category_ids.append(int(entry.get("id")))
+                except (TypeError, ValueError):
+                    continue
+                owners.append(index)
+
+    scores = np.zeros(len(rows))
+    if not owners:
+        return scores
+    owners = np.asarray(owners)
+    category_ids = np.asarray(category_ids)
+    pair_scores = np.where(
+        np.isin(category_ids, primary),
+        PRIMARY_NEED_SCORE,
+        np.where(np.isin(category_ids, secondary), SECONDARY_NEED_SCORE, 0.0),
+    )
+    np.add.at(scores, owners, pair_scores)
+    best_possible = PRIMARY_NEED_SCORE * len(primary) + SECONDARY_NEED_SCORE * len(
+        secondary
+    )
+    return np.minimum(scores / best_possible, 1.0)
+
+
+def _distances(lat, long, provider_lat, provider_long):
+    lat_r, long_r = np.radians(lat), np.radians(long)
+    provider_lat_r, provider_long_r = np.radians(provider_lat), np.radians(
+        provider_long
+    )
+    cosine = np.cos(lat_r) * np.cos(provider_lat_r) * np.cos(
+        provider_long_r - long_r
+    ) + np.sin(lat_r) * np.sin(provider_lat_r)
+    return geo.EARTH_RADIUS_MILES * np.arccos(np.clip(cosine, -1.0, 1.0))
+
+
+def score_providers(profile, rows, memberships, db: Session):
+    """Score every candidate in one vectorized pass, returns (scores, features)."""
+    plans = reference_cache.get_subscription_plans(db)
+    provider_lat = np.array([_to_float(row[3]) for row in rows])
+    provider_long = np.array([_to_float(row[4]) for row in rows])
+    rating = np.array([_to_float(row[5], 0.0) for row in rows])
+    client_count = np.array([_to_float(row[6], 0.0) for row in rows])
+    capacity = np.array(
+        [
+            _to_float((plans.get(memberships.get(row[0])) or {}).get("clients_count"))
+            for row in rows
+        ]
+    )
+
+    need = _need_scores(rows, profile["primary"], profile["secondary"])
+
+    if profile["lat"] is not None and profile["long"] is not None:
+        distance = _distances(
+            profile["lat"], profile["long"], provider_lat, provider_long
+        )
+    else:
+        distance = np.full(len(rows), np.nan)
+    distance_score = np.nan_to_num(np.exp(-distance / DISTANCE_SCALE), nan=0.0)
+
+    rating_score = np.clip(rating / MAX_RATING, 0.0, 1.0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        remaining = 1.0 - client_count / capacity
+    capacity_score = np.where(
+        np.isnan(capacity) | (capacity <= 0),
+        UNKNOWN_CAPACITY_SCORE,
+        np.clip(remaining, 0.0, 1.0),
+    )
+
+    scores = (
+        NEED_WEIGHT * need
+        + DISTANCE_WEIGHT * distance_score
+        + RATING_WEIGHT * rating_score
+        + CAPACITY_WEIGHT * capacity_score
+    )
+    features = {
+        "need": need,
+        "distance": distance,
+        "rating": rating,
+        "capacity": capacity_score,
+    }
+    return scores, features
+
+
+def _top_n(scores, limit):
+    if len(scores) > limit:
+        candidates = np.argpartition(-scores, limit - 1)[:limit]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def _rank(profile, limit, db: Session):
+    need_ids = profile["primary"] + profile["secondary"]
+    if not need_ids:
+        return []
+    rows, memberships = _load_candidates(need_ids, db)
+    if not rows:
+        return []
+    scores, features = score_providers(profile, rows, memberships, db)
+    results = []
+    for index in _top_n(scores, limit):
+        distance = features["distance"][index]
+        results.append(
+            {
+                "uuid": str(rows[index][0]),
+                "name": rows[index][1],
+                "score": round(float(scores[index]), 4),
+                "need_score": round(float(features["need"][index]), 4),
+                "distance": None if np.isnan(distance) else round(float(distance), 2),
+                "rating": float(features["rating"][index]),
+                "capacity_score": round(float(features["capacity"][index]), 4),
+            }
+        )
+    return results
+
+
+def _provider_version():
+    try:
+        return redis_app.get(PROVIDER_VERSION_KEY)
+    except Exception as e:
+        logger.log_warning(f"Matching version read failed: {e!s}")
+        return None
+
+
+def _fingerprint(profile, limit, provider_version):
+    raw = json.dumps(
+        [profile, limit, str(provider_version)], sort_keys=True, default=str
+    )
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def get_matched_providers(client_uuid, db: Session, limit: int = DEFAULT_TOP_N):
+    """
+    Best providers for a client's primary and secondary needs, scored on need
+    match, distance, rating and remaining capacity.
+
+    Results are cached per client in redis. The entry is only served while the
+    client's needs/location and the provider version it was built against are
+    unchanged, so both sides invalidate it without touching the key.
+    """
+    profile = _client_profile(client_uuid, db)
+    cache_key = f"{MATCH_CACHE_PREFIX}:{client_uuid}"
+    fingerprint = _fingerprint(profile, limit, _provider_version())
+    try:
+        cached = redis_app.get(cache_key)
+        if cached:
+            cached = json.loads(cached)
+            if cached.get("fingerprint") == fingerprint:
+                return {"client_uuid": str(client_uuid), "providers": cached["providers"]}
+    except Exception as e:
+        logger.log_warning(f"Matching cache read failed: {e!s}")
+
+    providers = _rank(profile, limit, db)
+    try:
+        redis_app.setex(
+            cache_key,
+            MATCH_CACHE_TTL,
+            json.dumps({"fingerprint": fingerprint, "providers": providers}),
+        )
+    except Exception as e:
+        logger.log_warning(f"Matching cache write failed: {e!s}")
+    return {"client_uuid": str(client_uuid), "providers": providers}
+
+
+def invalidate_client(client_uuid):
+    """Drop a client's cached matches, call after their needs change."""
+    try:
+        redis_app.delete(f"{MATCH_CACHE_PREFIX}:{client_uuid}")
+    except Exception as e:
+        logger.log_warning(f"Matching cache delete failed: {e!s}")
+
+
+def invalidate_providers():
+    """Bump the provider version so every cached match list is rebuilt."""
+    try:
+        redis_app.incr(PROVIDER_VERSION_KEY)
+    except Exception as e:
+        logger.log_warning(f"Matching version bump failed: {e!s}")
@@ -0,0 +1,171 @@
+import asyncio
+import json
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from src.common.email_service import send_email
+from src.configs import database
+from src.configs.config import logger
+from src.models import models
+
+# Handlers add events to the session next to their state change and commit
+# both at once. dispatcher() runs in the API process, WebSocket connections
+# live there, and drains the table in batches.
+EMAIL = "email"
+WEBSOCKET = "websocket"
+
+PENDING = "pending"
+FAILED = "failed"
+
+BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "2"))
+MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+# Claimed events are pushed this far into the future while they are being
+# delivered; if the dispatcher dies mid-batch they become due again after it.
+LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", "300"))
+# Retry n waits RETRY_BASE_SECONDS * 2**(n-1), capped at RETRY_MAX_SECONDS.
+RETRY_BASE_SECONDS = 5
+RETRY_MAX_SECONDS = 3600
+
+_wakeup = None
+_loop = None
+
+
+def add_email(db: Session, recipient: str, subject: str, body: str):
+    db.add(
+        models.OutboxEvent(
+            kind=EMAIL,
+            payload={"recipient": recipient, "subject": subject, "body": body},
+        )
+    )
+
+
+def add_push(db: Session, user_id, message):
+    """message is sent as is when it is a string, as JSON otherwise."""
+    db.add(
+        models.OutboxEvent(
+            kind=WEBSOCKET, payload={"user_id": str(user_id), "message": message}
+        )
+    )
+
+
+def notify():
+    """Wake the dispatcher after a commit instead of waiting for its next poll."""
+    if _loop is not None and not _loop.is_closed():
+        _loop.call_soon_threadsafe(_wakeup.set)
+
+
+async def _deliver(kind: str, payload):
+    if kind == EMAIL:
+        if not await send_email(
+            payload["recipient"], payload["subject"], payload["body"]
+        ):
+            raise RuntimeError("Mailgun did not accept the email")
+    elif kind == WEBSOCKET:
+        # Imported here, the chat router imports the modules that import this one.
+        from src.routers.chat import manager
+
+        message = payload["message"]
+        if not isinstance(message, str):
+            message = json.dumps(message, default=str)
+        await manager.send_to_user(payload["user_id"], message)
+    else:
+        raise ValueError(f"Unknown outbox event kind {kind}")
+
+
+def _claim(db: Session, batch_size: int):
+    """
+    Lease a batch of due events and commit, so no lock is held while they are
+    delivered. SKIP LOCKED lets several workers claim in parallel. Returns
+    (id, kind, payload) tuples.
+    """
+    events = (
+        db.query(models.OutboxEvent)
+        .filter(
+            models.OutboxEvent.status == PENDING,
+            models.OutboxEvent.available_at <= datetime.now(),
+        )
+        .order_by(models.OutboxEvent.available_at, models.OutboxEvent.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    lease = datetime.now() + timedelta(seconds=LEASE_SECONDS)
+    claimed = []
+    for event in events:
+        claimed.append((event.id, event.kind, event.payload))
+        event.available_at = lease
+    db.commit()
+    return claimed
+
+
+def _settle(db: Session, claimed, results):
+    """Delete delivered events (payloads can hold credentials), reschedule the rest."""
+    events = {
+        event.id: event
+        for event in db.query(models.OutboxEvent).filter(
+            models.OutboxEvent.id.in_([event_id for event_id, _, _ in claimed])
+        )
+    }
+    for (event_id, _, _), result in zip(claimed, results):
+        event = events.get(event_id)
+        if event is None:
+            continue
+        if not isinstance(result, Exception):
+            db.delete(event)
+            continue
+        event.attempts += 1
+        event.last_error = str(result)
+        if event.attempts >= MAX_ATTEMPTS:
+            event.status = FAILED
+            logger.log_error(f"Outbox event {event.id} failed for good: {result!s}")
+        else:
+            delay = min(RETRY_BASE_SECONDS * 2 ** (event.attempts - 1), RETRY_MAX_SECONDS)
+            event.available_at = datetime.now() + timedelta(seconds=delay)
+            logger.log_warning(
+                f"Outbox event {event.id} failed, retry in {delay}s: {result!s}"
+            )
+    db.commit()
+
+
+async def dispatch_pending(batch_size: int = BATCH_SIZE):
+    """Deliver one batch of due events concurrently, returns the batch size."""
+    db = database.SessionLocal()
+    try:
+        claimed = await asyncio.to_thread(_claim, db, batch_size)
+        if not claimed:
+            return 0
+        results = await asyncio.gather(
+            *[_deliver(kind, payload) for _, kind, payload in claimed],
+            return_exceptions=True,
+        )
+        await asyncio.to_thread(_settle, db, claimed, results)
+        return len(claimed)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def dispatcher():
+    """Drain the outbox until cancelled, sleeping between polls when idle."""
+    global _wakeup, _loop
+    _loop = asyncio.get_running_loop()
+    _wakeup = asyncio.Event()
+    logger.log_info("Outbox dispatcher started")
+    while True:
+        try:
+            if await dispatch_pending() == BATCH_SIZE:
+                continue
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.log_error(f"Outbox dispatch failed: {e!s}")
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        _wakeup.clear()
@@ -0,0 +1,109 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, literal, tuple_
+
+from src.models import models
+
+DEFAULT_PAGE_SIZE = 10
+
+
+def encode_cursor(sort_value, row_uuid) -> str:
+    """Pack the last row's sort key and uuid into an opaque, url safe token."""
+    if isinstance(sort_value, datetime):
+        payload = {"t": "datetime", "v": sort_value.isoformat()}
+    else:
+        payload = {"t": "value", "v": sort_value}
+    payload["id"] = str(row_uuid)
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        sort_value = payload["v"]
+        if payload["t"] == "datetime":
+            sort_value = datetime.fromisoformat(sort_value)
+        return sort_value, uuid.UUID(payload["id"])
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+def text_sort_key(column):
+    """Text sort keys may be NULL in the JSON details; seek on '' instead."""
+    return func.coalesce(column, "")
+
+
+def _details_text(row, field):
+    """Sort value of a listing row projected with projections.project."""
+    value = getattr(row, f"details_{field}")
+    return "" if value is None else str(value)
+
+
+def user_sort_key(sort_by: str | None, details_key: str):
+    """
+    Map a listing ``sort_by`` value to the users column to seek on and the
+    matching row accessor. Anything unknown falls back to ``created_at``.
+    """
+    if sort_by == "name":
+        name_column = (
+            models.User.sp_name
+            if details_key == "service_provider"
+            else models.User.details[details_key]["name"].astext
+        )
+        return (
+            text_sort_key(name_column),
+            lambda row: (_details_text(row, "name"), row.uuid),
+        )
+    if sort_by == "email":
+        return models.User.useremail, lambda row: (row.useremail, row.uuid)
+    if sort_by == "status":
+        return (
+            text_sort_key(models.User.status),
+            lambda row: (row.status or "", row.uuid),
+        )
+    return models.User.created_at, lambda row: (row.created_at, row.uuid)
+
+
+def keyset_page(
+    query,
+    sort_column,
+    uuid_column,
+    cursor: str | None,
+    limit: int | None,
+    row_key,
+    descending: bool = False,
+):
+    """
+    Return one page of ``query`` ordered by ``(sort_column, uuid_column)`` and the
+    cursor for the next page (None on the last page).
+
+    ``cursor`` is the token returned by the previous call, or an empty string
+    for the first page. ``row_key`` maps a result row to its
+    ``(sort_value, uuid)`` pair and must agree with ``sort_column``.
+    """
+    limit = limit or DEFAULT_PAGE_SIZE
+    if cursor:
+        sort_value, last_uuid = decode_cursor(cursor)
+        seek_key = tuple_(sort_column, uuid_column)
+        last_key = tuple_(literal(sort_value), literal(last_uuid))
+        query = query.filter(seek_key < last_key if descending else seek_key > last_key)
+
+    if descending:
+        query = query.order_by(None).order_by(sort_column.desc(), uuid_column.desc())
+    else:
+        query = query.order_by(None).order_by(sort_column.asc(), uuid_column.asc())
+
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(*row_key(rows[-1]))
+    return rows, next_cursor
@@ -0,0 +1,181 @@
+from src.models import models
+
+# details keys each listing/export reads, only these are sent by the database.
+SERVICE_PROVIDER_LIST_KEYS = [
+    "name",
+    "phone",
+    "estimated_clients",
+    "tax_id",
+    "organization_type",
+    "contact_title",
+    "contact_email",
+    "contact_name",
+    "founder_first_name",
+    "founder_last_name",
+    "address_1",
+    "address_2",
+    "country",
+    "city",
+    "region",
+    "state",
+    "lat",
+    "long",
+    "zip_code",
+    "website_link",
+    "comments",
+    "rating",
+    "brochure",
+    "description",
+    "county",
+    "question",
+    "socialmedia_links",
+    "client_count",
+    "category_id",
+    "sub_category_id",
+    "keywords",
+]
+SERVICE_PROVIDER_LIST_COLUMNS = [
+    "uuid",
+    "useremail",
+    "status",
+    "is_activated",
+    "created_at",
+    "profile_img",
+    "header_img",
+    "service_provider_type",
+    "category_id",
+    "sp_lat",
+    "sp_long",
+    "details_normalized",
+]
+
+CLIENT_LIST_KEYS = [
+    "name",
+    "first_name",
+    "last_name",
+    "phone",
+    "gender",
+    "email",
+    "county",
+    "state",
+    "city",
+    "zip_code",
+    "country",
+    "region",
+    "lat",
+    "long",
+    "ssn",
+    "dob",
+    "housing_situation",
+    "website_link",
+    "address_1",
+    "address_2",
+    "Question",
+    "question",
+    "socialmedia_links",
+    "skills",
+    "comments",
+    "primary_need",
+    "secondary_need",
+    "resume",
+    "rating",
+]
+CLIENT_LIST_COLUMNS = [
+    "uuid",
+    "useremail",
+    "status",
+    "is_activated",
+    "profile_img",
+    "header_img",
+    "created_by",
+    "approved_by",
+    "updated_by",
+    "updated_at",
+    "created_at",
+    "is_deleted",
+    "deleted_by",
+    "deleted_at",
+    "details_normalized",
+]
+
+STAFF_LIST_KEYS = ["staff_first_name", "staff_last_name", "phone", "gender"]
+STAFF_LIST_COLUMNS = [
+    "uuid",
+    "useremail",
+    "profile_img",
+    "header_img",
+    "is_activated",
+    "created_by",
+    "created_at",
+    "updated_at",
+    "is_deleted",
+    "updated_by",
+    "deleted_by",
+    "deleted_at",
+    "password",
+    "role_type",
+    "permission",
+    "status",
+]
+
+CLIENT_EXPORT_KEYS = [
+    "first_name",
+    "last_name",
+    "dob",
+    "ssn",
+    "gender",
+    "housing_situation",
+    "address_1",
+    "address_2",
+    "city",
+    "county",
+    "state",
+    "zip_code",
+    "phone",
+    "email",
+    "socialmedia_links",
+    "website_link",
+    "comments",
+    "Question",
+    "question",
+    "category_id",
+]
+SERVICE_PROVIDER_EXPORT_KEYS = [
+    "name",
+    "contact_title",
+    "contact_name",
+    "contact_email",
+    "tax_id",
+    "phone",
+]
+
+
+def details_value(section: str, key: str):
+    """``details #> '{section,key}'``, the JSON value keeps its type (text, number, list)."""
+    return models.User.details[(section, key)]
+
+
+def details_columns(section: str, keys):
+    return [details_value(section, key).label(f"details_{key}") for key in keys]
+
+
+def project(query, section: str, keys, columns):
+    """
+    Swap the selected entity of a ``db.query(models.User)`` listing for plain
+    columns plus the listed ``details.section`` keys. Filters and ordering are
+    kept, rows come back as lightweight tuples.
+    """
+    return query.with_entities(
+        *[getattr(models.User, column) for column in columns],
+        *details_columns(section, keys),
+    )
+
+
+def details_section(row, keys):
+    """The ``details.section`` slice of a projected row, missing keys left out."""
+    section = {}
+    for key in keys:
+        value = getattr(row, f"details_{key}")
+        if value is not None:
+            section[key] = value
+    return section
@@ -16,13 +16,21 @@ from sqlalchemy.orm.attributes import flag_modified
 from src.api import schemas
 from src.api.schemas import CreateServiceProvider
 from src.authentication.encryption import decrypt_password, encrypt_password, secret_key
+from src.common import (
+    counting,
+    details_schema,
+    matching,
+    outbox,
+    pagination,
+    projections,
+    reference_cache,
+)
 from src.common.email_service import send_email
-from src.common.translate import translate_fields
+from src.common.translate import translate_fields, translate_many
 from src.common.user import save_uploaded_file, save_uploaded_pdf
 from src.configs import database
 from src.configs.config import logger
 from src.models import models
-from src.routers.chat import manager
 
 get_db = database.get_db
 
@@ -58,7 +66,7 @@ async def create_service_provder_self(
     db: Session = Depends(get_db),
 ):
     try:
-        provider = await translate_fields(
+        provider = await translate_many(
             provider_original,
             fields=[
                 "name",
@@ -215,7 +223,7 @@ async def update_service_provider_self(
     db: Session = Depends(get_db),
 ):
     try:
-        updated_service_provider = await translate_fields(
+        updated_service_provider = await translate_many(
             updated_service_provider_original,
             fields=[
                 "name",
@@ -280,9 +288,6 @@ async def update_service_provider_self(
         if email:
             update_data['useremail']=email
 
-        category_obj = None
-        sub_category_obj = None
-
         # Update category_id and category_name only if provided
         if (
             "category_id" in updated_provider
@@ -290,14 +295,7 @@ async def update_service_provider_self(
         ):
             category_id = updated_provider["category_id"]
             details["category_id"] = category_id
-            category_obj = (
-                db.query(models.Category)
-                .filter(models.Category.category_id == category_id)
-                .first()
-            )
-            details["category_name"] = (
-                category_obj.category_name if category_obj else None
-            )
+            details["category_name"] = reference_cache.category_name(category_id, db)
 
         # Update sub_category_id and sub_category_name only if provided
         if (
@@ -306,13 +304,8 @@ async def update_service_provider_self(
         ):
             sub_category_id = updated_provider["sub_category_id"]
             details["sub_category_id"] = sub_category_id
-            sub_category_obj = (
-                db.query(models.SubCategory)
-                .filter(models.SubCategory.sub_category_id == sub_category_id)
-                .first()
-            )
-            details["sub_category_name"] = (
-                sub_category_obj.sub_category_name if sub_category_obj else None
+            details["sub_category_name"] = reference_cache.sub_category_name(
+                sub_category_id, db
             )
 
         # Update other details fields
@@ -371,6 +364,7 @@ async def update_service_provider_self(
         # Commit again to save other updates
         db.commit()
         db.refresh(service_provider)
+        matching.invalidate_providers()
 
         return service_provider
 
@@ -532,6 +526,8 @@ async def get_all_staff(
     db: Session,
     name_original: str = None,
     created_by: UUID = None,
+    cursor: str = None,
+    count_strategy: str = counting.EXACT,
 ):
     try:
         name = await translate_fields(name_original, fields=[])
@@ -553,19 +549,42 @@ async def get_all_staff(
             )
         if created_by:
             query = query.filter(models.User.created_by == (f"{created_by}"))
-        staffs = query.offset(skip).limit(limit).all()
-        total_staffs = query.count()
+        query = projections.project(
+            query,
+            "service_provider",
+            projections.STAFF_LIST_KEYS,
+            projections.STAFF_LIST_COLUMNS,
+        )
+        next_cursor = None
+        if cursor is not None:
+            # Keyset mode: the total is only computed for the first page.
+            total_staffs = (
+                counting.count_rows(query, db, count_strategy, "staff")
+                if not cursor
+                else None
+            )
+            sort_column, row_key = pagination.user_sort_key(
+                "created_at", "service_provider"
+            )
+            staffs, next_cursor = pagination.keyset_page(
+                query,
+                sort_column,
+                models.User.uuid,
+                cursor,
+                limit,
+                row_key,
+                descending=True,
+            )
+        else:
+            staffs = query.offset(skip).limit(limit).all()
+            total_staffs = counting.count_rows(query, db, count_strategy, "staff")
 
         formatted_staffs = [
             {
                 "uuid": str(staff.uuid),
-                "first_name": staff.details.get("service_provider", {}).get(
-                    "staff_first_name", ""
-                ),
-                "last_name": staff.details.get("service_provider", {}).get(
-                    "staff_last_name", ""
-                ),
-                "phone": staff.details.get("service_provider", {}).get("phone", ""),
+                "first_name": staff.details_staff_first_name or "",
+                "last_name": staff.details_staff_last_name or "",
+                "phone": staff.details_phone or "",
                 "useremail": staff.useremail,
                 "profile_img": staff.profile_img if staff.profile_img else None,
                 "is_activated": staff.is_activated,
@@ -580,14 +599,19 @@ async def get_all_staff(
                 "password": staff.password,
                 "role_type": staff.role_type,
                 "permission": staff.permission,
-                "gender": staff.details.get("service_provider", {}).get("gender", ""),
+                "gender": staff.details_gender or "",
                 "status": staff.status,
             }
             for staff in staffs
         ]
 
-        return {"total_staff": total_staffs, "staffs": formatted_staffs}
+        response = {"total_staff": total_staffs, "staffs": formatted_staffs}
+        if cursor is not None:
+            response["next_cursor"] = next_cursor
+        return response
 
+    except HTTPException as e:
+        raise e
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1237,31 +1261,20 @@ async def get_request_details(
 
         total = query.count()
         results = query.offset(skip).limit(limit).all()
+        category_names = reference_cache.get_category_names(db)
 
         clients_data = []
         for req, user in results:
             client_details = user.details.get("client", {}) if user.details else {}
-            category_id_str = client_details.get("category_id", "")
-
-            if isinstance(category_id_str, str):
-                category_id_list = [
-                    int(x) for x in category_id_str.split(",") if x.strip().isdigit()
-                ]
-            elif isinstance(category_id_str, list):
-                category_id_list = [
-                    int(x) for x in category_id_str if isinstance(x, int)
-                ]
-            else:
-                category_id_list = []
-
-            category_names = []
-            if category_id_list:
-                categories = (
-                    db.query(models.Category.category_name)
-                    .filter(models.Category.category_id.in_(category_id_list))
-                    .all()
-                )
-                category_names = [category.category_name for category in categories]
+            category_id_list = (
+                details_schema.as_ids(client_details.get("category_id")) or []
+            )
+
+            client_category_names = [
+                category_names[category_id]
+                for category_id in category_id_list
+                if category_id in category_names
+            ]
 
             clients_data.append(
                 {
@@ -1269,7 +1282,7 @@ async def get_request_details(
                     "useremail": user.useremail,
                     "role_type": user.role_type,
                     "details": client_details,
-                    "category_name": category_names,
+                    "category_name": client_category_names,
                     "request_status": req.status,
                     "request_id": str(req.id),
                 }
@@ -1341,17 +1354,28 @@ async def get_request_details(
 async def update_request_status(
     request_id: UUID, status_update: schemas.RequestUpdate, db: Session
 ):
+    """
+    Everything the status change writes, emails and WebSocket pushes included
+    (as outbox events), is committed in one transaction.
+    """
     request = db.query(models.Request).filter(models.Request.id == request_id).first()
+    if not request:
+        raise HTTPException(status_code=404, detail="Request not found")
+
+    if status_update.status not in ["approved", "pending", "rejected"]:
+        raise HTTPException(status_code=400, detail="Invalid status")
+
     provider = (
         db.query(models.User).filter(models.User.uuid == request.provider_id).first()
     )
+    provider_name = "Unknown"
 
     if provider:
         details = provider.details or {}
         if "service_provider" not in details:
             details["service_provider"] = {}
 
-        provider_name = provider.details["service_provider"].get("name", "Unknown")
+        provider_name = details["service_provider"].get("name", "Unknown")
         service_provider_data = details["service_provider"]
         current_count = service_provider_data.get("client_count", 0)
         service_provider_data["client_count"] = current_count + 1
@@ -1370,9 +1394,7 @@ async def update_request_status(
                 .first()
             )
 
-            if (
-                subscription and isinstance(subscription.clients_count, int)
-            ) or isinstance(subscription.clients_count, int):
+            if subscription and isinstance(subscription.clients_count, int):
                 max_clients = subscription.clients_count
             else:
                 max_clients = 0
@@ -1380,17 +1402,23 @@ async def update_request_status(
             threshold = 0.8 * max_clients  # 80% of limit
 
             if current_count >= max_clients:
-                await send_email(
+                # Only the alert is saved, the request is left unchanged.
+                db.expire(provider)
+                outbox.add_email(
+                    db,
                     provider.useremail,
                     "Alert",
                     "You have reached 100% of client limit",
                 )
+                db.commit()
+                outbox.notify()
                 raise HTTPException(
                     status_code=404, detail="You have reached 100% limit"
                 )
 
             elif current_count + 1 >= threshold:
-                await send_email(
+                outbox.add_email(
+                    db,
                     provider.useremail,
                     "Alert",
                     "You have reached 80% of client limit",
@@ -1400,26 +1428,15 @@ async def update_request_status(
                 )  # Force update detection
                 flag_modified(provider, "details")
 
-                db.commit()
-                db.refresh(provider)
-
-    if not request:
-        raise HTTPException(status_code=404, detail="Request not found")
-
-    if status_update.status not in ["approved", "pending", "rejected"]:
-        raise HTTPException(status_code=400, detail="Invalid status")
-
-    # Update the request status
-    request.status = status_update.status
-
-    db.commit()
-    db.refresh(request)
-
     # Fetch the client details
     client = db.query(models.User).filter(models.User.uuid == request.client_id).first()
     if not client:
+        db.rollback()
         raise HTTPException(status_code=404, detail="Client not found")
 
+    # Update the request status
+    request.status = status_update.status
+
     client_details = client.details.get("client", {})
     client_first_name = client_details.get("first_name", "Unknown")
     client_last_name = client_details.get("last_name", "Unknown")
@@ -1429,13 +1446,11 @@ async def update_request_status(
         if client.service_provider_ids is None:
             client.service_provider_ids = []
         sp_ids = list(client.service_provider_ids)
-        
+
         if request.provider_id not in sp_ids:
             sp_ids.append(request.provider_id)
         client.service_provider_ids = sp_ids
         client.approved_by = request.provider_id
-        db.commit()
-        db.refresh(client)
 
     notification_type = None
     if status_update.status == "approved":
@@ -1466,20 +1481,25 @@ async def update_request_status(
         type=notification_type,
     )
     db.add(notification)
-    db.commit()
-    db.refresh(notification)
 
-    # Send real-time notification to the client via WebSocket
-    await manager.send_to_user(
+    # Real-time notification to the client via WebSocket
+    outbox.add_push(
+        db,
         request.client_id,
         {
             "type": "STATUS_UPDATE",
             "request_id": str(request.id),
-            "status": request.status,
+            "status": status_update.status,
             "message": f"Your request has been {status_update.status} by {provider_name}.",
         },
     )
 
+    db.commit()
+    db.refresh(request)
+    outbox.notify()
+    if status_update.status == "approved":
+        matching.invalidate_providers()
+
     return request.status
 
 
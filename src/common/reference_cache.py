@@ -0,0 +1,148 @@
+import os
+import threading
+import time
+
+from sqlalchemy.orm import Session
+
+from src.common.tasks import redis_app
+from src.configs.config import logger
+from src.models import models
+
+# Categories, sub categories and subscription plans are small and rarely change,
+# so every worker keeps them in memory. Entries expire after CACHE_TTL seconds,
+# and writers bump a shared version in redis so other workers drop their copy.
+CACHE_TTL = int(os.getenv("REFERENCE_CACHE_TTL", "300"))
+VERSION_CHECK_INTERVAL = int(os.getenv("REFERENCE_CACHE_VERSION_CHECK", "5"))
+VERSION_KEY = "reference_data:version"
+
+CATEGORIES = "categories"
+SUB_CATEGORIES = "sub_categories"
+SUBSCRIPTIONS = "subscriptions"
+
+_lock = threading.Lock()
+_entries = {}
+_version = {"value": None, "checked_at": 0.0}
+
+
+def _load_categories(db: Session):
+    return dict(
+        db.query(models.Category.category_id, models.Category.category_name).all()
+    )
+
+
+def _load_sub_categories(db: Session):
+    return dict(
+        db.query(
+            models.SubCategory.sub_category_id, models.SubCategory.sub_category_name
+        ).all()
+    )
+
+
+def _load_subscriptions(db: Session):
+    return {
+        plan.subscription_id: {
+            "subscription_id": plan.subscription_id,
+            "name": plan.name,
+            "clients_count": plan.clients_count,
+            "view_other_client": plan.view_other_client,
+            "chat_with_prospective_clients": plan.chat_with_prospective_clients,
+            "chat_restriction": plan.chat_restriction,
+            "risk_reward_clients": plan.risk_reward_clients,
+            "risk_reward_prospective_clients": plan.risk_reward_prospective_clients,
+            "risk_reward_provider": plan.risk_reward_provider,
+            "price_details": plan.price_details,
+        }
+        for plan in db.query(models.Subscription).all()
+    }
+
+
+_LOADERS = {
+    CATEGORIES: _load_categories,
+    SUB_CATEGORIES: _load_sub_categories,
+    SUBSCRIPTIONS: _load_subscriptions,
+}
+
+
+def _shared_version():
+    try:
+        return redis_app.get(VERSION_KEY)
+    except Exception as e:
+        logger.log_warning(f"Reference cache version check failed: {e!s}")
+        return _version["value"]
+
+
+def _sync_version():
+    """Drop every section when another worker has bumped the shared version."""
+    now = time.monotonic()
+    if now - _version["checked_at"] < VERSION_CHECK_INTERVAL:
+        return
+    _version["checked_at"] = now
+    shared = _shared_version()
+    if shared != _version["value"]:
+        _entries.clear()
+        _version["value"] = shared
+
+
+def _get(section: str, db: Session):
+    with _lock:
+        _sync_version()
+        entry = _entries.get(section)
+        if entry and time.monotonic() - entry["loaded_at"] < CACHE_TTL:
+            return entry["data"]
+        data = _LOADERS[section](db)
+        _entries[section] = {"data": data, "loaded_at": time.monotonic()}
+        return data
+
+
+def get_category_names(db: Session):
+    """Return a {category_id: category_name} map."""
+    return _get(CATEGORIES, db)
+
+
+def get_sub_category_names(db: Session):
+    """Return a {sub_category_id: sub_category_name} map."""
+    return _get(SUB_CATEGORIES, db)
+
+
+def get_subscription_plans(db: Session):
+    """Return a {subscription_id: plan entitlements} map."""
+    return _get(SUBSCRIPTIONS, db)
+
+
+def get_subscription_plan(subscription_id, db: Session):
+    try:
+        return get_subscription_plans(db).get(int(subscription_id))
+    except (TypeError, ValueError):
+        return None
+
+
+def category_name(category_id, db: Session, default=None):
+    try:
+        return get_category_names(db).get(int(category_id), default)
+    except (TypeError, ValueError):
+        return default
+
+
+def sub_category_name(sub_category_id, db: Session, default=None):
+    try:
+        return get_sub_category_names(db).get(int(sub_category_id), default)
+    except (TypeError, ValueError):
+        return default
+
+
+def invalidate(*sections: str):
+    """
+    Drop the given sections (all when none are passed) in this worker and bump
+    the shared version so the other workers reload on their next check.
+    """
+    with _lock:
+        if sections:
+            for section in sections:
+                _entries.pop(section, None)
+        else:
+            _entries.clear()
+        try:
+            _version["value"] = str(redis_app.incr(VERSION_KEY))
+            _version["checked_at"] = time.monotonic()
+        except Exception as e:
+            logger.log_warning(f"Reference cache version bump failed: {e!s}")
@@ -1,32 +1,133 @@
+import asyncio
+import hashlib
 import os
+import re
+import threading
+from collections import OrderedDict
 
 import httpx
-import requests
 
-from src.configs.config import EnvVar
+from src.common.tasks import redis_app
+from src.configs.config import EnvVar, logger
 
 API_KEY = os.environ.get(EnvVar.GoogleApiKey.value)
+TRANSLATE_URL = "https://translation.googleapis.com/language/translate/v2"
 
+# One pooled client for every caller. Its sync API is thread safe and is
+# called through asyncio.to_thread, so the connections outlive the event loops
+# created by asyncio.run in the sync routes without blocking any of them.
+_http_client = httpx.Client(
+    timeout=httpx.Timeout(10.0),
+    limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+)
 
-async def translate_text(text, source_lang="es", target_lang="en"):
-    url = f"https://translation.googleapis.com/language/translate/v2?key={API_KEY}"
+# Translations are cached in process (LRU) and in redis (shared, with TTL).
+LRU_SIZE = int(os.getenv("TRANSLATE_LRU_SIZE", "10000"))
+CACHE_TTL = int(os.getenv("TRANSLATE_CACHE_TTL", str(7 * 24 * 3600)))
+CACHE_PREFIX = "translate"
+_NOT_TRANSLATABLE = re.compile(r"[\d\s.,:;/#()+\-]*")
 
-    payload = {
-        "q": text,
-        # 'source': source_lang,  # 'es' -> Spanish
-        "target": target_lang,  # 'en' -> English
-        # 'format': 'text'
-    }
+_lru = OrderedDict()
+_lru_lock = threading.Lock()
 
-    response = requests.post(url, json=payload)
+# Google Translate v2 accepts up to 128 q values per request, keep the body
+# well under its size limit as well.
+MAX_BATCH_SEGMENTS = 128
+MAX_BATCH_CHARS = 30000
+MAX_CONCURRENT_REQUESTS = int(os.getenv("TRANSLATE_CONCURRENCY", "4"))
 
-    if response.status_code == 200:
-        translated_text = response.json()["data"]["translations"][0]["translatedText"]
-        return translated_text
-    else:
+
+def _cache_key(text: str, target_lang: str):
+    return f"{CACHE_PREFIX}:{target_lang}:{hashlib.sha1(text.encode()).hexdigest()}"
+
+
+def _skip_translation(text, target_lang: str):
+    """Blank or numeric input never needs the API, nor does ASCII into English."""
+    if not isinstance(text, str) or _NOT_TRANSLATABLE.fullmatch(text):
+        return True
+    return target_lang == "en" and text.isascii()
+
+
+def _cache_get_many(texts, target_lang: str):
+    found, missing = {}, []
+    with _lru_lock:
+        for text in texts:
+            key = (text, target_lang)
+            if key in _lru:
+                _lru.move_to_end(key)
+                found[text] = _lru[key]
+            else:
+                missing.append(text)
+    if missing:
+        try:
+            values = redis_app.mget([_cache_key(text, target_lang) for text in missing])
+        except Exception as e:
+            logger.log_warning(f"Translation cache read failed: {e!s}")
+            values = [None] * len(missing)
+        hits = {text: value for text, value in zip(missing, values) if value is not None}
+        _lru_put(hits, target_lang)
+        found.update(hits)
+    return found
+
+
+def _lru_put(translations, target_lang: str):
+    with _lru_lock:
+        for text, translated in translations.items():
+            _lru[(text, target_lang)] = translated
+            _lru.move_to_end((text, target_lang))
+        while len(_lru) > LRU_SIZE:
+            _lru.popitem(last=False)
+
+
+def _cache_set_many(translations, target_lang: str):
+    if not translations:
+        return
+    _lru_put(translations, target_lang)
+    try:
+        pipeline = redis_app.pipeline(transaction=False)
+        for text, translated in translations.items():
+            pipeline.setex(_cache_key(text, target_lang), CACHE_TTL, translated)
+        pipeline.execute()
+    except Exception as e:
+        logger.log_warning(f"Translation cache write failed: {e!s}")
+
+
+async def _post(payload):
+    try:
+        return await asyncio.to_thread(
+            _http_client.post, f"{TRANSLATE_URL}?key={API_KEY}", json=payload
+        )
+    except httpx.HTTPError as e:
+        logger.log_warning(f"Translation request failed: {e!s}")
         return None
 
 
+async def _translate_one(text, source_lang, target_lang, text_format=None):
+    """Cached single string translation, None when the API call fails."""
+    cached = _cache_get_many([text], target_lang)
+    if text in cached:
+        return cached[text]
+
+    payload = {"q": text, "target": target_lang}
+    if source_lang:
+        payload["source"] = source_lang
+    if text_format:
+        payload["format"] = text_format
+    response = await _post(payload)
+    if response is None or response.status_code != 200:
+        return None
+    translated_text = response.json()["data"]["translations"][0]["translatedText"]
+    _cache_set_many({text: translated_text}, target_lang)
+    return translated_text
+
+
+async def translate_text(text, source_lang="es", target_lang="en"):
+    if _skip_translation(text, target_lang):
+        return text
+    # The source language is detected by the API.
+    return await _translate_one(text, None, target_lang)
+
+
 async def translate_fields(data, fields: list):
     if isinstance(data, str):
         return await translate_text(data)
@@ -47,21 +148,10 @@ async def translate_fields(data, fields: list):
 
 
 async def translate_text_to_spanish(text, source_lang="en", target_lang="es"):
-    url = f"https://translation.googleapis.com/language/translate/v2?key={API_KEY}"
-    payload = {
-        "q": text,
-        "source": source_lang,
-        "target": target_lang,
-        "format": "text",
-    }
-
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, json=payload)
-
-    if response.status_code == 200:
-        return response.json()["data"]["translations"][0]["translatedText"]
-    else:
+    if _skip_translation(text, target_lang):
         return text
+    translated_text = await _translate_one(text, source_lang, target_lang, "text")
+    return text if translated_text is None else translated_text
 
 
 async def translate_fields_to_spanish(data, fields: list):
@@ -96,3 +186,130 @@ async def translate_fields_to_spanish(data, fields: list):
                 set_field_value(data, field, translated_value)
 
     return data
+
+
+def _batches(texts):
+    batch, size = [], 0
+    for text in texts:
+        if batch and (
+            len(batch) == MAX_BATCH_SEGMENTS or size + len(text) > MAX_BATCH_CHARS
+        ):
+            yield batch
+            batch, size = [], 0
+        batch.append(text)
+        size += len(text)
+    if batch:
+        yield batch
+
+
+async def translate_batch(texts, source_lang="en", target_lang="es"):
+    """
+    Translate many strings with multi-q requests, at most
+    MAX_CONCURRENT_REQUESTS in flight. Each distinct string is looked up in the
+    cache and only the misses are sent, once each.
+    A source_lang of None lets the API detect it per string.
+    Returns {text: translation}; strings of a failed request map to themselves.
+    """
+    distinct = list(dict.fromkeys(text for text in texts if text))
+    translations = {
+        text: text for text in distinct if _skip_translation(text, target_lang)
+    }
+    pending = [text for text in distinct if text not in translations]
+    cached = _cache_get_many(pending, target_lang)
+    translations.update(cached)
+    pending = [text for text in pending if text not in cached]
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+    async def translate_one(batch):
+        payload = {"q": batch, "target": target_lang, "format": "text"}
+        if source_lang:
+            payload["source"] = source_lang
+        async with semaphore:
+            response = await _post(payload)
+        if response is not None and response.status_code == 200:
+            results = response.json()["data"]["translations"]
+            translated = {
+                text: result["translatedText"] for text, result in zip(batch, results)
+            }
+            _cache_set_many(translated, target_lang)
+            translations.update(translated)
+        else:
+            for text in batch:
+                translations[text] = text
+
+    await asyncio.gather(*[translate_one(batch) for batch in _batches(pending)])
+    return translations
+
+
+def _strings(value):
+    if isinstance(value, str):
+        return [value] if value else []
+    if isinstance(value, list):
+        return [item for item in value if isinstance(item, str) and item]
+    return []
+
+
+def _translated(value, translations):
+    if isinstance(value, str):
+        return translations.get(value, value)
+    if isinstance(value, list):
+        return [
+            translations.get(item, item) if isinstance(item, str) else item
+            for item in value
+        ]
+    return value
+
+
+async def translate_records_to_spanish(records, fields: list, translations=None):
+    """
+    Translate the given fields of a list of dict records in place with one
+    translate_batch call. translations is an optional memo of earlier results
+    that is reused and extended.
+    """
+    translations = {} if translations is None else translations
+    pending = {
+        text
+        for record in records
+        for field in fields
+        for text in _strings(record.get(field))
+        if text not in translations
+    }
+    if pending:
+        translations.update(await translate_batch(pending))
+    for record in records:
+        for field in fields:
+            if field in record:
+                record[field] = _translated(record[field], translations)
+    return records
+
+
+def _get_field(data, field):
+    return data.get(field) if isinstance(data, dict) else getattr(data, field, None)
+
+
+def _set_field(data, field, value):
+    if isinstance(data, dict):
+        data[field] = value
+    else:
+        setattr(data, field, value)
+
+
+async def translate_many(data, fields: list, target_lang="en"):
+    """
+    Batched translate_fields: every string of the given fields, list items
+    included, goes out in one translate_batch call (one multi-q request unless
+    it exceeds the API limits) and is written back in place. Works with dicts
+    and objects, a plain string is translated and returned.
+    """
+    if isinstance(data, str):
+        return (await translate_batch([data], None, target_lang)).get(data, data)
+
+    texts = [text for field in fields for text in _strings(_get_field(data, field))]
+    if not texts:
+        return data
+    translations = await translate_batch(texts, None, target_lang)
+    for field in fields:
+        value = _get_field(data, field)
+        if value:
+            _set_field(data, field, _translated(value, translations))
+    return data
@@ -1,9 +1,9 @@
 # Existing imports
-import csv
-import io
+import asyncio
 import json
 import os
 import random
+import re
 import string
 import uuid
 from datetime import datetime, timedelta
@@ -12,7 +12,7 @@ import pandas as pd
 from fastapi import Depends, File, HTTPException, Request, UploadFile, status
 from fastapi.responses import JSONResponse
 from pydantic import UUID4, EmailStr
-from sqlalchemy import UUID, Float, Integer, and_, cast, func, or_, text
+from sqlalchemy import UUID, Integer, and_, cast, false, func, insert, literal_column, or_, text
 from sqlalchemy.orm import Session
 from sqlalchemy.orm.attributes import flag_modified
 
@@ -22,7 +22,19 @@ from src.api.schemas import (
 )
 from src.authentication import JWTtoken
 from src.authentication.encryption import decrypt_password, encrypt_password, secret_key
-from src.common.email_service import send_email
+from src.common import (
+    counting,
+    details_schema,
+    exports,
+    geo,
+    identity,
+    imports,
+    matching,
+    pagination,
+    projections,
+    reference_cache,
+)
+from src.common.email_service import enqueue_batch, send_email
 from src.common.translate import translate_fields
 from src.configs import database
 from src.configs.config import logger
@@ -586,6 +598,95 @@ async def create_service_provider(
         )
 
 
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def hydrate_service_providers(service_providers, db: Session):
+    """
+    Load category, sub category and subscription data for a page of providers
+    with a fixed number of IN (...) queries, keyed for per-row dict lookups.
+    """
+    provider_uuids = [provider.uuid for provider in service_providers]
+    categories = reference_cache.get_category_names(db)
+    sub_categories = reference_cache.get_sub_category_names(db)
+    plans = reference_cache.get_subscription_plans(db)
+
+    subscriptions = {}
+    if provider_uuids:
+        titanium_uuids = {
+            row.uuid
+            for row in db.query(models.Titanium.uuid)
+            .filter(
+                models.Titanium.uuid.in_(provider_uuids),
+                models.Titanium.status == "active",
+            )
+            .all()
+        }
+        for titanium_uuid in titanium_uuids:
+            subscriptions[titanium_uuid] = [
+                {"subscription_name": "Titanium", "status": "active"}
+            ]
+
+        memberships = (
+            db.query(
+                models.Membership.uuid,
+                models.Membership.status,
+                models.Membership.subscription_id,
+            )
+            .filter(
+                models.Membership.uuid.in_(provider_uuids),
+                models.Membership.status.in_(["active", "trial", "upcoming"]),
+            )
+            .all()
+        )
+        for membership_uuid, membership_status, subscription_id in memberships:
+            if membership_uuid in titanium_uuids:
+                continue
+            plan = plans.get(subscription_id) or {}
+            subscriptions.setdefault(membership_uuid, []).append(
+                {"subscription_name": plan.get("name"), "status": membership_status}
+            )
+
+    return {
+        "categories": categories,
+        "sub_categories": sub_categories,
+        "subscriptions": subscriptions,
+    }
+
+
+def provider_search_tsquery(term: str):
+    """Prefix-matching tsquery over the words in term, or None when it has none."""
+    words = re.findall(r"\w+", term or "")
+    if not words:
+        return None
+    return func.to_tsquery(
+        literal_column("'simple'::regconfig"),
+        " & ".join(f"{word}:*" for word in words),
+    )
+
+
+def provider_search_origin(lat, long, client_uuid, db: Session):
+    """(lat, long) to search providers around: explicit coordinates or the client's."""
+    if lat is not None and long is not None:
+        return lat, long
+    if client_uuid:
+        location = (
+            db.query(models.User.client_lat, models.User.client_long)
+            .filter(models.User.uuid == client_uuid)
+            .first()
+        )
+        if location and location[0] is not None and location[1] is not None:
+            return location[0], location[1]
+    raise HTTPException(
+        status_code=400,
+        detail="lat and long, or a client_uuid with a location, are required for providers near me.",
+    )
+
+
 async def get_all_service_providers(
     skip: int,
     limit: int,
@@ -610,7 +711,19 @@ async def get_all_service_providers(
     secondary_need: str = None,
     role_type: str = None,
     region:str = None,
+    cursor: str = None,
+    count_strategy: str = counting.EXACT,
+    search_mode: str = None,
+    near_me: bool = False,
+    lat: float = None,
+    long: float = None,
+    radius: float = None,
 ):
+    """
+    near_me orders providers nearest first from (lat, long), or from the
+    client_uuid client's location, optionally within radius miles, and adds
+    distance (miles) to every result.
+    """
     try:
         name = await translate_fields(name_original, fields=[])
         organization_type = await translate_fields(
@@ -629,7 +742,45 @@ async def get_all_service_providers(
         if status:
             query = query.filter(models.User.status == status)
 
-        if name:
+        origin = None
+        if near_me:
+            if cursor is not None:
+                raise HTTPException(
+                    status_code=400,
+                    detail="Cursor pagination is not supported for providers near me.",
+                )
+            origin = provider_search_origin(lat, long, client_uuid, db)
+            query = query.filter(
+                models.User.sp_lat.isnot(None), models.User.sp_long.isnot(None)
+            )
+            if radius:
+                query = query.filter(
+                    geo.within_box(
+                        models.User.sp_lat, models.User.sp_long, *origin, radius
+                    ),
+                    geo.distance_miles(
+                        models.User.sp_lat, models.User.sp_long, *origin
+                    )
+                    <= radius,
+                )
+
+        search_rank = None
+        search_tsquery = (
+            provider_search_tsquery(name) if name and search_mode == "ranked" else None
+        )
+        if search_tsquery is not None:
+            if cursor is not None:
+                raise HTTPException(
+                    status_code=400,
+                    detail="Cursor pagination is not supported for ranked search.",
+                )
+            query = query.filter(
+                models.User.sp_search_document.op("@@")(search_tsquery)
+            )
+            search_rank = func.ts_rank_cd(
+                models.User.sp_search_document, search_tsquery
+            )
+        elif name:
             query = query.filter(
                 models.User.useremail.ilike(f"%{name}%")
                 |
@@ -660,35 +811,23 @@ async def get_all_service_providers(
 
         if estimated_clients:
             query = query.filter(
-                models.User.details["service_provider"][
-                    "estimated_clients"
-                ].astext.ilike(f"{estimated_clients}")
+                models.User.sp_estimated_clients == str(estimated_clients)
             )
 
         if organization_type:
             query = query.filter(
-                models.User.details["service_provider"][
-                    "organization_type"
-                ].astext.ilike(f"{organization_type}%")
+                func.lower(models.User.sp_organization_type).like(
+                    f"{organization_type.lower()}%"
+                )
             )
 
         if county:
-            query = query.filter(
-                models.User.details["service_provider"]["county"].astext.ilike(
-                    f"%{county}%"
-                )
-            )
+            query = query.filter(models.User.sp_county.ilike(f"%{county}%"))
 
         if city:
-            query = query.filter(
-                models.User.details["service_provider"]["city"].astext.in_([city.upper()])
-            )
+            query = query.filter(models.User.sp_city == city.upper())
         if zipcode:
-            query = query.filter(
-                models.User.details["service_provider"]["zip_code"].astext.ilike(
-                    f"{zipcode}"
-                )
-            )
+            query = query.filter(models.User.sp_zip_code == str(zipcode))
 
         if category:
             query = query.filter(
@@ -704,11 +843,7 @@ async def get_all_service_providers(
                 )
             )
         if region:
-            query = query.filter(
-                models.User.details["service_provider"]["region"].astext.ilike(
-                    f"%{region}%"
-                )
-            )
+            query = query.filter(models.User.sp_region.ilike(f"%{region}%"))
 
 
         if blocked and client_uuid:
@@ -737,7 +872,7 @@ async def get_all_service_providers(
                 "status",
             ]:
                 column = {
-                    "name": models.User.details["service_provider"]["name"].astext,
+                    "name": models.User.sp_name,
                     "email": models.User.useremail,
                     "created_at": models.User.created_at,
                     "status": models.User.status,
@@ -747,6 +882,12 @@ async def get_all_service_providers(
                     query = query.order_by(column.desc())
                 else:
                     query = query.order_by(column.asc())
+        if origin and not sort_by:
+            query = query.order_by(
+                geo.nearest_first(models.User.sp_lat, models.User.sp_long, *origin)
+            )
+        elif search_rank is not None and not sort_by:
+            query = query.order_by(search_rank.desc())
         if role_type == 'admin':
             query = query.order_by(models.User.created_at.desc())
 
@@ -791,16 +932,51 @@ async def get_all_service_providers(
 
         if conditions:
             query = query.filter(or_(*conditions))
-        result_query = query.offset(skip).limit(limit)
-        service_providers = result_query.all()
-        # print("query to excute",result_query.statement.compile(compile_kwargs={"literal_binds": True}))
-        
-        total_service_provider = query.count()
+        query = projections.project(
+            query,
+            "service_provider",
+            projections.SERVICE_PROVIDER_LIST_KEYS,
+            projections.SERVICE_PROVIDER_LIST_COLUMNS,
+        )
+        next_cursor = None
+        if cursor is not None:
+            # Keyset mode: the total is only computed for the first page.
+            total_service_provider = (
+                counting.count_rows(query, db, count_strategy, "service_providers")
+                if not cursor
+                else None
+            )
+            sort_column, row_key = pagination.user_sort_key(
+                sort_by, "service_provider"
+            )
+            service_providers, next_cursor = pagination.keyset_page(
+                query,
+                sort_column,
+                models.User.uuid,
+                cursor,
+                limit,
+                row_key,
+                descending=not sort_by or sort_order.lower() == "desc",
+            )
+        else:
+            result_query = query.offset(skip).limit(limit)
+            service_providers = result_query.all()
+            # print("query to excute",result_query.statement.compile(compile_kwargs={"literal_binds": True}))
+
+            total_service_provider = counting.count_rows(
+                query, db, count_strategy, "service_providers"
+            )
+        reference_data = hydrate_service_providers(service_providers, db)
         formatted_providers = []
         for service_provider in service_providers:
-            estimated_clients = service_provider.details.get(
-                "service_provider", {}
-            ).get("estimated_clients", None)
+            sp_details = projections.details_section(
+                service_provider, projections.SERVICE_PROVIDER_LIST_KEYS
+            )
+            if not service_provider.details_normalized:
+                sp_details = details_schema.normalize_section(
+                    "service_provider", sp_details
+                )
+            estimated_clients = sp_details.get("estimated_clients", None)
             try:
                 estimated_clients = (
                     int(estimated_clients) if estimated_clients is not None else 0
@@ -808,152 +984,78 @@ async def get_all_service_providers(
             except ValueError:
                 estimated_clients = 0
 
-            socialmedia_links = service_provider.details.get(
-                "service_provider", {}
-            ).get("socialmedia_links", None)
-            if isinstance(socialmedia_links, str) and socialmedia_links:
-                socialmedia_links = socialmedia_links.split(',')
-
-            keywords = service_provider.details.get("service_provider", {}).get("keywords", [])
-            if isinstance(keywords, str) and keywords:
-                try:
-                    keywords = json.loads(keywords)
-                except json.JSONDecodeError:
-                    keywords = [keyword.strip() for keyword in keywords.split(",") if keyword.strip()]
-            elif not keywords:
-                keywords = []
+            socialmedia_links = sp_details.get("socialmedia_links", None)
+            keywords = sp_details.get("keywords") or []
 
-            category_id = service_provider.details.get("service_provider", {}).get(
+            category_id = sp_details.get(
                 "category_id", ""
             )
-            sub_category_id = service_provider.details.get("service_provider", {}).get(
+            sub_category_id = sp_details.get(
                 "sub_category_id", ""
             )
 
-            category_name = None
-            sub_category_name = None
-
-            if category_id:
-                category = (
-                    db.query(models.Category.category_name)
-                    .filter(models.Category.category_id == category_id)
-                    .first()
-                )
-                category_name = category.category_name if category else None
-
-            if sub_category_id:
-                sub_category = (
-                    db.query(models.SubCategory.sub_category_name)
-                    .filter(models.SubCategory.sub_category_id == sub_category_id)
-                    .first()
-                )
-                sub_category_name = (
-                    sub_category.sub_category_name if sub_category else None
-                )
-            subscriptions = []
-            get_titanium = db.query(models.Titanium).filter(
-                (models.Titanium.uuid == service_provider.uuid) & 
-                (models.Titanium.status == "active")
-            ).first()
-            
-            if get_titanium:
-                subscriptions.append({"subscription_name":"Titanium","status":get_titanium.status})
-            else:
-                get_subscriptions = db.query(models.Membership).filter(
-                    models.Membership.uuid == service_provider.uuid,
-                    models.Membership.status.in_(["active", "trial", "upcoming"])
-                ).all()
-                if get_subscriptions:
-                    for subscription in get_subscriptions:
-                        get_subscription = (
-                            db.query(models.Subscription)
-                            .filter(models.Subscription.subscription_id == subscription.subscription_id)
-                            .first()
-                        )
-                        subscriptions.append({"subscription_name": get_subscription.name,"status": subscription.status})
+            category_name = reference_data["categories"].get(_to_int(category_id))
+            sub_category_name = reference_data["sub_categories"].get(
+                _to_int(sub_category_id)
+            )
+            subscriptions = reference_data["subscriptions"].get(
+                service_provider.uuid, []
+            )
 
             formatted_providers.append(
                 {
                     "uuid": str(service_provider.uuid),
-                    "name": service_provider.details.get("service_provider", {}).get(
+                    "name": sp_details.get(
                         "name", ""
                     ),
-                    "phone": service_provider.details.get("service_provider", {}).get(
+                    "phone": sp_details.get(
                         "phone", ""
                     ),
                     "estimated_clients": estimated_clients,
-                    "tax_id": service_provider.details.get("service_provider", {}).get(
+                    "tax_id": sp_details.get(
                         "tax_id", ""
                     ),
-                    "organization_type": service_provider.details.get(
-                        "service_provider", {}
-                    ).get("organization_type", ""),
-                    "contact_title": service_provider.details.get(
-                        "service_provider", {}
-                    ).get("contact_title", ""),
-                    "contact_email": service_provider.details.get("service_provider", {}).get("contact_email", ""),
-                    "contact_name": service_provider.details.get(
-                        "service_provider", {}
-                    ).get("contact_name", ""),
+                    "organization_type": sp_details.get("organization_type", ""),
+                    "contact_title": sp_details.get("contact_title", ""),
+                    "contact_email": sp_details.get("contact_email", ""),
+                    "contact_name": sp_details.get("contact_name", ""),
                     "email": service_provider.useremail,
-                    "founder_first_name": service_provider.details.get(
-                        "service_provider", {}
-                    ).get("founder_first_name", ""),
-                    "founder_last_name": service_provider.details.get(
-                        "service_provider", {}
-                    ).get("founder_last_name", ""),
-                    "address_1": service_provider.details.get(
-                        "service_provider", {}
-                    ).get("address_1", ""),
-                    "address_2": service_provider.details.get(
-                        "service_provider", {}
-                    ).get("address_2", ""),
-                    "country": service_provider.details.get("service_provider", {}).get(
+                    "founder_first_name": sp_details.get("founder_first_name", ""),
+                    "founder_last_name": sp_details.get("founder_last_name", ""),
+                    "address_1": sp_details.get("address_1", ""),
+                    "address_2": sp_details.get("address_2", ""),
+                    "country": sp_details.get(
                         "country", ""
                     ),
-                    "city": service_provider.details.get("service_provider", {}).get(
+                    "city": sp_details.get(
                         "city", ""
                     ),
-                    "region": service_provider.details.get("service_provider", {}).get(
+                    "region": sp_details.get(
                         "region", ""
                     ),
-                    "state": service_provider.details.get("service_provider", {}).get("state", ""),
-                    "lat": service_provider.details.get("service_provider", {}).get(
+                    "state": sp_details.get("state", ""),
+                    "lat": sp_details.get(
                         "lat", ""
                     ),
-                    "long": service_provider.details.get("service_provider", {}).get(
+                    "long": sp_details.get(
                         "long", ""
                     ),
-                    "zip_code": service_provider.details.get(
-                        "service_provider", {}
-                    ).get("zip_code", ""),
-                    "website_link": service_provider.details.get(
-                        "service_provider", {}
-                    ).get("website_link", ""),
-                    "comments": service_provider.details.get(
-                        "service_provider", {}
-                    ).get("comments", ""),
-                    "rating": service_provider.details.get("service_provider", {}).get(
+                    "zip_code": sp_details.get("zip_code", ""),
+                    "website_link": sp_details.get("website_link", ""),
+                    "comments": sp_details.get("comments", ""),
+                    "rating": sp_details.get(
                         "rating", ""
                     ),
-                    "brochure": service_provider.details.get(
-                        "service_provider", {}
-                    ).get("brochure", ""),
-                    "description": service_provider.details.get(
-                        "service_provider", {}
-                    ).get("description", ""),
-                    "county": service_provider.details.get("service_provider", {}).get(
+                    "brochure": sp_details.get("brochure", ""),
+                    "description": sp_details.get("description", ""),
+                    "county": sp_details.get(
                         "county", ""
                     ),
-                    "question": service_provider.details.get(
-                        "service_provider", {}
-                    ).get("question", ""),
+                    "question": sp_details.get("question", ""),
                     "socialmedia_links": socialmedia_links,
                     "profile_img": service_provider.profile_img,
                     "header_img": service_provider.header_img,
-                    "client_count": service_provider.details.get(
-                        "service_provider", {}
-                    ).get("client_count", ""),
+                    "client_count": sp_details.get("client_count", ""),
                     "category": category_name,
                     "sub_category": sub_category_name,
                     "service_provider_type": service_provider.service_provider_type,
@@ -965,11 +1067,23 @@ async def get_all_service_providers(
                     "keywords": keywords
                 }
             )
+            if origin:
+                formatted_providers[-1]["distance"] = round(
+                    geo.distance_between(
+                        *origin, service_provider.sp_lat, service_provider.sp_long
+                    ),
+                    2,
+                )
 
-        return {
+        response = {
             "total_service_provider": total_service_provider,
             "service_provider": formatted_providers,
         }
+        if cursor is not None:
+            response["next_cursor"] = next_cursor
+        return response
+    except HTTPException as e:
+        raise e
     except Exception as e:
         return JSONResponse(
             status_code=500, content={"message": f"An error occurred: {e!s}"}
@@ -1022,24 +1136,12 @@ def get_service_provider(uuid: UUID, db: Session):
         category_id = details.get("category_id", None)
         sub_category_id = details.get("sub_category_id", None)
 
-        category_name = None
-        sub_category_name = None
-
-        if category_id:
-            category = (
-                db.query(models.Category.category_name)
-                .filter(models.Category.category_id == category_id)
-                .first()
-            )
-            category_name = category.category_name if category else None
-
-        if sub_category_id:
-            sub_category = (
-                db.query(models.SubCategory.sub_category_name)
-                .filter(models.SubCategory.sub_category_id == sub_category_id)
-                .first()
-            )
-            sub_category_name = sub_category.sub_category_name if sub_category else None
+        category_name = reference_cache.get_category_names(db).get(
+            _to_int(category_id)
+        )
+        sub_category_name = reference_cache.get_sub_category_names(db).get(
+            _to_int(sub_category_id)
+        )
         titanium_obj = db.query(models.Titanium).filter((models.Titanium.uuid == uuid) & (models.Titanium.status == "active")).first()
         subcriptions = []
         if titanium_obj:
@@ -1062,12 +1164,10 @@ def get_service_provider(uuid: UUID, db: Session):
             ).all()
             if get_subscriptions:
                 for subscription in get_subscriptions:
-                    get_subscription = (
-                        db.query(models.Subscription)
-                        .filter(models.Subscription.subscription_id == subscription.subscription_id)
-                        .first()
-                    )
-                    subcriptions.append({"subscription_name": get_subscription.name,"status": subscription.status})
+                    plan = reference_cache.get_subscription_plan(
+                        subscription.subscription_id, db
+                    ) or {}
+                    subcriptions.append({"subscription_name": plan.get("name"),"status": subscription.status})
         links = []
         if details.get("socialmedia_links", ""):
             if  isinstance(details.get("socialmedia_links"), str):
@@ -1271,6 +1371,7 @@ async def update_provider_status(
 
         db.commit()
         db.refresh(provider)
+        matching.invalidate_providers()
 
         logger.log_info(
             f"Successfully updated status for service provider UUID {service_provider_uuid} to { provider.status}"
@@ -1329,6 +1430,13 @@ async def update_service_provider(
             return JSONResponse(
                 status_code=404, content={"message": "Service provider not found"}
             )
+        location = {
+            key: value
+            for key, value in (
+                (service_provider.details or {}).get("service_provider") or {}
+            ).items()
+            if key in ("zip_code", "lat", "long")
+        }
         service_provider.updated_by = updated_service_provider.admin_uuid
         if updated_service_provider.categories:
             categories = json.loads(updated_service_provider.categories)
@@ -1361,9 +1469,27 @@ async def update_service_provider(
                         )
                     }
                 )
-                    
+
+        # Fill coordinates from the ZIP centroid when the profile has none.
+        for key in ("zip_code", "lat", "long"):
+            value = getattr(updated_service_provider, key, None)
+            if value is not None and value != "":
+                location[key] = value
+        if geo.to_coordinate(location.get("lat")) is None or geo.to_coordinate(
+            location.get("long")
+        ) is None:
+            centroid = geo.zip_centroid(location.get("zip_code"))
+            if centroid:
+                # The field updates above expired details, this reloads them.
+                details = service_provider.details or {}
+                section = details.setdefault("service_provider", {})
+                section["lat"], section["long"] = centroid
+                service_provider.details = details
+                flag_modified(service_provider, "details")
+
         db.commit()
         db.refresh(service_provider)
+        matching.invalidate_providers()
 
         logger.log_info(f"Successfully updated service provider {uuid}")
         return {
@@ -1402,6 +1528,7 @@ async def status_service_provider(service_provider_uuid: UUID, db: Session):
         del_service_provider.updated_at = datetime.now()
         del_service_provider.activated_at = datetime.now()
         db.commit()
+        matching.invalidate_providers()
 
         logger.log_info(
             f"Service Provider {service_provider_uuid} status changed to {del_service_provider.is_activated}"
@@ -1649,7 +1776,7 @@ async def create_client(
             service_provider_ids=[client.admin_uuid],
             status="verified",
             details={
-                "client": {
+                "client": geo.fill_coordinates({
                     "first_name": client.first_name,
                     "last_name": client.last_name,
                     "dob": client.dob,
@@ -1669,7 +1796,7 @@ async def create_client(
                     "website_link": client.website_link,
                     "profile_img": profile_img_url,
                     "header_image": header_img_url,
-                }
+                })
             },
         )
 
@@ -1786,6 +1913,7 @@ async def create_client(
 
             db.commit()
             db.refresh(service_provider)
+            matching.invalidate_providers()
             logger.log_info("Updated service provider client count")
 
         # Send welcome email
@@ -1831,6 +1959,68 @@ async def create_client(
         )
 
 
+PHONE_SEARCH_PATTERN = re.compile(r"^[\d\s()+.\-]+$")
+PHONE_SEARCH_MIN_DIGITS = 3
+
+
+def _phone_search_digits(term: str):
+    """Digits of term when it looks like a phone number, else None."""
+    if not PHONE_SEARCH_PATTERN.match(term):
+        return None
+    digits = re.sub(r"\D", "", term)
+    return digits if len(digits) >= PHONE_SEARCH_MIN_DIGITS else None
+
+
+def _client_field_match(column, term: str, similarity: bool):
+    if column.key == "client_phone":
+        # Phones are stored digits only, so "(555) 123" still matches; any
+        # other term is matched as typed.
+        digits = _phone_search_digits(term)
+        return column.ilike(f"%{digits or term}%")
+    if similarity:
+        return column.op("%>")(term)
+    return column.ilike(f"%{term}%")
+
+
+def client_search_filter(term: str, columns, similarity: bool = False):
+    """
+    Match term against the trigram indexed client columns. A two word term also
+    matches first name + last name. Returns (condition, rank); rank is the best
+    word similarity over the columns in similarity mode and None otherwise.
+    """
+    matches = [
+        match
+        for match in (
+            _client_field_match(column, term, similarity) for column in columns
+        )
+        if match is not None
+    ]
+    condition = or_(*matches)
+    name_parts = term.split()
+    if len(name_parts) >= 2:
+        condition = or_(
+            and_(
+                _client_field_match(
+                    models.User.client_first_name, name_parts[0], similarity
+                ),
+                _client_field_match(
+                    models.User.client_last_name, name_parts[1], similarity
+                ),
+            ),
+            condition,
+        )
+    rank = None
+    if similarity:
+        rank = func.greatest(
+            *[
+                func.word_similarity(term, column)
+                for column in columns
+                if column.key != "client_phone"
+            ]
+        )
+    return condition, rank
+
+
 async def get_all_client(
     skip: int,
     limit: int,
@@ -1846,6 +2036,9 @@ async def get_all_client(
     sort_order: str = "asc",
     sort_by: str = None,
     is_other_client: bool = False,
+    cursor: str = None,
+    count_strategy: str = counting.EXACT,
+    search_mode: str = None,
 ):
     try:
         query = None
@@ -1880,62 +2073,41 @@ async def get_all_client(
                     )
                     if subscription.view_other_client == "local":
                         logger.log_info(f"Getting local clients for {user_id}")
-                        query = query.filter(
-                            models.User.details["client"]["lat"].isnot(None),
-                            models.User.details["client"]["long"].isnot(None),
-                            models.User.details["client"]["long"] != "null",
-                            models.User.details["client"]["lat"] != "null",
-                        )
-                        distance_expr = 3958.8 * func.acos(
-                            func.cos(
-                                func.radians(cast(service_provider_data["lat"], Float))
-                            )
-                            * func.cos(
-                                func.radians(
-                                    cast(
-                                        models.User.details["client"]["lat"].astext,
-                                        Float,
-                                    )
-                                )
-                            )
-                            * func.cos(
-                                func.radians(
-                                    cast(
-                                        models.User.details["client"]["long"].astext,
-                                        Float,
-                                    )
-                                )
-                                - func.radians(
-                                    cast(service_provider_data["long"], Float)
-                                )
+                        sp_lat = geo.to_coordinate(service_provider_data.get("lat"))
+                        sp_long = geo.to_coordinate(service_provider_data.get("long"))
+                        if sp_lat is None or sp_long is None:
+                            logger.log_warning(
+                                f"Service Provider {user_id} has no location, no local clients"
                             )
-                            + func.sin(
-                                func.radians(cast(service_provider_data["lat"], Float))
-                            )
-                            * func.sin(
-                                func.radians(
-                                    cast(
-                                        models.User.details["client"]["lat"].astext,
-                                        Float,
-                                    )
+                            query = query.filter(false())
+                        else:
+                            # The bounding box is answered by the location index,
+                            # the exact distance only runs on the rows inside it.
+                            query = query.filter(
+                                geo.within_box(
+                                    models.User.client_lat,
+                                    models.User.client_long,
+                                    sp_lat,
+                                    sp_long,
+                                    geo.LOCAL_RADIUS_MILES,
+                                ),
+                                geo.distance_miles(
+                                    models.User.client_lat,
+                                    models.User.client_long,
+                                    sp_lat,
+                                    sp_long,
                                 )
+                                <= geo.LOCAL_RADIUS_MILES,
                             )
-                        )
-
-                        query = query.filter(
-                            distance_expr <= 25  # Adding the distance condition
-                        )
                     elif subscription.view_other_client == "regional":
                         logger.log_info(f"Getting regional clients for {user_id}")
                         query = query.filter(
-                            models.User.details["client"]["region"].astext
-                            == "region1_texas"
+                            models.User.client_region == "region1_texas"
                         )
                     elif subscription.view_other_client == "statewide":
                         logger.log_info(f"Getting statewide clients for {user_id}")
                         query = query.filter(
-                            models.User.details["client"]["state"].astext
-                            == service_provider_data["state"]
+                            models.User.client_state == service_provider_data["state"]
                         )
                     elif subscription.view_other_client == "multistate":
                         logger.log_info(f"Getting multistate clients for {user_id}")
@@ -1961,60 +2133,26 @@ async def get_all_client(
         if is_activated is not None:
             query = query.filter(models.User.is_activated == is_activated)
 
+        search_rank = None
         if name:
-            name_parts = name.split()
-
-            if len(name_parts) >= 2:
-                query = query.filter(
-                    or_(
-                        and_(
-                            models.User.details["client"]["first_name"].astext.ilike(
-                                f"%{name_parts[0]}%"
-                            ),
-                            models.User.details["client"]["last_name"].astext.ilike(
-                                f"%{name_parts[1]}%"
-                            ),
-                        ),
-                        or_(
-                            models.User.details["client"]["first_name"].astext.ilike(
-                                f"%{name}%"
-                            ),
-                            models.User.details["client"]["last_name"].astext.ilike(
-                                f"%{name}%"
-                            ),
-                            models.User.details["client"]["phone"].astext.ilike(
-                                f"%{name}%"
-                            ),
-                            models.User.useremail.ilike(f"%{name}%"),
-                            models.User.details["client"]["state"].astext.ilike(
-                                f"%{name}%"
-                            ),
-                            models.User.details["client"]["city"].astext.ilike(
-                                f"%{name}%"
-                            ),
-                        ),
-                    )
-                )
-            else:
-                # If the name is a single word, search in all relevant fields.
-                query = query.filter(
-                    or_(
-                        models.User.details["client"]["first_name"].astext.ilike(
-                            f"%{name}%"
-                        ),
-                        models.User.details["client"]["last_name"].astext.ilike(
-                            f"%{name}%"
-                        ),
-                        models.User.details["client"]["phone"].astext.ilike(
-                            f"%{name}%"
-                        ),
-                        models.User.useremail.ilike(f"%{name}%"),
-                        models.User.details["client"]["state"].astext.ilike(
-                            f"%{name}%"
-                        ),
-                        models.User.details["client"]["city"].astext.ilike(f"%{name}%"),
-                    )
+            if search_mode == "similarity" and cursor is not None:
+                raise HTTPException(
+                    status_code=400,
+                    detail="Cursor pagination is not supported for similarity search.",
                 )
+            search_condition, search_rank = client_search_filter(
+                name,
+                [
+                    models.User.client_first_name,
+                    models.User.client_last_name,
+                    models.User.client_phone,
+                    models.User.useremail,
+                    models.User.client_state,
+                    models.User.client_city,
+                ],
+                similarity=search_mode == "similarity",
+            )
+            query = query.filter(search_condition)
 
         if old_new:
             filter_date = datetime.now() - timedelta(days=30)
@@ -2029,19 +2167,13 @@ async def get_all_client(
                 )
 
         if county:
-            query = query.filter(
-                models.User.details["client"]["county"].astext.ilike(f"%{county}%")
-            )
+            query = query.filter(models.User.client_county.ilike(f"%{county}%"))
 
         if city:
-            query = query.filter(
-                models.User.details["client"]["city"].astext.in_([city.upper()])
-            )
+            query = query.filter(models.User.client_city == city.upper())
 
         if zipcode:
-            query = query.filter(
-                models.User.details["client"]["zip_code"].astext.ilike(f"{zipcode}")
-            )
+            query = query.filter(models.User.client_zip_code == str(zipcode))
 
         if category:
             query = query.filter(
@@ -2065,9 +2197,47 @@ async def get_all_client(
                     query = query.order_by(column.desc())
                 else:
                     query = query.order_by(column.asc())
-
-        total_client = query.count()
-        clients = query.offset(skip).limit(limit).all()
+        elif search_rank is not None:
+            query = query.order_by(search_rank.desc())
+        query = projections.project(
+            query,
+            "client",
+            projections.CLIENT_LIST_KEYS,
+            projections.CLIENT_LIST_COLUMNS,
+        )
+
+        next_cursor = None
+        if cursor is not None:
+            # Keyset mode: the total is only computed for the first page.
+            total_client = (
+                counting.count_rows(query, db, count_strategy, "clients")
+                if not cursor
+                else None
+            )
+            sort_column, row_key = pagination.user_sort_key(sort_by, "client")
+            clients, next_cursor = pagination.keyset_page(
+                query,
+                sort_column,
+                models.User.uuid,
+                cursor,
+                limit,
+                row_key,
+                descending=not sort_by or sort_order.lower() == "desc",
+            )
+        else:
+            total_client = counting.count_rows(query, db, count_strategy, "clients")
+            clients = query.offset(skip).limit(limit).all()
+        category_names = reference_cache.get_category_names(db)
+        creator_ids = {client.created_by for client in clients if client.created_by}
+        creator_roles = (
+            dict(
+                db.query(models.User.uuid, models.User.role_type)
+                .filter(models.User.uuid.in_(creator_ids))
+                .all()
+            )
+            if creator_ids
+            else {}
+        )
 
         formatted_clients = []
         for client in clients:
@@ -2075,46 +2245,28 @@ async def get_all_client(
                 return JSONResponse(
                     status_code=404, content={"message": "No Client found"}
                 )
+            client_details = projections.details_section(
+                client, projections.CLIENT_LIST_KEYS
+            )
+            if not client.details_normalized:
+                client_details = details_schema.normalize_section(
+                    "client", client_details
+                )
 
-            rating = client.details.get("client", {}).get("rating", "")
+            rating = client_details.get("rating", "")
             overall_rating = rating if rating else None
 
             profile_img_url = f"{client.profile_img}" if client.profile_img else None
             header_img_url = f"{client.header_img}" if client.header_img else None
 
-            role_type = (
-                db.query(models.User.role_type)
-                .filter(models.User.uuid == client.created_by)
-                .first()
-            )
-            role_type_value = role_type[0] if role_type else None
+            role_type_value = creator_roles.get(client.created_by)
 
-            socialmedia_links = client.details.get("client", {}).get(
-                "socialmedia_links", []
-            )
-            if isinstance(socialmedia_links, str):
-                socialmedia_links = [link.strip().strip("'") for link in socialmedia_links.strip("[]").split(',')]
-
-            elif not isinstance(socialmedia_links, list):
-                socialmedia_links = []
-
-            skills = client.details.get("client", {}).get("skills", [])
-            if isinstance(skills, str):
-                skills = [skills]
-            elif not isinstance(skills, list):
-                skills = []
-
-            # Process secondary need: ensure it's a list
-            secondary_need_ids = client.details.get("client", {}).get(
-                "secondary_need", []
-            )
-            if isinstance(secondary_need_ids, str):
-                secondary_need_ids = [secondary_need_ids]
-            elif not isinstance(secondary_need_ids, list):
-                secondary_need_ids = []
+            socialmedia_links = client_details.get("socialmedia_links") or []
+            skills = client_details.get("skills") or []
+            secondary_need_ids = client_details.get("secondary_need") or []
 
             # Fetch primary need: attempt to convert to integer
-            primary_need_raw = client.details.get("client", {}).get(
+            primary_need_raw = client_details.get(
                 "primary_need", None
             )
             primary_need_id = None
@@ -2122,17 +2274,7 @@ async def get_all_client(
             if primary_need_raw:
                 try:
                     primary_need_id = int(primary_need_raw)
-                    primary_category = (
-                        db.query(models.Category)
-                        .filter(models.Category.category_id == primary_need_id)
-                        .first()
-                    )
-                    primary_need_value = (
-                        primary_category.category_name
-                        if primary_category
-                        and primary_category.category_name is not None
-                        else ""
-                    )
+                    primary_need_value = category_names.get(primary_need_id) or ""
                 except (ValueError, TypeError):
                     primary_need_id = None
                     primary_need_value = ""
@@ -2144,62 +2286,53 @@ async def get_all_client(
                 try:
                     sec_id = int(item)
                     valid_secondary_ids.append(sec_id)
-                    cat_obj = (
-                        db.query(models.Category)
-                        .filter(models.Category.category_id == sec_id)
-                        .first()
-                    )
-                    secondary_need_value.append(
-                        cat_obj.category_name
-                        if cat_obj and cat_obj.category_name is not None
-                        else ""
-                    )
+                    secondary_need_value.append(category_names.get(sec_id) or "")
                 except (ValueError, TypeError):
                     secondary_need_value.append("")
 
             formatted_clients.append(
                 {
                     "uuid": str(client.uuid),
-                    "first_name": client.details.get("client", {}).get(
+                    "first_name": client_details.get(
                         "first_name", ""
                     ),
-                    "last_name": client.details.get("client", {}).get("last_name", ""),
-                    "phone": client.details.get("client", {}).get("phone", ""),
-                    "gender": client.details.get("client", {}).get("gender", ""),
+                    "last_name": client_details.get("last_name", ""),
+                    "phone": client_details.get("phone", ""),
+                    "gender": client_details.get("gender", ""),
                     "email": client.useremail,
-                    "county": client.details.get("client", {}).get("county", ""),
-                    "state": client.details.get("client", {}).get("state", ""),
-                    "city": client.details.get("client", {}).get("city", ""),
+                    "county": client_details.get("county", ""),
+                    "state": client_details.get("state", ""),
+                    "city": client_details.get("city", ""),
                     "zip_code": str(
-                        client.details.get("client", {}).get("zip_code", "")
+                        client_details.get("zip_code", "")
                     ),  # Ensure zip_code is a string
-                    "country": client.details.get("client", {}).get("country", ""),
-                    "region": client.details.get("client", {}).get("region", ""),
+                    "country": client_details.get("country", ""),
+                    "region": client_details.get("region", ""),
                     "county_region": {
-                        "county": client.details.get("client", {}).get("county", ""),
-                        "region": client.details.get("client", {}).get("region", "")
+                        "county": client_details.get("county", ""),
+                        "region": client_details.get("region", "")
                     },
-                    "lat": client.details.get("client", {}).get("lat", ""),
-                    "long": client.details.get("client", {}).get("long", ""),
-                    "ssn": client.details.get("client", {}).get("ssn", ""),
-                    "dob": client.details.get("client", {}).get("dob", ""),
-                    "housing_situation": client.details.get("client", {}).get(
+                    "lat": client_details.get("lat", ""),
+                    "long": client_details.get("long", ""),
+                    "ssn": client_details.get("ssn", ""),
+                    "dob": client_details.get("dob", ""),
+                    "housing_situation": client_details.get(
                         "housing_situation", ""
                     ),
-                    "website_link": client.details.get("client", {}).get(
+                    "website_link": client_details.get(
                         "website_link", ""
                     ),
-                    "address_1": client.details.get("client", {}).get("address_1", ""),
-                    "address_2": client.details.get("client", {}).get("address_2", ""),
-                    "Question": client.details.get("client", {}).get("Question", ""),
+                    "address_1": client_details.get("address_1", ""),
+                    "address_2": client_details.get("address_2", ""),
+                    "Question": client_details.get("Question", ""),
                     "socialmedia_links": socialmedia_links,
                     "skills": skills,
-                    "comments": client.details.get("client", {}).get("comments", ""),
+                    "comments": client_details.get("comments", ""),
                     "primary_need_id": primary_need_id,
                     "primary_need": primary_need_value,
                     "secondary_need_ids": valid_secondary_ids,  # key changed to plural
                     "secondary_need": secondary_need_value,
-                    "resume": client.details.get("client", {}).get("resume", ""),
+                    "resume": client_details.get("resume", ""),
                     "is_activated": client.is_activated,
                     "profile_img": profile_img_url,
                     "header_img": header_img_url,
@@ -2216,10 +2349,15 @@ async def get_all_client(
                 }
             )
 
-        return {
+        response = {
             "total_client": total_client,
             "client": formatted_clients,
         }
+        if cursor is not None:
+            response["next_cursor"] = next_cursor
+        return response
+    except HTTPException as e:
+        raise e
     except Exception as e:
         return JSONResponse(
             status_code=500, content={"message": f"An error occurred: {e!s}"}
@@ -2299,13 +2437,8 @@ def get_client(uuid: UUID, db: Session):
         if primary_need_raw is not None:
             try:
                 primary_need_id = int(primary_need_raw)
-                primary_category = (
-                    db.query(models.Category)
-                    .filter(models.Category.category_id == primary_need_id)
-                    .first()
-                )
-                primary_need_value = (
-                    primary_category.category_name if primary_category else None
+                primary_need_value = reference_cache.get_category_names(db).get(
+                    primary_need_id
                 )
             except (ValueError, TypeError):
                 primary_need_id = None
@@ -2322,13 +2455,8 @@ def get_client(uuid: UUID, db: Session):
             try:
                 sec_id = int(item)
                 secondary_need_ids.append(sec_id)
-                sec_category = (
-                    db.query(models.Category)
-                    .filter(models.Category.category_id == sec_id)
-                    .first()
-                )
                 secondary_need_values.append(
-                    sec_category.category_name if sec_category else ""
+                    reference_cache.get_category_names(db).get(sec_id) or ""
                 )
             except (ValueError, TypeError):
                 secondary_need_values.append("")
@@ -2771,244 +2899,191 @@ def get_favourite_blocked_users(user_uuid: UUID, type: str, db: Session):
     return response_data
 
 
-async def bulk_client_upload(admin_uuid: UUID, file: UploadFile, db: Session):
-    REQUIRED_FIELDS = [
-        "first_name",
-        "last_name",
-        "dob",
-        "ssn",
-        "gender",
-        "email",
-        "address_1",
-        "city",
-        "state",
-        "zip_code",
-        "county",
-    ]
-    OPTIONAL_FIELDS = [
-        "profile_img",
-        "header_img",
-        "phone",
-        "address_2",
-        "website_link",
-    ]
+SERVICE_PROVIDER_IMPORT_REQUIRED = ["contact_name", "phone", "email"]
+SERVICE_PROVIDER_IMPORT_FIELDS = [
+    "contact_name",
+    "contact_title",
+    "phone",
+    "email",
+    "service_provider_type",
+    "name",
+    "tax_id",
+    "website_link",
+    "comments",
+    "state",
+    "zip_code",
+    "lat",
+    "long",
+]
+SERVICE_PROVIDER_WELCOME_SUBJECT = "Welcome, You are added as a Service Provider!"
+SERVICE_PROVIDER_WELCOME_BODY = (
+    "Your username is:%recipient% \n Your password is: %recipient.password%"
+)
+ACTION_COLUMN = "action"
+DUPLICATE_COLUMN = "possible_duplicate_of"
+
 
+async def bulk_service_provider_upload(
+    admin_uuid: UUID, file: UploadFile, db: Session, mode: str = "insert"
+):
     contents = await file.read()
+    df = imports.read_upload(contents, file.filename)
+    imports.require_columns(df.columns, SERVICE_PROVIDER_IMPORT_REQUIRED)
+    # The pipeline is synchronous database work, keep it off the event loop.
+    return await asyncio.to_thread(
+        import_service_providers, admin_uuid, file.filename, df, db, mode
+    )
 
-    # Determine file type and read accordingly
-    file_extension = file.filename.split(".")[-1].lower()
 
-    if file_extension == "csv":
-        df = pd.read_csv(io.BytesIO(contents))
-    elif file_extension in ["xls", "xlsx"]:
-        df = pd.read_excel(io.BytesIO(contents))
-    else:
-        raise HTTPException(
-            status_code=400,
-            detail="Invalid file format. Only CSV and Excel files are supported.",
+def _service_provider_rows(admin_uuid: UUID, chunk):
+    """
+    User rows with fresh passwords, plus the welcome email variables. A row
+    resolved to another provider's email (tax_id match) does not carry the
+    file's email, the upsert would otherwise write it over the existing
+    details.service_provider.email and leave it out of step with useremail.
+    """
+    rows, recipients = [], {}
+    for email, service_provider_details in chunk:
+        if service_provider_details["email"] != email:
+            service_provider_details = {**service_provider_details, "email": None}
+        generated_password = generate_random_password()
+        rows.append(
+            {
+                "uuid": uuid.uuid4(),
+                "useremail": email,
+                "password": encrypt_password(generated_password, secret_key),
+                "role_type": "service_provider",
+                "created_by": admin_uuid,
+                "status": "verified",
+                "details": {"service_provider": service_provider_details},
+                "is_imported": True,
+            }
         )
+        recipients[email] = {"password": generated_password}
+    return rows, recipients
 
-    generated_password = generate_random_password()
-    encrypted_password = encrypt_password(generated_password, secret_key)
 
-    # Check for missing required columns
-    missing_columns = [col for col in REQUIRED_FIELDS if col not in df.columns]
-    if missing_columns:
-        raise HTTPException(
-            status_code=400, detail=f"Missing columns: {', '.join(missing_columns)}"
-        )
-
-    for _, row in df.iterrows():
-        if db.query(models.User).filter(models.User.useremail == row["email"]).first():
-            continue  # Skip duplicate emails
-
-        user_uuid = uuid.uuid4()
-
-        # Create client details dynamically
-        client_details = {
-            "first_name": row["first_name"],
-            "last_name": row["last_name"],
-            "dob": row["dob"],
-            "ssn": row["ssn"],
-            "gender": row["gender"],
-            "address_1": row["address_1"],
-            "city": row["city"],
-            "state": row["state"],
-            "zip_code": row["zip_code"],
-            "county": row["county"],
-            "email": row["email"],
-        }
-        body = f"""
-                <div>
-                    <div style="margin: 50px auto; width: 60%; font-family: Inter;">
-                        <div style="padding: 12px; background-color: #efe9d9; display: flex; border-radius: 6px; margin-bottom: 30px;">
-                            <a href="#" style="width:100%; text-align:center;">
-                                <img src="http://45.248.33.189:8100/images/HFElogo.png" alt="Logo" />
-                            </a>
-                        </div>
-                        <h2>Welcome, {row["first_name"]} {row["last_name"]}!</h2>
-                        <p>You have been added as a client on our platform.</p>
-                        <p>Your login credentials are:</p>
-                                <ul>
-                                    <li><strong>Email:</strong> {row["email"]}</li>
-                                    <li><strong>Password:</strong> {generated_password}</li>
-                                </ul>
-                            For any inquiries or support, feel free to reach out to us at: <a href="mailto:[Support Email]">[Support Email]</a>
-                        </p>
-                
-                        <p style="font-size: 16px; font-family: Inter; font-weight: 400; color: #0a0d14; line-height: 20px;">
-                            Visit our website: <a href="[Website Link]">[Website Link]</a>
-                        </p>
-                    </div>
-                </div>
-                """
-        await send_email(
-            client_details["email"], "Welcome, You are added as a Client!", body
+def import_service_providers(
+    admin_uuid: UUID,
+    filename: str,
+    df: pd.DataFrame,
+    db: Session,
+    mode: str = "insert",
+):
+    """
+    Staged provider import: validate the whole frame at once, look up every
+    email of the file in one query, write the valid rows in chunks and queue
+    one batched welcome email per committed chunk.
+
+    mode "insert" rejects emails and tax ids that are already registered.
+    mode "upsert" refreshes existing providers instead, matched on email, or
+    on tax_id when the email is new, see imports.upsert_service_providers.
+    New providers whose name is close to a registered one in the same ZIP
+    area are imported but flagged in the success report (DUPLICATE_COLUMN).
+    """
+    df = imports.clean(df)
+    reasons = imports.validate(df, SERVICE_PROVIDER_IMPORT_REQUIRED)
+    keys = identity.identity_keys(df)
+    targets = df["email"].copy()
+    if mode == "upsert":
+        emails = df.loc[reasons.isna(), "email"]
+        taken = imports.existing_emails(db, emails, exclude_role="service_provider")
+        reasons = imports.reject(
+            reasons, df["email"].isin(taken), "Email belongs to another account"
+        )
+        providers = imports.existing_emails(db, emails, role_type="service_provider")
+        owners = identity.tax_id_owners(db, keys.loc[reasons.isna(), "tax_key"])
+        by_tax_id = ~df["email"].isin(providers) & keys["tax_key"].isin(owners)
+        targets = targets.mask(by_tax_id, keys["tax_key"].map(owners))
+        new = reasons.isna() & ~df["email"].isin(providers) & ~by_tax_id
+        reasons = imports.reject(
+            reasons,
+            targets.where(reasons.isna()).duplicated(keep="first") & targets.notna(),
+            "Duplicate provider in file",
         )
+    else:
+        registered = imports.existing_emails(db, df.loc[reasons.isna(), "email"])
+        reasons = imports.reject(
+            reasons, df["email"].isin(registered), "Email already exists"
+        )
+        owners = identity.tax_id_owners(db, keys.loc[reasons.isna(), "tax_key"])
+        reasons = imports.reject(
+            reasons, keys["tax_key"].isin(owners), "Tax id already registered"
+        )
+        new = reasons.isna()
+    new &= reasons.isna()
+    reasons = imports.reject(
+        reasons,
+        identity.file_duplicates(keys.where(new, axis=0)),
+        "Duplicate provider in file",
+    )
+    similar = identity.similar_providers(db, keys[new & reasons.isna()])
 
-        # Add optional fields if present, otherwise set them to None
-        for field in OPTIONAL_FIELDS:
-            client_details[field] = (
-                row[field] if field in df.columns and pd.notna(row[field]) else None
-            )
-
-        user = models.User(
-            uuid=user_uuid,
-            useremail=row["email"],
-            password=encrypted_password,
-            role_type="client",
-            created_by=admin_uuid,
-            is_activated=True,
-            status="verified",
-            details={"client": client_details},
+    valid = imports.fill_coordinates(df[reasons.isna()])
+    details = imports.records(valid, SERVICE_PROVIDER_IMPORT_FIELDS)
+    actions = {}
+    for chunk in imports.chunked(list(zip(valid.index, details))):
+        rows, recipients = _service_provider_rows(
+            admin_uuid, [(targets[index], row) for index, row in chunk]
         )
-        db.add(user)
-
-    db.commit()
-    return {"message": "Clients uploaded successfully"}
-
-
-async def bulk_service_provider_upload(admin_uuid: UUID, file: UploadFile, db: Session):
-    REQUIRED_FIELDS = ["contact_name", "phone", "email"]
-    OPTIONAL_FIELDS = ["service_provider_type", "name", "website_link", "comments","state","zip_code"]
-
-    SAVE_PATH = os.path.join(BASE_DIR,"import_provider")
-    contents = await file.read()
-
-    total_count = 0
-    success_count = 0
-    fail_count = 0
-
-    success_list = []
-    failed_list = []
-    # Determine file type and read accordingly
-    file_extension = file.filename.split(".")[-1].lower()
-
-    if file_extension == "csv":
-        df = pd.read_csv(io.BytesIO(contents))
-    elif file_extension in ["xls", "xlsx"]:
         try:
-            import openpyxl  # Ensure openpyxl is available for reading Excel files
-
-            df = pd.read_excel(io.BytesIO(contents))
-        except ImportError:
-            raise HTTPException(
-                status_code=500,
-                detail="Missing required dependency: openpyxl. Install it using 'pip install openpyxl'.",
+            if mode == "upsert":
+                written = imports.upsert_service_providers(db, rows, admin_uuid)
+            else:
+                imports.insert_users(db, rows)
+                written = {row["useremail"]: "created" for row in rows}
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.log_error(f"Provider import chunk failed: {e!s}")
+            reasons = imports.reject(
+                reasons, df.index.isin([index for index, _ in chunk]), "Insert failed"
             )
-    else:
-        raise HTTPException(
-            status_code=400,
-            detail="Invalid file format. Only CSV and Excel files are supported.",
-        )
-
-    # Check for missing required columns
-    missing_columns = [col for col in REQUIRED_FIELDS if col not in df.columns]
-    if missing_columns:
-        raise HTTPException(
-            status_code=400, detail=f"Missing columns: {', '.join(missing_columns)}"
-        )
-    file_path_json = {}
-    for _, row in df.iterrows():
-        total_count += 1
-        if db.query(models.User).filter(models.User.useremail == row["email"]).first():
-            fail_count += 1
-            failed_list.append(row.to_dict())
             continue
-
-        user_uuid = uuid.uuid4()
-        generated_password = generate_random_password()
-        encrypted_password = encrypt_password(generated_password, secret_key)
-        # Create service provider details dynamically
-        service_provider_details = {
-            "contact_name": row["contact_name"],
-            "contact_title": row["contact_title"],
-            "phone": row["phone"],
-            "email": row["email"],
+        for index, _ in chunk:
+            if targets[index] in written:
+                actions[index] = written[targets[index]]
+            else:
+                reasons[index] = "Claimed profile, not updated"
+        recipients = {
+            email: variables
+            for email, variables in recipients.items()
+            if written.get(email) == "created"
         }
-        await send_email(
-            service_provider_details["email"],
-            "Welcome, You are added as a Service Provider!",
-            f"Your username is:{service_provider_details['email']} \n Your password is: {generated_password}",
-        )
-
-        # Add optional fields if present, otherwise set them to None
-        for field in OPTIONAL_FIELDS:
-            service_provider_details[field] = (
-                row[field] if field in df.columns and pd.notna(row[field]) else None
-            )
-
-        user = models.User(
-            uuid=user_uuid,
-            useremail=row["email"],
-            password=encrypted_password,
-            role_type="service_provider",
-            created_by=admin_uuid,
-            status="verified",
-            details={"service_provider": service_provider_details},
-            is_imported = True
-        )
-        success_list.append(row.to_dict())
-        # increment the success count 
-        success_count += 1
-        db.add(user)
-        db.commit()
-        db.refresh(user)
-
-    if len(failed_list) > 0:
-        file_path_json.update({"fail":os.path.join(SAVE_PATH,f"{os.path.splitext(file.filename)[0]}_failed.csv")})
-        df_failed = pd.DataFrame(failed_list)
-        df_failed.to_csv(
-            os.path.join(SAVE_PATH,f"{os.path.splitext(file.filename)[0]}_failed.csv"), index=False
-        )
-    
-    if len(success_list) > 0:
-        file_path_json.update({"success":os.path.join(SAVE_PATH,f"{os.path.splitext(file.filename)[0]}_success.csv")})
-        df_success = pd.DataFrame(success_list)
-        df_success.to_csv(
-            os.path.join(SAVE_PATH,f"{os.path.splitext(file.filename)[0]}_success.csv"), index=False
-        )
-    
-    import_data = models.ExportData(
-            filename = file.filename,
-            total_counts = total_count,
-            success_counts = success_count,
-            fail_counts = fail_count,
-            upload_date = datetime.now(),
-            file_path = file_path_json,
-            uploaded_by = admin_uuid,
-            role_type = "Service Provider"
-        )
-    db.add(import_data)
-    db.commit()
-    db.refresh(import_data)
-
+        # Welcome emails go out in batched Mailgun requests, off the request path.
+        if recipients:
+            enqueue_batch(
+                recipients, SERVICE_PROVIDER_WELCOME_SUBJECT, SERVICE_PROVIDER_WELCOME_BODY
+            )
+    if actions:
+        matching.invalidate_providers()
+
+    succeeded = df.loc[list(actions)].assign(
+        **{
+            ACTION_COLUMN: pd.Series(actions),
+            DUPLICATE_COLUMN: pd.Series(similar, dtype=object),
+        }
+    )
+    failed = df[reasons.notna()].assign(**{imports.REASON_COLUMN: reasons})
+    imports.record_import(
+        db,
+        filename,
+        "Service Provider",
+        admin_uuid,
+        len(df),
+        succeeded,
+        failed,
+    )
     return {
-        'success_count': success_count,
-        'fail_count': fail_count,
-        'total_count':total_count
+        "success_count": len(succeeded),
+        "fail_count": len(failed),
+        "total_count": len(df),
+        "created_count": sum(action == "created" for action in actions.values()),
+        "updated_count": sum(action == "updated" for action in actions.values()),
+        "possible_duplicate_count": int(succeeded[DUPLICATE_COLUMN].notna().sum()),
     }
 
+
 def download_imported_file(id:int,download_type:str,db:Session):
 
     file_record = db.query(models.ExportData.file_path).filter(models. ExportData.id == id).first()
@@ -3029,272 +3104,284 @@ def download_imported_file(id:int,download_type:str,db:Session):
         media_type="application/octet-stream"
     )
 async def bulk_upload_categories(admin_uuid: UUID, file: UploadFile, db: Session):
-    REQUIRED_FIELDS = ["category_name"]
-
+    """
+    Set-based category import: existing categories and subcategories are
+    loaded once, the new ones are found in pandas and written with one
+    INSERT ... RETURNING per table. Returns a created/skipped report per row.
+    """
     contents = await file.read()
+    df = imports.read_upload(contents, file.filename)
+    imports.require_columns(df.columns, ["category_name"])
+    df = imports.clean(df.reindex(columns=["category_name", "sub_category_name"]))
+
+    name_limit = models.Category.category_name.type.length
+    category_names = df["category_name"]
+    category_reasons = pd.Series(None, index=df.index, dtype=object)
+    category_reasons = imports.reject(
+        category_reasons, category_names.isna(), "Missing category_name"
+    )
+    category_reasons = imports.reject(
+        category_reasons,
+        category_names.str.len() > name_limit,
+        f"category_name longer than {name_limit} characters",
+    )
+    valid = category_reasons.isna()
 
-    # Determine file type and read accordingly
-    file_extension = file.filename.split(".")[-1].lower()
-
-    if file_extension == "csv":
-        df = pd.read_csv(io.BytesIO(contents))
-    elif file_extension in ["xls", "xlsx"]:
-        try:
-            import openpyxl  # Ensure openpyxl is installed
-
-            df = pd.read_excel(io.BytesIO(contents))
-        except ImportError:
-            raise HTTPException(
-                status_code=500,
-                detail="Missing required dependency: openpyxl. Install it using 'pip install openpyxl'.",
-            )
-    else:
-        raise HTTPException(
-            status_code=400,
-            detail="Invalid file format. Only CSV and Excel files are supported.",
-        )
-
-    # Check for missing required columns
-    missing_columns = [col for col in REQUIRED_FIELDS if col not in df.columns]
-    if missing_columns:
-        raise HTTPException(
-            status_code=400, detail=f"Missing columns: {', '.join(missing_columns)}"
+    categories = dict(
+        db.query(models.Category.category_name, models.Category.category_id).all()
+    )
+    new_categories = ~category_names.isin(categories) & valid
+    category_created = new_categories & ~category_names.duplicated(keep="first")
+    if category_created.any():
+        created = db.execute(
+            insert(models.Category).returning(
+                models.Category.category_name, models.Category.category_id
+            ),
+            [
+                {"category_name": name, "created_by": admin_uuid}
+                for name in category_names[category_created]
+            ],
         )
+        categories.update(dict(created.all()))
 
-    # Check if file contains subcategory column
-    has_subcategory = "sub_category_name" in df.columns
-
-    # Group rows by category name to process each category with its subcategories
-    for category_name, group in df.groupby("category_name"):
-        # Check if category already exists
-        category_obj = (
-            db.query(models.Category)
-            .filter(models.Category.category_name == category_name)
-            .first()
+    category_ids = category_names.map(categories)
+    existing_subcategories = set(
+        db.query(
+            models.SubCategory.category_id, models.SubCategory.sub_category_name
+        ).all()
+    )
+    sub_names = df["sub_category_name"]
+    sub_keys = pd.Series(list(zip(category_ids, sub_names)), index=df.index)
+    has_sub = valid & sub_names.notna()
+    sub_created = (
+        has_sub
+        & ~sub_keys.isin(existing_subcategories)
+        & ~sub_keys.where(has_sub).duplicated(keep="first")
+    )
+    if sub_created.any():
+        db.execute(
+            insert(models.SubCategory),
+            [
+                {
+                    "category_id": int(category_id),
+                    "sub_category_name": sub_name,
+                    "created_by": admin_uuid,
+                }
+                for category_id, sub_name in sub_keys[sub_created]
+            ],
         )
 
-        if not category_obj:
-            # Create new category
-            category_obj = models.Category(
-                category_name=category_name, created_by=admin_uuid
-            )
-            db.add(category_obj)
-            db.flush()  # Assign an ID for FK references in subcategories
-
-        # If subcategories exist, process them
-        if has_subcategory:
-            for _, row in group.iterrows():
-                sub_cat_name = row.get("sub_category_name")
-                if pd.notna(sub_cat_name):
-                    # Check if subcategory already exists
-                    existing_sub = (
-                        db.query(models.SubCategory)
-                        .filter(
-                            models.SubCategory.category_id == category_obj.category_id,
-                            models.SubCategory.sub_category_name == sub_cat_name,
-                        )
-                        .first()
-                    )
-                    if not existing_sub:
-                        subcategory_obj = models.SubCategory(
-                            category_id=category_obj.category_id,
-                            sub_category_name=sub_cat_name,
-                            created_by=admin_uuid,
-                        )
-                        db.add(subcategory_obj)
-
     db.commit()
-    return {"message": "Categories and subcategories uploaded successfully"}
-
-
-def generate_client_data(db: Session):
-    """Fetches client data and returns it as a list of dictionaries."""
-    clients = db.query(models.User).filter(models.User.role_type == "client").all()
-
-    data = []
-    for client in clients:
-        client_details = client.details.get("client", {})
+    reference_cache.invalidate(
+        reference_cache.CATEGORIES, reference_cache.SUB_CATEGORIES
+    )
 
-        # Fetch category_id from details JSON
-        category_id = client_details.get("category_id")
+    rows = []
+    for index in df.index:
+        row = {
+            "row": int(index) + 1,
+            "category_name": None if pd.isna(category_names[index]) else category_names[index],
+            "sub_category_name": None if pd.isna(sub_names[index]) else sub_names[index],
+            "category": "created" if category_created[index] else "skipped",
+            "sub_category": None,
+        }
+        if not valid[index]:
+            row["reason"] = category_reasons[index]
+        elif has_sub[index]:
+            row["sub_category"] = "created" if sub_created[index] else "skipped"
+        rows.append(row)
+    return {
+        "message": "Categories and subcategories uploaded successfully",
+        "categories_created": int(category_created.sum()),
+        "subcategories_created": int(sub_created.sum()),
+        "rows": rows,
+    }
 
-        # Initialize category_name to avoid UnboundLocalError
-        category_name = ""
 
-        # Get category name from Category table if category_id is available
-        if category_id:
-            if isinstance(category_id, str):
-                category_ids = [
-                    int(cat.strip())
-                    for cat in category_id.split(",")
-                    if cat.strip().isdigit()
-                ]
-            else:
-                category_ids = [category_id] if isinstance(category_id, int) else []
-
-            if category_ids:
-                categories = (
-                    db.query(models.Category)
-                    .filter(models.Category.category_id.in_(category_ids))
-                    .all()
-                )
-                category_name = ", ".join([cat.category_name for cat in categories])
+CLIENT_EXPORT_FIELDS = [
+    "first_name",
+    "last_name",
+    "dob",
+    "ssn",
+    "gender",
+    "housing_situation",
+    "address_1",
+    "address_2",
+    "city",
+    "county",
+    "state",
+    "zip_code",
+    "phone",
+    "email",
+    "socialmedia_links",
+    "website_link",
+    "comments",
+    "Question",
+    "question",
+    "category_name",
+    "profile_img",
+    "header_img",
+]
+
+CLIENT_EXPORT_TRANSLATED_FIELDS = [
+    "first_name",
+    "last_name",
+    "gender",
+    "housing_situation",
+    "address_1",
+    "address_2",
+    "city",
+    "county",
+    "state",
+    "zip_code",
+    "comments",
+    "Question",
+    "question",
+    "category_name",
+]
+
+SERVICE_PROVIDER_EXPORT_FIELDS = [
+    "useremail",
+    "status",
+    "name",
+    "contact_title",
+    "contact_name",
+    "contact_email",
+    "tax_id",
+    "phone",
+]
+SERVICE_PROVIDER_EXPORT_TRANSLATED_FIELDS = [
+    "name",
+    "organization_type",
+    "contact_title",
+    "contact_name",
+    "founder_first_name",
+    "founder_last_name",
+    "address_1",
+    "address_2",
+    "county",
+    "city",
+    "country",
+    "state",
+    "description",
+    "comments",
+    "staff_first_name",
+    "staff_last_name",
+]
+SERVICE_PROVIDER_EXCEL_HEADER = [
+    "User Email",
+    "Status",
+    "Name",
+    "Contact Title",
+    "Contact Name",
+    "Contact Email",
+    "Tax ID",
+    "Phone",
+]
+
+
+def format_client_export_row(client, category_names):
+    client_details = projections.details_section(client, projections.CLIENT_EXPORT_KEYS)
+
+    # category_id is an id list once normalized, legacy rows hold "1,2" or an int
+    category_ids = details_schema.as_ids(client_details.get("category_id")) or []
+    category_name = ", ".join(
+        category_names[cat_id] for cat_id in category_ids if cat_id in category_names
+    )
 
-        # Get stored profile and header image URLs directly
-        profile_img_url = client.profile_img or ""  # Fetch from User table
-        header_img_url = client.header_img or ""  # Fetch from User table
+    row = {
+        field: client_details.get(field, "")
+        for field in CLIENT_EXPORT_FIELDS
+        if field in projections.CLIENT_EXPORT_KEYS
+    }
+    row["category_name"] = category_name
+    # Stored profile and header image URLs come straight from the User table
+    row["profile_img"] = client.profile_img or ""
+    row["header_img"] = client.header_img or ""
+    return row
 
-        # Prepare dictionary row
-        row = {
-            "first_name": client_details.get("first_name", ""),
-            "last_name": client_details.get("last_name", ""),
-            "dob": client_details.get("dob", ""),
-            "ssn": client_details.get("ssn", ""),
-            "gender": client_details.get("gender", ""),
-            "housing_situation": client_details.get("housing_situation", ""),
-            "address_1": client_details.get("address_1", ""),
-            "address_2": client_details.get("address_2", ""),
-            "city": client_details.get("city", ""),
-            "county": client_details.get("county", ""),
-            "state": client_details.get("state", ""),
-            "zip_code": client_details.get("zip_code", ""),
-            "phone": client_details.get("phone", ""),
-            "email": client_details.get("email", ""),
-            "socialmedia_links": client_details.get("socialmedia_links", ""),
-            "website_link": client_details.get("website_link", ""),
-            "comments": client_details.get("comments", ""),
-            "Question": client_details.get("Question", ""),
-            "question": client_details.get("question", ""),
-            "category_name": category_name,
-            "profile_img": profile_img_url,
-            "header_img": header_img_url,
-        }
-        data.append(row)
 
-    return data
+def generate_client_data():
+    """Yield client export rows (dicts) from a server-side cursor."""
+    with exports.export_session() as db:
+        category_names = reference_cache.get_category_names(db)
+        clients = projections.project(
+            db.query(models.User).filter(models.User.role_type == "client"),
+            "client",
+            projections.CLIENT_EXPORT_KEYS,
+            ["profile_img", "header_img"],
+        )
+        for client in exports.stream_rows(clients):
+            yield format_client_export_row(client, category_names)
 
 
 def generate_csv(data):
-    """Generates a CSV file from client data."""
-    output = io.StringIO()
-    writer = csv.DictWriter(output, fieldnames=data[0].keys())
-    writer.writeheader()
-    writer.writerows(data)
-    output.seek(0)
-    return output
+    """Stream client export rows as CSV chunks."""
+    return exports.csv_chunks(CLIENT_EXPORT_FIELDS, data)
 
 
 def generate_excel(data):
-    """Generates an Excel file from client data."""
-    output = io.BytesIO()
-    df = pd.DataFrame(data)
-    with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-        df.to_excel(writer, index=False, sheet_name="Clients")
-    output.seek(0)
-    return output
-
-
-def generate_service_provider_csv(db: Session):
-    """Generate a CSV file containing service provider data."""
-    service_providers = (
-        db.query(models.User).filter(models.User.role_type == "service_provider").all()
-    )
+    """Stream client export rows as an xlsx file."""
+    return exports.xlsx_chunks(CLIENT_EXPORT_FIELDS, data, "Clients")
 
-    header = [
-        "useremail",
-        "status",
-        "name",
-        "contact_title",
-        "contact_name",
-        "contact_email",
-        "tax_id",
-        "phone",
-    ]
-
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(header)
-
-    for sp in service_providers:
-        sp_details = sp.details.get("service_provider", {}) if sp.details else {}
-
-        row = [
-            sp.useremail,
-            sp.status,
-            sp_details.get("name"),
-            sp_details.get("contact_title"),
-            sp_details.get("contact_name"),
-            sp_details.get("contact_email"),
-            sp_details.get("tax_id"),
-            sp_details.get("phone"),
-        ]
-        writer.writerow(row)
 
-    output.seek(0)
-    return output
+def generate_service_provider_data():
+    """Yield service provider export rows (dicts) from a server-side cursor."""
+    with exports.export_session() as db:
+        service_providers = projections.project(
+            db.query(models.User).filter(models.User.role_type == "service_provider"),
+            "service_provider",
+            projections.SERVICE_PROVIDER_EXPORT_KEYS,
+            ["useremail", "status"],
+        )
+        for sp in exports.stream_rows(service_providers):
+            row = projections.details_section(
+                sp, projections.SERVICE_PROVIDER_EXPORT_KEYS
+            )
+            row["useremail"] = sp.useremail
+            row["status"] = sp.status
+            yield row
 
 
-def generate_service_provider_excel(db: Session):
-    """Generate an Excel file containing service provider data."""
-    service_providers = (
-        db.query(models.User).filter(models.User.role_type == "service_provider").all()
+def generate_service_provider_csv(data=None):
+    """Stream service provider export rows as CSV chunks."""
+    return exports.csv_chunks(
+        SERVICE_PROVIDER_EXPORT_FIELDS,
+        generate_service_provider_data() if data is None else data,
     )
 
-    data = []
-    for sp in service_providers:
-        sp_details = sp.details.get("service_provider", {}) if sp.details else {}
-
-        data.append(
-            {
-                "User Email": sp.useremail,
-                "Status": sp.status,
-                "Name": sp_details.get("name"),
-                "Contact Title": sp_details.get("contact_title"),
-                "Contact Name": sp_details.get("contact_name"),
-                "Contact Email": sp_details.get("contact_email"),
-                "Tax ID": sp_details.get("tax_id"),
-                "Phone": sp_details.get("phone"),
-            }
-        )
-
-    df = pd.DataFrame(data)
-
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-        df.to_excel(writer, index=False, sheet_name="Service Providers")
 
-    output.seek(0)
-    return output
+def generate_service_provider_excel(data=None):
+    """Stream service provider export rows as an xlsx file."""
+    return exports.xlsx_chunks(
+        SERVICE_PROVIDER_EXPORT_FIELDS,
+        generate_service_provider_data() if data is None else data,
+        "Service Providers",
+        header=SERVICE_PROVIDER_EXCEL_HEADER,
+    )
 
 
-def generate_category_csv(db: Session):
-    # Fetch categories and their subcategories
-    data = (
-        db.query(models.Category.category_name, models.SubCategory.sub_category_name)
-        .join(
+def generate_category_data():
+    """Yield category/sub category pairs, null subcategories as ''."""
+    with exports.export_session() as db:
+        query = db.query(
+            models.Category.category_name, models.SubCategory.sub_category_name
+        ).join(
             models.SubCategory,
             models.Category.category_id == models.SubCategory.category_id,
             isouter=True,
         )
-        .all()
-    )
-
-    # Create an in-memory CSV file
-    output = io.StringIO()
-    writer = csv.writer(output)
-
-    # Write CSV Header
-    writer.writerow(["category_name", "sub_category_name"])
-
-    # Write data rows
-    for category_name, sub_category_name in data:
-        writer.writerow(
-            [category_name, sub_category_name or ""]
-        )  # Handle null subcategories
+        for category_name, sub_category_name in exports.stream_rows(query):
+            yield {
+                "category_name": category_name,
+                "sub_category_name": sub_category_name or "",
+            }
 
-    output.seek(0)  # Reset file pointer for reading
 
-    return output  # Return CSV file-like object
+def generate_category_csv():
+    return exports.csv_chunks(
+        ["category_name", "sub_category_name"], generate_category_data()
+    )
 
 
 def change_password(uuid: UUID, current_password: str, new_password: str, db: Session):
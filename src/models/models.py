@@ -6,21 +6,140 @@ from sqlalchemy import (
     TIMESTAMP,
     VARCHAR,
     Boolean,
+    DDL,
     Column,
+    Computed,
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
     Sequence,
     String,
     Text,
+    event,
     func,
+    text,
 )
-from sqlalchemy.dialects.postgresql import JSON, JSONB, UUID
+from sqlalchemy.dialects.postgresql import JSON, JSONB, TSVECTOR, UUID
 from sqlalchemy.orm import relationship
 from src.configs.database import Base
 
 
+def details_text(section, key):
+    """Stored generated column mirroring details -> section ->> key."""
+    return Computed(f"(details -> '{section}') ->> '{key}'", persisted=True)
+
+
+def details_float(section, key):
+    """Generated double column for a numeric details value, NULL when not a number."""
+    value = f"((details -> '{section}') ->> '{key}')"
+    return Computed(
+        f"CASE WHEN {value} ~ '^\\s*[-+]?[0-9]*\\.?[0-9]+\\s*$' "
+        f"THEN {value}::double precision END",
+        persisted=True,
+    )
+
+
+# Legal-form and filler words that do not tell two organizations apart.
+# common.identity.normalize_name mirrors details_name_key in Python.
+NAME_NOISE_WORDS = (
+    "the",
+    "and",
+    "of",
+    "inc",
+    "incorporated",
+    "llc",
+    "ltd",
+    "co",
+    "corp",
+    "corporation",
+    "company",
+)
+
+
+def details_digits(section, key):
+    """Generated column keeping only the digits of a details value (tax ids, phones)."""
+    return Computed(
+        f"NULLIF(regexp_replace((details -> '{section}') ->> '{key}', '\\D', '', 'g'), '')",
+        persisted=True,
+    )
+
+
+def details_name_key(section, key):
+    """
+    Generated column with an organization name reduced to its identity:
+    lowercase alphanumeric words, noise words dropped, single spaced.
+    """
+    words = "|".join(NAME_NOISE_WORDS)
+    value = f"lower((details -> '{section}') ->> '{key}')"
+    value = f"regexp_replace({value}, '[^a-z0-9]+', ' ', 'g')"
+    value = f"regexp_replace({value}, '\\m({words})\\M', ' ', 'g')"
+    value = f"regexp_replace({value}, '\\s+', ' ', 'g')"
+    return Computed(f"NULLIF(btrim({value}), '')", persisted=True)
+
+
+# Multi-valued details keys and their canonical shape, applied by the
+# common.details_schema backfill: "list" a JSON array, "ids" an array of
+# ints, "id" an int (an array of ints when several were stored).
+DETAILS_SHAPES = {
+    "service_provider": {
+        "keywords": "list",
+        "socialmedia_links": "list",
+        "category_id": "id",
+        "sub_category_id": "id",
+    },
+    "client": {
+        "socialmedia_links": "list",
+        "skills": "list",
+        "secondary_need": "ids",
+        "category_id": "ids",
+        "primary_need": "id",
+    },
+}
+DETAILS_SHAPE_TYPES = {
+    "list": ("array", "null"),
+    "ids": ("array", "null"),
+    "id": ("number", "array", "null"),
+}
+
+
+def details_normalized():
+    """
+    Generated flag, true when every DETAILS_SHAPES key already has its
+    canonical JSON type. Postgres recomputes it on every write, so a later
+    jsonb_set storing a legacy string clears it.
+    """
+    checks = []
+    for section, shapes in DETAILS_SHAPES.items():
+        for key, shape in shapes.items():
+            types = ", ".join(f"'{value}'" for value in DETAILS_SHAPE_TYPES[shape])
+            checks.append(
+                f"coalesce(jsonb_typeof(details #> '{{{section},{key}}}'), 'null') IN ({types})"
+            )
+    return Computed(" AND ".join(checks), persisted=True)
+
+
+# Provider directory search document, weighted A (name) to D (contact points).
+SP_SEARCH_WEIGHTS = {
+    "A": ["name"],
+    "B": ["keywords", "founder_first_name", "founder_last_name", "contact_name"],
+    "C": ["city"],
+    "D": ["email", "contact_email", "phone"],
+}
+
+
+def sp_search_document():
+    parts = [
+        f"setweight(to_tsvector('simple', "
+        f"coalesce((details -> 'service_provider') ->> '{key}', '')), '{weight}')"
+        for weight, keys in SP_SEARCH_WEIGHTS.items()
+        for key in keys
+    ]
+    parts.append("setweight(to_tsvector('simple', coalesce(useremail, '')), 'D')")
+    return Computed(" || ".join(parts), persisted=True)
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -198,6 +317,135 @@ class User(Base):
     stripe_customer_id = Column(String(255), nullable=True)
     activated_at = Column(TIMESTAMP, nullable=True)
 
+    # Hot filter keys from details, kept in sync by postgres so they can be indexed.
+    sp_name = Column(Text, details_text("service_provider", "name"))
+    sp_city = Column(Text, details_text("service_provider", "city"))
+    sp_zip_code = Column(Text, details_text("service_provider", "zip_code"))
+    sp_county = Column(Text, details_text("service_provider", "county"))
+    sp_region = Column(Text, details_text("service_provider", "region"))
+    sp_state = Column(Text, details_text("service_provider", "state"))
+    sp_organization_type = Column(
+        Text, details_text("service_provider", "organization_type")
+    )
+    sp_estimated_clients = Column(
+        Text, details_text("service_provider", "estimated_clients")
+    )
+    client_city = Column(Text, details_text("client", "city"))
+    client_zip_code = Column(Text, details_text("client", "zip_code"))
+    client_county = Column(Text, details_text("client", "county"))
+    client_region = Column(Text, details_text("client", "region"))
+    client_state = Column(Text, details_text("client", "state"))
+    client_first_name = Column(Text, details_text("client", "first_name"))
+    client_last_name = Column(Text, details_text("client", "last_name"))
+    client_email = Column(Text, details_text("client", "email"))
+    client_phone = Column(
+        Text,
+        Computed(
+            "regexp_replace((details -> 'client') ->> 'phone', '\\D', '', 'g')",
+            persisted=True,
+        ),
+    )
+    sp_lat = Column(Float, details_float("service_provider", "lat"))
+    sp_long = Column(Float, details_float("service_provider", "long"))
+    client_lat = Column(Float, details_float("client", "lat"))
+    client_long = Column(Float, details_float("client", "long"))
+    sp_search_document = Column(TSVECTOR, sp_search_document())
+    # Identity keys of the claim lookup and the import duplicate detector.
+    sp_tax_id = Column(Text, details_digits("service_provider", "tax_id"))
+    sp_name_key = Column(Text, details_name_key("service_provider", "name"))
+    # Listings skip the legacy details parsing for rows already normalized.
+    details_normalized = Column(Boolean, details_normalized())
+
+    __table_args__ = (
+        # Keyset pagination seeks on (created_at, uuid) within a role.
+        Index("ix_users_role_type_created_at_uuid", "role_type", "created_at", "uuid"),
+        Index("ix_users_role_type_useremail_uuid", "role_type", "useremail", "uuid"),
+        Index("ix_users_sp_name", "sp_name"),
+        Index("ix_users_sp_city", "sp_city"),
+        Index("ix_users_sp_zip_code", "sp_zip_code"),
+        Index("ix_users_sp_state", "sp_state"),
+        Index(
+            "ix_users_sp_organization_type_lower",
+            func.lower(sp_organization_type).label("lower_organization_type"),
+            postgresql_ops={"lower_organization_type": "text_pattern_ops"},
+        ),
+        Index("ix_users_sp_estimated_clients", "sp_estimated_clients"),
+        Index("ix_users_client_city", "client_city"),
+        Index("ix_users_client_zip_code", "client_zip_code"),
+        Index("ix_users_client_region", "client_region"),
+        Index("ix_users_client_state", "client_state"),
+        # pg_trgm indexes serving ILIKE '%x%' and similarity search.
+        *[
+            Index(
+                f"ix_users_{column}_trgm",
+                column,
+                postgresql_using="gin",
+                postgresql_ops={column: "gin_trgm_ops"},
+            )
+            for column in [
+                "useremail",
+                "sp_county",
+                "sp_region",
+                "client_first_name",
+                "client_last_name",
+                "client_email",
+                "client_phone",
+                "client_city",
+                "client_county",
+                "client_state",
+            ]
+        ],
+        # jsonpath (@?) approved category lookups of the matching engine.
+        Index(
+            "ix_users_category_id",
+            "category_id",
+            postgresql_using="gin",
+            postgresql_ops={"category_id": "jsonb_path_ops"},
+        ),
+        # k-NN (<->) ordering and radius prefilter for providers near a client.
+        Index(
+            "ix_users_sp_location",
+            func.point(sp_long, sp_lat),
+            postgresql_using="gist",
+        ),
+        # Serves the bounding box prefilter of the local client radius search.
+        Index(
+            "ix_users_client_location",
+            func.point(client_long, client_lat),
+            postgresql_using="gist",
+        ),
+        Index(
+            "ix_users_sp_search_document",
+            "sp_search_document",
+            postgresql_using="gin",
+        ),
+        # Exact tax id blocking of claim-account and the import duplicate check.
+        Index("ix_users_sp_tax_id", "sp_tax_id"),
+        # Near-duplicate organization names (similarity / %) within a block.
+        Index(
+            "ix_users_sp_name_key_trgm",
+            "sp_name_key",
+            postgresql_using="gin",
+            postgresql_ops={"sp_name_key": "gin_trgm_ops"},
+        ),
+        # Conflict target of the provider upsert import (ON CONFLICT).
+        Index(
+            "ux_users_service_provider_useremail",
+            "useremail",
+            unique=True,
+            postgresql_where=text("role_type = 'service_provider'"),
+        ),
+    )
+
+
+# Client search uses trigram indexes, the extension has to exist first.
+event.listen(
+    User.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"),
+)
+
+
 class ExportData(Base):
     __tablename__ = "export_data"
 
@@ -211,6 +459,81 @@ class ExportData(Base):
     file_path = Column(JSONB, nullable=False, default={})
     uploaded_by = Column(UUID(as_uuid=True), ForeignKey("users.uuid"), nullable=False)
     
+class ExportJob(Base):
+    __tablename__ = "export_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    export_type = Column(String(50), nullable=False)
+    format = Column(String(10), nullable=False)
+    language = Column(String(10), nullable=True)
+    # Same export_type/format/language while queued or running -> same job.
+    dedupe_key = Column(String(255), nullable=False)
+    status = Column(String(20), nullable=False, default="queued")
+    total_rows = Column(Integer, nullable=True)
+    processed_rows = Column(Integer, nullable=False, default=0)
+    filename = Column(String(255), nullable=True)
+    file_path = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    requested_by = Column(UUID(as_uuid=True), ForeignKey("users.uuid"), nullable=True)
+    created_at = Column(TIMESTAMP, default=func.now())
+    # Bumped with every progress write; an active job that stops moving is stale.
+    updated_at = Column(TIMESTAMP, default=func.now(), onupdate=func.now())
+    started_at = Column(TIMESTAMP, nullable=True)
+    finished_at = Column(TIMESTAMP, nullable=True)
+
+    __table_args__ = (
+        Index(
+            "ux_export_jobs_active_dedupe_key",
+            "dedupe_key",
+            unique=True,
+            postgresql_where=text("status IN ('queued', 'running')"),
+        ),
+    )
+
+
+class ImportJob(Base):
+    __tablename__ = "import_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    import_type = Column(String(50), nullable=False)
+    filename = Column(String(255), nullable=False)
+    file_path = Column(Text, nullable=False)
+    status = Column(String(20), nullable=False, default="queued")
+    # Checkpoint: data rows already handled, committed with each chunk.
+    rows_processed = Column(Integer, nullable=False, default=0)
+    success_count = Column(Integer, nullable=False, default=0)
+    fail_count = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    uploaded_by = Column(UUID(as_uuid=True), ForeignKey("users.uuid"), nullable=True)
+    created_at = Column(TIMESTAMP, default=func.now())
+    updated_at = Column(TIMESTAMP, default=func.now(), onupdate=func.now())
+    finished_at = Column(TIMESTAMP, nullable=True)
+
+
+class OutboxEvent(Base):
+    """Side effect (email, WebSocket push) saved with the state change that causes it."""
+
+    __tablename__ = "outbox_events"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    kind = Column(String(50), nullable=False)
+    payload = Column(JSONB, nullable=False)
+    status = Column(String(20), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(TIMESTAMP, nullable=False, default=func.now())
+    last_error = Column(Text, nullable=True)
+    created_at = Column(TIMESTAMP, default=func.now())
+
+    __table_args__ = (
+        Index(
+            "ix_outbox_events_pending",
+            "available_at",
+            "id",
+            postgresql_where=text("status = 'pending'"),
+        ),
+    )
+
+
 class ResumeUpload(Base):
     __tablename__ = "resume_uploads"
 
@@ -1,3 +1,4 @@
+import asyncio
 import json
 from typing import Dict
 from uuid import UUID
@@ -13,13 +14,16 @@ from fastapi import (
     Request,
     Response,
     UploadFile,
+    WebSocket,
+    WebSocketDisconnect,
     status,
 )
+from fastapi.encoders import jsonable_encoder
 from pydantic import UUID4, EmailStr
 from sqlalchemy.orm import Session
 
 from src.api import schemas
-from src.common import admins, signup_document
+from src.common import admins, counting, export_jobs, signup_document
 from src.configs import database
 from src.models import models
 
@@ -27,6 +31,8 @@ get_db = database.get_db
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
+EXPORT_WS_INTERVAL = 1
+
 
 @router.post("/sub-admins")
 async def add_sub_admin(
@@ -92,10 +98,15 @@ async def get_all_subadmins(
     limit: int = Query(None),
     db: Session = Depends(get_db),
     name: str = Query(None),
+    count_strategy: str = Query(counting.EXACT, pattern="^(exact|estimated|cached)$"),
 ):
     try:
         return await admins.get_all_subadmins(
-            skip=skip, limit=limit, db=db, name_original=name
+            skip=skip,
+            limit=limit,
+            db=db,
+            name_original=name,
+            count_strategy=count_strategy,
         )
     except Exception as e:
         raise HTTPException(
@@ -369,8 +380,11 @@ async def read_all_broadcast(
     limit: int = None,
     db: Session = Depends(get_db),
     title: str = Query(None),
+    count_strategy: str = Query(counting.EXACT, pattern="^(exact|estimated|cached)$"),
 ):
-    return await admins.get_all_broadcast(user_id, skip, limit, db, title)
+    return await admins.get_all_broadcast(
+        user_id, skip, limit, db, title, count_strategy
+    )
 
 
 @router.delete("/delete-broadcast/{broadcast_id}")
@@ -384,9 +398,9 @@ async def create_admin(admin: schemas.Admin, db: Session = Depends(get_db)):
 
 
 @router.get("/download-revenue-report", response_class=Response)
-def download_report(db: Session = Depends(get_db)):
+def download_report():
     """API endpoint to generate and download revenue report"""
-    return admins.generate_report(db)
+    return admins.generate_report()
 
 
 @router.post("/add-rating-question")
@@ -621,6 +635,49 @@ def delete_site_settings(
     db: Session = Depends(get_db)
 ):
     return admins.delete_site_settings(db)
+
+
+@router.post("/export")
+def create_export(
+    export_type: str = Query(..., enum=list(export_jobs.EXPORT_FORMATS)),
+    format: str = Query("csv", enum=["csv", "xlsx"]),
+    language: str | None = Query(None),
+    requested_by: UUID4 | None = Query(None),
+    db: Session = Depends(get_db),
+):
+    """
+    Queue an export job. Poll /export/status or follow /export/ws/{id} for
+    progress, then fetch the file from /export/download.
+    """
+    return export_jobs.create_export_job(export_type, format, language, requested_by, db)
+
+
+@router.get("/export/status")
+def export_status(id: UUID4, db: Session = Depends(get_db)):
+    return export_jobs.get_export_job(id, db)
+
+
+@router.websocket("/export/ws/{id}")
+async def export_progress(websocket: WebSocket, id: UUID4):
+    """Push the job state every EXPORT_WS_INTERVAL seconds until it finishes."""
+    await websocket.accept()
+    try:
+        while True:
+            with database.SessionLocal() as db:
+                try:
+                    job = export_jobs.get_export_job(id, db)
+                except HTTPException as e:
+                    await websocket.send_json({"error": e.detail})
+                    break
+            await websocket.send_json(jsonable_encoder(job))
+            if job["status"] not in export_jobs.ACTIVE_STATUSES:
+                break
+            await asyncio.sleep(EXPORT_WS_INTERVAL)
+    except WebSocketDisconnect:
+        return
+    await websocket.close()
+
+
 @router.get("/export/download")
 def export_data(
     db: Session = Depends(get_db),
@@ -1,5 +1,4 @@
-
-from fastapi import APIRouter,Depends
+from fastapi import APIRouter,Depends,Query
 from src.configs import database
 from sqlalchemy.orm import Session
 import uuid
@@ -9,6 +8,8 @@ from sqlalchemy.orm.attributes import flag_modified
 
 
 from src.api import schemas
+from src.common import matching, pagination, projections
+from src.common.user import client_search_filter
 from src.models import models
 from src.configs.config import logger
 
@@ -26,10 +27,32 @@ get_db = database.get_db
 
 router = APIRouter(prefix="/casemanager", tags=["Case Manager"])
 
+# Public columns of a client row, password/permission are never selected.
+CLIENT_COLUMNS = [
+    "uuid",
+    "useremail",
+    "role_type",
+    "status",
+    "is_activated",
+    "profile_img",
+    "header_img",
+    "service_provider_ids",
+    "created_by",
+    "created_at",
+    "updated_at",
+]
+
+def format_client(row):
+    client = {column: getattr(row, column) for column in CLIENT_COLUMNS}
+    client["details"] = {"client": projections.details_section(row, projections.CLIENT_LIST_KEYS)}
+    return client
+
 @router.get("/get-clients")
-async def get_clients(uuid:str,skip:int = 0,limit:int = 10,search:str = None,db: Session = Depends(get_db)):
+async def get_clients(uuid:str,skip:int = 0,limit:int = 10,search:str = None,cursor:str = None,search_mode:str = Query(None, pattern="^(ilike|similarity)$"),db: Session = Depends(get_db)):
     """
-    Get all the clients which are not assigned to that service provider
+    Get all the clients which are not assigned to that service provider.
+    Pass cursor (empty for the first page) to page by next_cursor instead of skip.
+    search_mode=similarity matches misspelled names and orders by closeness.
     """
     get_user = db.query(models.User).filter(models.User.uuid == uuid).first()
     
@@ -55,24 +78,48 @@ async def get_clients(uuid:str,skip:int = 0,limit:int = 10,search:str = None,db:
             )
         ).order_by(models.User.created_at.desc())
         )
-    total_clients = base_query.count()
+    total_clients = base_query.count() if not cursor else None
 
     if search:
-        base_query = base_query.filter(
-            or_(
-                models.User.useremail.ilike(f"%{search}%"),
-                models.User.details['client']['first_name'].astext.ilike(f"%{search}%"),
-                models.User.details['client']['last_name'].astext.ilike(f"%{search}%"),
-                models.User.details['client']['email'].astext.ilike(f"%{search}%")
-            )
+        similarity = search_mode == "similarity"
+        if similarity and cursor is not None:
+            return {
+                "status": 400,
+                "message": "Cursor pagination is not supported for similarity search"
+            }
+        search_condition, search_rank = client_search_filter(
+            search,
+            [
+                models.User.useremail,
+                models.User.client_first_name,
+                models.User.client_last_name,
+                models.User.client_email,
+            ],
+            similarity=similarity,
+        )
+        base_query = base_query.filter(search_condition)
+        if search_rank is not None:
+            base_query = base_query.order_by(None).order_by(search_rank.desc(), models.User.created_at.desc())
+    base_query = projections.project(base_query, "client", projections.CLIENT_LIST_KEYS, CLIENT_COLUMNS)
+    if cursor is not None:
+        sort_column, row_key = pagination.user_sort_key("created_at", "client")
+        rows, next_cursor = pagination.keyset_page(
+            base_query, sort_column, models.User.uuid, cursor, limit, row_key, descending=True
         )
-    clients = base_query.offset(skip).limit(limit).all()
+        return {
+            "status": 200,
+            "message": "Clients fetched successfully",
+            "total_clients": total_clients,
+            "clients": [format_client(row) for row in rows],
+            "next_cursor": next_cursor
+        }
+    rows = base_query.offset(skip).limit(limit).all()
 
     return {
         "status": 200,
         "message": "Clients fetched successfully",
         "total_clients": total_clients,
-        "clients": clients
+        "clients": [format_client(row) for row in rows]
     }
     
 @router.get("/get-all-service-providers")
@@ -105,7 +152,7 @@ async def get_all_service_providers(uuid:str,skip:int = 0,limit:int = 10,search:
                 models.User.details['service_provider']['founder_first_name'].astext.ilike(f"%{search}%"),
                 models.User.details['service_provider']['founder_last_name'].astext.ilike(f"%{search}%"),
                 models.User.details['service_provider']['email'].astext.ilike(f"%{search}%"),
-                models.User.details['service_provider']['name'].astext.ilike(f"%{search}%")
+                models.User.sp_name.ilike(f"%{search}%")
         ).order_by(models.User.created_at.desc())
         )
     if associated_providers:
@@ -163,8 +210,6 @@ async def add_clients_sp(user_id,data:schemas.AssginClients,db: Session = Depend
             if data.uuid not in sp_ids:
                 sp_ids.append(data.uuid)
             get_client.service_provider_ids = sp_ids
-            db.commit()
-            db.refresh(get_client)
             new_request = models.Request(
                 id = uuid.uuid4(),
                 client_id = get_client.uuid,
@@ -172,7 +217,9 @@ async def add_clients_sp(user_id,data:schemas.AssginClients,db: Session = Depend
                 status = "approved"
             )
             db.add(new_request)
-            db.commit()
+    # All assignments are saved in one transaction, or none of them.
+    db.commit()
+    matching.invalidate_providers()
     return {  
         "status": 200,
         "message": "Clients assigned successfully"
@@ -219,6 +266,7 @@ async def assign_providers(user_id,data:schemas.AssginProviders,db: Session = De
             get_client.service_provider_ids = sp_ids
             db.commit()
             db.refresh(get_client)
+    matching.invalidate_providers()
     return {
         "status": 200,
         "message": "Providers assigned successfully"
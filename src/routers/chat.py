@@ -25,6 +25,7 @@ from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
 
 from src.api import schemas
+from src.common import reference_cache
 from src.common.email_service import send_email
 from src.common.tasks import get_notifications as get_chat_notifications
 from src.common.tasks import (
@@ -294,14 +295,10 @@ def check_for_prospective_chat(sender: str, reciever: str, db: Session):
     if not membership:
         raise LookupError("Membership record not found.")
 
-    subscription = (
-        db.query(models.Subscription)
-        .filter(models.Subscription.subscription_id == membership.subscription_id)
-        .first()
-    )
+    plan = reference_cache.get_subscription_plan(membership.subscription_id, db)
 
-    if subscription:
-        return True, subscription.chat_with_prospective_clients, provider_user.uuid
+    if plan:
+        return True, plan["chat_with_prospective_clients"], provider_user.uuid
 
     return True, True, ""
 
@@ -726,8 +723,9 @@ def get_user_chats(
 
         membership_obj = db.query(models.Membership).filter(and_(models.Membership.uuid == other_user_id, or_(models.Membership.status == "active", models.Membership.status == "trial"))).first()
 
+        plan = None
         if membership_obj:
-            subscription_obj = db.query(models.Subscription).filter(models.Subscription.subscription_id == membership_obj.subscription_id).first()
+            plan = reference_cache.get_subscription_plan(membership_obj.subscription_id, db)
 
         results.append(
             {
@@ -744,8 +742,8 @@ def get_user_chats(
                 "unread_count": unread_count,
                 "updated_at": chat.updated_at.astimezone().isoformat(),
                 "subscription_id": membership_obj.subscription_id if membership_obj else "",
-                "view_other_client": subscription_obj.view_other_client if subscription_obj else "",
-                "chat_with_prospective_clients": subscription_obj.chat_with_prospective_clients if subscription_obj else ""
+                "view_other_client": plan["view_other_client"] if plan else "",
+                "chat_with_prospective_clients": plan["chat_with_prospective_clients"] if plan else ""
             }
         )
         logger.log_info(
@@ -7,6 +7,7 @@ from fastapi import (
     Depends,
     File,
     Form,
+    Query,
     Request,
     UploadFile,
 )
@@ -19,7 +20,7 @@ from src.api.schemas import (
     CreateClient,
     UpdateClientSetting,
 )
-from src.common import client
+from src.common import client, matching
 from src.configs import database
 
 get_db = database.get_db
@@ -250,3 +251,13 @@ def change_assessment(
 @router.get("/client-dashboard")
 def get_client_dashboard(client_uuid: UUID, db: Session = Depends(get_db)):
     return client.get_client_dashboard(client_uuid, db)
+
+
+@router.get("/matched-providers")
+def get_matched_providers(
+    client_uuid: UUID,
+    limit: int = Query(matching.DEFAULT_TOP_N, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    """Providers ranked for the client's needs, distance, rating and capacity."""
+    return matching.get_matched_providers(client_uuid, db, limit)
@@ -11,6 +11,7 @@ from sqlalchemy import case, func
 
 from src.api import schemas
 from src.api.schemas import PaymentRequest
+from src.common import outbox, pagination
 from src.common.email_service import send_email
 from src.common.translate import translate_fields
 from src.configs import database
@@ -286,8 +287,6 @@ async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
             user_obj = db.query(models.User).filter(models.User.uuid == metadata.get("service_provider_id")).first()
             if user_obj:
                 user_obj.is_titanium_requested = False
-                db.commit()
-                db.refresh(user_obj)
             new_titanium_membership = models.Titanium(
                 uuid=metadata.get("service_provider_id"),
                 clients_count=metadata.get("clients_count"),
@@ -308,14 +307,6 @@ async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
                 payment_price=int(float(metadata.get("price"))),
             )
             db.add(new_titanium_membership)
-            db.commit()
-            db.refresh(new_titanium_membership)
-            logger.log_info(f"New titanium membership created {new_titanium_membership}")
-            user_obj = (
-                db.query(models.User)
-                .filter(models.User.uuid == metadata.get("service_provider_id"))
-                .first()
-            )
             password = decrypt_password(user_obj.password, secret_key)
             body = templates.get_template("titaniumCreated.html").render(
                 service_provider_name=user_obj.details["service_provider"]["name"],
@@ -324,12 +315,18 @@ async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
                 temp_password=password,
                 support_contact="888-888-8888",
             )
-            await send_email(
+            # Membership and welcome email are committed together, the
+            # outbox dispatcher sends the email after the webhook returns.
+            outbox.add_email(
+                db,
                 user_obj.useremail,
                 "Welcome to the Titanium Plan – Your Access Details Inside",
                 body,
             )
-            logger.log_info("Email sended to user successfully")
+            db.commit()
+            db.refresh(new_titanium_membership)
+            outbox.notify()
+            logger.log_info(f"New titanium membership created {new_titanium_membership}")
         else:
             billing_date = datetime.fromtimestamp(session["created"])
 
@@ -375,12 +372,12 @@ async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
                     email=user_obj.useremail,
                     temp_password=password,
                 )
-                await send_email(
+                outbox.add_email(
+                    db,
                     user_email,
                     "Welcome to the Trial Plan – Your Access Details Inside",
                     body,
                 )
-                logger.log_info("Email sended to user successfully")
                 # Set trial period
                 new_membership.status = "trial"
                 new_membership.expiry_date = billing_date + relativedelta(days=90)
@@ -395,6 +392,7 @@ async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
             db.add(new_membership)
             db.commit()
             db.refresh(new_membership)
+            outbox.notify()
     elif event["type"] == "customer.subscription.updated":
         subscription = event["data"]["object"]
         subscription_id = subscription.get("id")
@@ -533,6 +531,7 @@ async def get_revenue(
     sort_by: str = None,
     sort_order: str = "asc",
     old_new: str = None,
+    cursor: str = None,
     db: Session = Depends(get_db),
 ):
     name_translate = await translate_fields(name, fields=[])
@@ -696,14 +695,50 @@ async def get_revenue(
             else:
                 query = query.order_by(column.asc())
 
-    # Apply pagination.
-    total_count_query = db.query(func.count()).select_from(query.subquery()).scalar()
-    query = query.limit(limit).offset(skip)
-    results = query.all()
-    main_subq = query.subquery()
-    total_revenue = db.query(
-        func.coalesce(func.sum(main_subq.c.total_amount), 0)
-    ).scalar()
+    next_cursor = None
+    if cursor is not None:
+        # Keyset mode seeks on the DISTINCT result, so wrap it as a subquery;
+        # the total is only computed for the first page.
+        total_count_query = (
+            db.query(func.count()).select_from(query.subquery()).scalar()
+            if not cursor
+            else None
+        )
+        revenue_subq = query.order_by(None).subquery()
+        sort_column, row_key = {
+            "name": (
+                pagination.text_sort_key(revenue_subq.c.provider_name),
+                lambda row: (row.provider_name or "", row.uuid),
+            ),
+            "email": (
+                revenue_subq.c.useremail,
+                lambda row: (row.useremail, row.uuid),
+            ),
+        }.get(
+            sort_by,
+            (revenue_subq.c.sign_up_date, lambda row: (row.sign_up_date, row.uuid)),
+        )
+        results, next_cursor = pagination.keyset_page(
+            db.query(revenue_subq),
+            sort_column,
+            revenue_subq.c.uuid,
+            cursor,
+            limit,
+            row_key,
+            descending=not sort_by or sort_order.lower() == "desc",
+        )
+        total_revenue = sum(row.total_amount or 0 for row in results)
+    else:
+        # Apply pagination.
+        total_count_query = (
+            db.query(func.count()).select_from(query.subquery()).scalar()
+        )
+        query = query.limit(limit).offset(skip)
+        results = query.all()
+        main_subq = query.subquery()
+        total_revenue = db.query(
+            func.coalesce(func.sum(main_subq.c.total_amount), 0)
+        ).scalar()
 
     # Format the response.
     revenue_data = [
@@ -727,8 +762,11 @@ async def get_revenue(
         for row in results
     ]
 
-    return {
+    response = {
         "total_count": total_count_query,
         "total_revenue": total_revenue,
         "data": revenue_data,
     }
+    if cursor is not None:
+        response["next_cursor"] = next_cursor
+    return response
@@ -21,7 +21,7 @@ from src.api.schemas import (
     CreateServiceProvider,
     UpdateServiceProvider,
 )
-from src.common import provider
+from src.common import counting, provider
 from src.configs import database
 
 get_db = database.get_db
@@ -272,13 +272,23 @@ def get_all_staff(
     db: Session = Depends(get_db),
     name: str = Query(None),
     created_by: UUID = None,
+    cursor: str | None = Query(None),
+    count_strategy: str = Query(counting.EXACT, pattern="^(exact|estimated|cached)$"),
 ):
     try:
         return asyncio.run(
             provider.get_all_staff(
-                skip=skip, limit=limit, db=db, name_original=name, created_by=created_by
+                skip=skip,
+                limit=limit,
+                db=db,
+                name_original=name,
+                created_by=created_by,
+                cursor=cursor,
+                count_strategy=count_strategy,
             )
         )
+    except HTTPException:
+        raise
     except Exception as e:
         return JSONResponse(status_code=500, content=str(e))
 
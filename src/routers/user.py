@@ -4,7 +4,6 @@ import random
 from datetime import datetime, timedelta
 
 from fastapi import APIRouter, Depends, File, Form, Query, Request, UploadFile
-from fastapi.responses import StreamingResponse
 from pydantic import UUID4, BaseModel, EmailStr
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import not_
@@ -18,8 +17,7 @@ from src.api.schemas import (
 )
 from src.models import models
 from src.common.email_service import send_email
-from src.common import user
-from src.common.translate import translate_fields_to_spanish
+from src.common import counting, exports, identity, import_jobs, user
 from src.configs import database
 from src.configs.config import logger
 from src.common.tasks import redis_app
@@ -88,6 +86,13 @@ def get_all_service_providers(
     secondary_need: str | None = Query(None),
     role_type: str = Query(None),
     region: str | None = Query(None),
+    cursor: str | None = Query(None),
+    count_strategy: str = Query(counting.EXACT, pattern="^(exact|estimated|cached)$"),
+    search_mode: str | None = Query(None, pattern="^(ilike|ranked)$"),
+    near_me: bool = Query(False),
+    lat: float | None = Query(None, ge=-90, le=90),
+    long: float | None = Query(None, ge=-180, le=180),
+    radius: float | None = Query(None, gt=0),
 ):
     return asyncio.run(
         user.get_all_service_providers(
@@ -114,6 +119,13 @@ def get_all_service_providers(
             secondary_need=secondary_need,
             role_type=role_type,
             region=region,
+            cursor=cursor,
+            count_strategy=count_strategy,
+            search_mode=search_mode,
+            near_me=near_me,
+            lat=lat,
+            long=long,
+            radius=radius,
         )
     )
 
@@ -323,6 +335,9 @@ def get_all_client(
     city: str = Query(None),
     category: int = Query(None),
     sort_order: str = Query("asc"),
+    cursor: str | None = Query(None),
+    count_strategy: str = Query(counting.EXACT, pattern="^(exact|estimated|cached)$"),
+    search_mode: str | None = Query(None, pattern="^(ilike|similarity)$"),
 ):
     return asyncio.run(
         user.get_all_client(
@@ -338,6 +353,9 @@ def get_all_client(
             city=city,
             category=category,
             sort_order=sort_order,
+            cursor=cursor,
+            count_strategy=count_strategy,
+            search_mode=search_mode,
         )
     )
 
@@ -356,6 +374,9 @@ def get_all_other_client(
     city: str = Query(None),
     category: int = Query(None),
     sort_order: str = Query("asc"),
+    cursor: str | None = Query(None),
+    count_strategy: str = Query(counting.EXACT, pattern="^(exact|estimated|cached)$"),
+    search_mode: str | None = Query(None, pattern="^(ilike|similarity)$"),
 ):
     return asyncio.run(
         user.get_all_client(
@@ -372,6 +393,9 @@ def get_all_other_client(
             category=category,
             sort_order=sort_order,
             is_other_client=True,
+            cursor=cursor,
+            count_strategy=count_strategy,
+            search_mode=search_mode,
         )
     )
 
@@ -548,14 +572,35 @@ def get_favourite_blocked_users(
 async def bulk_upload_clients(
     admin_uuid: UUID, file: UploadFile = File(...), db: Session = Depends(get_db)
 ):
-    return await user.bulk_client_upload(admin_uuid, file, db)
+    """
+    Queue a client import. The file is processed in chunks, poll
+    /client-upload/{id} for progress.
+    """
+    return await import_jobs.start_client_import(admin_uuid, file, db)
+
+
+@router.get("/client-upload/{id}")
+def client_upload_status(id: UUID4, db: Session = Depends(get_db)):
+    return import_jobs.get_import_job(id, db)
+
+
+@router.post("/client-upload/{id}/resume")
+def resume_client_upload(id: UUID4, db: Session = Depends(get_db)):
+    return import_jobs.resume_import(id, db)
 
 
 @router.post("/service-provider-upload")
 async def bulk_upload_service_provider(
-    admin_uuid: UUID, file: UploadFile = File(...), db: Session = Depends(get_db)
+    admin_uuid: UUID,
+    file: UploadFile = File(...),
+    mode: str = Query("insert", pattern="^(insert|upsert)$"),
+    db: Session = Depends(get_db),
 ):
-    return await user.bulk_service_provider_upload(admin_uuid, file, db)
+    """
+    mode=upsert refreshes providers already registered (matched on email or
+    tax_id) instead of reporting them as failures. Claimed profiles are skipped.
+    """
+    return await user.bulk_service_provider_upload(admin_uuid, file, db, mode)
 
 
 @router.post("/categoty-upload")
@@ -571,47 +616,22 @@ async def export_clients(
     language: str = Query(None),
     db: Session = Depends(get_db),
 ):
-    fields_to_translate = [
-        "first_name",
-        "last_name",
-        "gender",
-        "housing_situation",
-        "address_1",
-        "address_2",
-        "city",
-        "county",
-        "state",
-        "zip_code",
-        "comments",
-        "Question",
-        "question",
-        "category_name",
-    ]
-
     """Exports client data in CSV or Excel format based on user choice."""
-    data = user.generate_client_data(db)
-
-    if not data:
+    if not db.query(models.User.uuid).filter(models.User.role_type == "client").first():
         return {"message": "No client data available"}
 
+    data = user.generate_client_data()
+
     if language == "es":
-        data = [
-            await translate_fields_to_spanish(row, fields_to_translate) for row in data
-        ]
+        data = exports.translate_records(data, user.CLIENT_EXPORT_TRANSLATED_FIELDS)
 
     if format == "csv":
-        csv_file = user.generate_csv(data)
-        response = StreamingResponse(csv_file, media_type="text/csv")
-        response.headers["Content-Disposition"] = "attachment; filename=clients.csv"
-    else:
-        excel_file = user.generate_excel(data)
-        response = StreamingResponse(
-            excel_file,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        return exports.streaming_response(
+            user.generate_csv(data), exports.CSV_MEDIA_TYPE, "clients.csv"
         )
-        response.headers["Content-Disposition"] = "attachment; filename=clients.xlsx"
-
-    return response
+    return exports.streaming_response(
+        user.generate_excel(data), exports.XLSX_MEDIA_TYPE, "clients.xlsx"
+    )
 
 
 @router.get("/export-service-providers")
@@ -620,54 +640,32 @@ async def export_service_providers(
     language: str = Query(None),
     db: Session = Depends(get_db),
 ):
-    fields_to_translate = [
-        "name",
-        "organization_type",
-        "contact_title",
-        "contact_name",
-        "founder_first_name",
-        "founder_last_name",
-        "address_1",
-        "address_2",
-        "county",
-        "city",
-        "country",
-        "state",
-        "description",
-        "comments",
-        "staff_first_name",
-        "staff_last_name",
-    ]
-
     """Export service providers as CSV or Excel."""
+    data = user.generate_service_provider_data()
 
     if language == "es":
-        data = [
-            await translate_fields_to_spanish(row, fields_to_translate) for row in data
-        ]
+        data = exports.translate_records(
+            data, user.SERVICE_PROVIDER_EXPORT_TRANSLATED_FIELDS
+        )
 
     if format == "excel":
-        file_output = user.generate_service_provider_excel(db)
-        media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        file_ext = "xlsx"
-    else:
-        file_output = user.generate_service_provider_csv(db)
-        media_type = "text/csv"
-        file_ext = "csv"
-
-    response = StreamingResponse(file_output, media_type=media_type)
-    response.headers["Content-Disposition"] = (
-        f"attachment; filename=service_providers.{file_ext}"
+        return exports.streaming_response(
+            user.generate_service_provider_excel(data),
+            exports.XLSX_MEDIA_TYPE,
+            "service_providers.xlsx",
+        )
+    return exports.streaming_response(
+        user.generate_service_provider_csv(data),
+        exports.CSV_MEDIA_TYPE,
+        "service_providers.csv",
     )
-    return response
 
 
 @router.get("/export-categories")
 def export_categories(db: Session = Depends(get_db)):
-    csv_file = user.generate_category_csv(db)
-    response = StreamingResponse(csv_file, media_type="text/csv")
-    response.headers["Content-Disposition"] = "attachment; filename=categories.csv"
-    return response
+    return exports.streaming_response(
+        user.generate_category_csv(), exports.CSV_MEDIA_TYPE, "categories.csv"
+    )
 
 
 @router.patch("/change-password")
@@ -773,17 +771,7 @@ async def send_otp(email: EmailStr, user_type: str, db: Session = Depends(get_db
 
 @router.get("/claim-account")
 def get_claim_amount(tax_id: str,organization_name: str, db: Session = Depends(get_db)):
-    get_user_obj = (
-        db.query(models.User)
-        .filter(
-            models.User.details["service_provider"]["tax_id"].astext == tax_id,
-            models.User.role_type == "service_provider",
-            # models.User.is_claimed == False,
-            # models.User.is_imported == True,
-            models.User.details["service_provider"]["name"].astext.ilike(f"%{organization_name}%"),
-        )
-        .first()
-    )
+    get_user_obj = identity.find_claimable_provider(db, tax_id, organization_name)
     # print(type(get_user_obj.details))
     # print("get_user_obj",get_user_obj.details['service_provider'])
     if get_user_obj is None :
@@ -803,6 +791,7 @@ def get_import_history(
     uuid: UUID,
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    count_strategy: str = Query(counting.EXACT, pattern="^(exact|estimated|cached)$"),
     db: Session = Depends(get_db),
 ):
     user_obj = db.query(models.User).filter(models.User.uuid == uuid).first()
@@ -815,7 +804,7 @@ def get_import_history(
     base_query = db.query(models.ExportData).filter(
         models.ExportData.uploaded_by == uuid
     )
-    total = base_query.count()
+    total = counting.count_rows(base_query, db, count_strategy, "import_history")
     results = base_query.offset(skip).limit(limit).all()
 
     return {"status_code": 200, "data": results, "total": total}
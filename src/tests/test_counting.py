@@ -0,0 +1,58 @@
+from sqlalchemy import Column, Integer, String, create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session, declarative_base
+
+from src.common import counting
+from src.models import models
+
+Base = declarative_base()
+
+
+class Item(Base):
+    __tablename__ = "items"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+
+
+def _driver_sql(statement):
+    """The SQL psycopg2 sends for statement, bound values interpolated as it does."""
+    compiled = statement.compile(dialect=postgresql.psycopg2.dialect())
+    return compiled.string % {
+        name: f"'{value}'" for name, value in compiled.params.items()
+    }
+
+
+def test_explain_keeps_similarity_and_ilike_operators():
+    statement = (
+        Session()
+        .query(models.User.uuid)
+        .filter(
+            models.User.client_first_name.op("%>")("jane"),
+            models.User.client_email.ilike("%doe%"),
+        )
+        .statement
+    )
+
+    sql = _driver_sql(counting.Explain(statement))
+
+    assert sql.startswith("EXPLAIN (FORMAT JSON) SELECT")
+    assert "%> 'jane'" in sql
+    assert "ILIKE '%doe%'" in sql
+    assert "%%" not in sql
+
+
+def test_failed_estimate_falls_back_to_exact_count():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        names = ["jane doe", "john doe", "ann"]
+        db.add_all([Item(name=name) for name in names])
+        db.commit()
+        query = db.query(Item).filter(Item.name.ilike("%doe%"))
+
+        # SQLite has no EXPLAIN (FORMAT JSON), the estimate fails.
+        total = counting.count_rows(query, db, counting.ESTIMATED)
+
+        assert total == len([name for name in names if "doe" in name])
+        assert db.in_transaction()
@@ -0,0 +1,81 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.common import details_schema, projections, user
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        (None, None),
+        (["a", "b"], ["a", "b"]),
+        ('["a", "b"]', ["a", "b"]),
+        ("['a', 'b']", ["a", "b"]),
+        ("a, b,,c ", ["a", "b", "c"]),
+        ("", []),
+        (7, [7]),
+    ],
+)
+def test_as_list(value, expected):
+    assert details_schema.as_list(value) == expected
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        (None, None),
+        ("1,2, 3", [1, 2, 3]),
+        ("[4, 5]", [4, 5]),
+        (["6", 7, "x", True], [6, 7]),
+        ("3", [3]),
+        (3, [3]),
+        ("", []),
+    ],
+)
+def test_as_ids(value, expected):
+    assert details_schema.as_ids(value) == expected
+
+
+def test_as_id_is_scalar_for_one_id():
+    ids = [details_schema.as_id(value) for value in ("3", "1,2", "none")]
+
+    assert ids == [3, [1, 2], None]
+
+
+def test_normalize_section_only_touches_declared_keys():
+    values = {"category_id": "3", "skills": "cooking, driving", "name": "1,2"}
+
+    normalized = details_schema.normalize_section("client", values)
+
+    assert normalized == {
+        "category_id": [3],
+        "skills": ["cooking", "driving"],
+        "name": "1,2",
+    }
+    assert values["category_id"] == "3"
+
+
+def test_normalize_details_stamps_schema_version():
+    details = details_schema.normalize_details(
+        {"service_provider": {"category_id": "4", "keywords": "food,shelter"}}
+    )
+
+    assert details == {
+        "service_provider": {"category_id": 4, "keywords": ["food", "shelter"]},
+        details_schema.SCHEMA_VERSION_KEY: details_schema.SCHEMA_VERSION,
+    }
+
+
+@pytest.mark.parametrize("category_id", [[3, 5], "3,5", None])
+def test_client_export_reads_every_category_id_shape(category_id):
+    row = SimpleNamespace(
+        profile_img=None,
+        header_img=None,
+        **{f"details_{key}": None for key in projections.CLIENT_EXPORT_KEYS},
+    )
+    row.details_category_id = category_id
+
+    exported = user.format_client_export_row(row, {3: "Food", 5: "Housing"})
+
+    assert exported["category_name"] == ("Food, Housing" if category_id else "")
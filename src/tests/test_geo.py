@@ -0,0 +1,69 @@
+import math
+
+import numpy as np
+import pytest
+
+from src.common import geo
+
+
+@pytest.fixture
+def _zip_table(tmp_path, monkeypatch):
+    table = np.array(
+        [(601, 18.18, -66.75), (7001, 40.58, -74.27), (94105, 37.79, -122.39)],
+        dtype=geo.ZIP_CENTROID_DTYPE,
+    )
+    path = tmp_path / "zip_centroids.npy"
+    np.save(path, table)
+    monkeypatch.setattr(geo, "ZIP_CENTROIDS_PATH", str(path))
+    geo._zip_table.cache_clear()
+    yield
+    geo._zip_table.cache_clear()
+
+
+def test_zip_numbers_accepts_common_spellings():
+    numbers = geo._zip_numbers(
+        ["07001", "7001", "07001-1234", "7001.0", " 94105 ", "ABCDE", None, "12"]
+    )
+
+    assert numbers.tolist() == [7001, 7001, 7001, 7001, 94105, -1, -1, -1]
+
+
+@pytest.mark.usefixtures("_zip_table")
+def test_zip_centroids_looks_up_each_zip():
+    lat, long = geo.zip_centroids(["94105", "00601", "99999", None])
+
+    assert lat[:2] == pytest.approx([37.79, 18.18], abs=1e-4)
+    assert long[:2] == pytest.approx([-122.39, -66.75], abs=1e-4)
+    assert np.isnan(lat[2:]).all()
+    assert np.isnan(long[2:]).all()
+
+
+def test_zip_centroids_without_table_returns_nan(tmp_path, monkeypatch):
+    monkeypatch.setattr(geo, "ZIP_CENTROIDS_PATH", str(tmp_path / "missing.npy"))
+    geo._zip_table.cache_clear()
+    try:
+        lat, long = geo.zip_centroids(["07001"])
+    finally:
+        geo._zip_table.cache_clear()
+
+    assert math.isnan(lat[0])
+    assert math.isnan(long[0])
+
+
+@pytest.mark.usefixtures("_zip_table")
+def test_fill_coordinates_keeps_existing_location():
+    details = {"zip_code": "07001", "lat": "41.0", "long": "-75.0"}
+
+    assert geo.fill_coordinates(details) == {
+        "zip_code": "07001",
+        "lat": "41.0",
+        "long": "-75.0",
+    }
+
+
+@pytest.mark.usefixtures("_zip_table")
+def test_fill_coordinates_uses_zip_centroid():
+    details = geo.fill_coordinates({"zip_code": "07001", "lat": None, "long": ""})
+
+    assert details["lat"] == pytest.approx(40.58, abs=1e-4)
+    assert details["long"] == pytest.approx(-74.27, abs=1e-4)
@@ -0,0 +1,68 @@
+import re
+
+import pandas as pd
+import pytest
+
+from src.common import identity
+from src.models import models
+
+NAMES = [
+    "The Hope Center, Inc.",
+    "HOPE   center",
+    "Hope-Center LLC",
+    "Smith & Co. Corporation",
+    "Company of the Ozarks",
+    "Tacos and more",
+    "St. Mary's Home",
+    "Inc.",
+    "",
+]
+
+
+def _sql_name_key(value):
+    """Apply the regexp_replace steps of models.details_name_key the way Postgres does."""
+    expression = str(models.details_name_key("service_provider", "name").sqltext)
+    patterns = re.findall(r"'((?:[^']|'')+)', ' ', 'g'\)", expression)
+    assert patterns, expression
+    value = value.lower()
+    for pattern in patterns:
+        value = re.sub(pattern.replace("\\m", r"\b").replace("\\M", r"\b"), " ", value)
+    return value.strip() or None
+
+
+@pytest.mark.parametrize("name", NAMES)
+def test_normalize_name_matches_generated_column(name):
+    assert identity.normalize_name(name) == _sql_name_key(name)
+
+
+def test_normalize_name_drops_noise_words():
+    assert identity.normalize_name("The Hope Center, Inc.") == "hope center"
+    assert identity.normalize_name("Smith & Co. Corporation") == "smith"
+    assert identity.normalize_name(None) is None
+
+
+def test_normalize_tax_id_keeps_digits():
+    assert identity.normalize_tax_id("12-3456789") == "123456789"
+    assert identity.normalize_tax_id(" n/a ") is None
+    assert identity.normalize_tax_id(None) is None
+
+
+def test_block_of_uses_zip_prefix():
+    assert identity.block_of("07001") == "070"
+    assert identity.block_of("7001") == "070"
+    assert identity.block_of("94105-1234") == "941"
+    assert identity.block_of("12") is None
+
+
+def test_file_duplicates_by_tax_id_or_name_in_block():
+    df = pd.DataFrame(
+        {
+            "tax_id": ["12-3456789", "123456789", None, None, None],
+            "name": ["A", "B", "Hope Center Inc", "hope center", "Hope Center"],
+            "zip_code": ["07001", "07001", "07001", "07002", "94105"],
+        }
+    )
+
+    duplicates = identity.file_duplicates(identity.identity_keys(df))
+
+    assert duplicates.tolist() == [False, True, False, True, False]
@@ -0,0 +1,56 @@
+import pandas as pd
+
+from src.common import imports
+
+
+def test_clean_trims_and_blanks_cells():
+    df = pd.DataFrame({"email": ["  a@x.com ", "", None], "zip_code": ["07001", " ", "1"]})
+
+    cleaned = imports.clean(df)
+
+    assert cleaned["email"].tolist()[0] == "a@x.com"
+    assert cleaned["email"].isna().tolist() == [False, True, True]
+    assert cleaned["zip_code"].tolist()[0] == "07001"
+    assert pd.isna(cleaned["zip_code"][1])
+
+
+def test_validate_reports_first_reason_per_row():
+    df = pd.DataFrame(
+        {
+            "contact_name": ["Ann", None, "Bob", "Cy", "Dee"],
+            "email": ["a@x.com", "b@x.com", "not-an-email", "A@X.com", None],
+        }
+    )
+
+    reasons = imports.validate(df, ["contact_name", "email"])
+
+    assert reasons.isna().tolist() == [True, False, False, False, False]
+    assert reasons[1:].tolist() == [
+        "Missing contact_name",
+        "Invalid email",
+        "Duplicate email in file",
+        "Missing email",
+    ]
+
+
+def test_reject_keeps_earlier_reasons():
+    reasons = pd.Series([None, "Invalid email", None], dtype=object)
+    mask = pd.Series([True, True, False])
+
+    reasons = imports.reject(reasons, mask, "Email already exists")
+
+    assert reasons[:2].tolist() == ["Email already exists", "Invalid email"]
+    assert pd.isna(reasons[2])
+
+
+def test_records_uses_none_for_missing_values_and_columns():
+    df = pd.DataFrame({"email": ["a@x.com", None], "lat": [40.5, float("nan")]})
+
+    assert imports.records(df, ["email", "lat", "tax_id"]) == [
+        {"email": "a@x.com", "lat": 40.5, "tax_id": None},
+        {"email": None, "lat": None, "tax_id": None},
+    ]
+
+
+def test_chunked_splits_in_order():
+    assert list(imports.chunked([1, 2, 3, 4, 5], size=2)) == [[1, 2], [3, 4], [5]]
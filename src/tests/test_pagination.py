@@ -0,0 +1,29 @@
+import uuid
+from datetime import datetime
+from http import HTTPStatus
+
+import pytest
+from fastapi import HTTPException
+
+from src.common import pagination
+
+
+@pytest.mark.parametrize(
+    "sort_value",
+    [datetime(2025, 3, 1, 12, 30, 5, 123456), "jane@example.com", "", 42],
+)
+def test_cursor_round_trip(sort_value):
+    row_uuid = uuid.uuid4()
+
+    cursor = pagination.encode_cursor(sort_value, row_uuid)
+
+    assert "=" not in cursor
+    assert pagination.decode_cursor(cursor) == (sort_value, row_uuid)
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "e30", "!!!"])
+def test_decode_cursor_rejects_garbage(cursor):
+    with pytest.raises(HTTPException) as error:
+        pagination.decode_cursor(cursor)
+
+    assert error.value.status_code == HTTPStatus.BAD_REQUEST
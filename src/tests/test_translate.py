@@ -0,0 +1,70 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.common import translate
+
+
+@pytest.fixture
+def api_calls(monkeypatch):
+    """Replace the HTTP call and the caches, recording every request payload."""
+    calls = []
+
+    async def post(payload):
+        calls.append(payload)
+        translations = [{"translatedText": f"es:{text}"} for text in payload["q"]]
+        return SimpleNamespace(
+            status_code=200,
+            json=lambda: {"data": {"translations": translations}},
+        )
+
+    monkeypatch.setattr(translate, "_post", post)
+    monkeypatch.setattr(translate, "_cache_get_many", lambda *_: {})
+    monkeypatch.setattr(translate, "_cache_set_many", lambda *_: None)
+    return calls
+
+
+def test_batches_respect_segment_and_size_limits(monkeypatch):
+    monkeypatch.setattr(translate, "MAX_BATCH_SEGMENTS", 3)
+    monkeypatch.setattr(translate, "MAX_BATCH_CHARS", 10)
+
+    batches = list(translate._batches(["a", "b", "c", "d", "eeeeeeeeee", "f"]))
+
+    assert batches == [["a", "b", "c"], ["d"], ["eeeeeeeeee"], ["f"]]
+
+
+def test_translate_batch_sends_each_distinct_string_once(api_calls):
+    translations = asyncio.run(
+        translate.translate_batch(["Food", "Shelter", "Food", "", "12-34"])
+    )
+
+    assert translations == {"Food": "es:Food", "Shelter": "es:Shelter", "12-34": "12-34"}
+    assert [call["q"] for call in api_calls] == [["Food", "Shelter"]]
+
+
+def test_translate_batch_keeps_text_of_failed_requests(monkeypatch):
+    async def post(_payload):
+        return None
+
+    monkeypatch.setattr(translate, "_post", post)
+    monkeypatch.setattr(translate, "_cache_get_many", lambda *_: {})
+
+    assert asyncio.run(translate.translate_batch(["Food"])) == {"Food": "Food"}
+
+
+def test_translate_records_to_spanish_reuses_memo(api_calls):
+    records = [
+        {"city": "Austin", "skills": ["Cooking", "Driving"], "zip_code": "73301"},
+        {"city": "Austin", "skills": ["Cooking"], "zip_code": "73301"},
+    ]
+    memo = {"Driving": "Conducir"}
+
+    asyncio.run(translate.translate_records_to_spanish(records, ["city", "skills"], memo))
+
+    assert records == [
+        {"city": "es:Austin", "skills": ["es:Cooking", "Conducir"], "zip_code": "73301"},
+        {"city": "es:Austin", "skills": ["es:Cooking"], "zip_code": "73301"},
+    ]
+    assert len(api_calls) == 1
+    assert sorted(api_calls[0]["q"]) == ["Austin", "Cooking"]